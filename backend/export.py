@@ -0,0 +1,81 @@
+"""Streaming NDJSON / CSV export straight off a Motor cursor"""
+
+import csv
+import io
+import json
+import logging
+import os
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '500'))
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Oldest first so an interrupted export can resume with ``since=<last created_at>``
+EXPORT_SORT = [("created_at", 1), ("id", 1)]
+
+
+def export_query(since: Optional[datetime]) -> Dict:
+    # Inclusive, so rows sharing the resume timestamp are re-sent rather than lost; consumers upsert on ``id``
+    return {"created_at": {"$gte": since}} if since else {}
+
+
+def export_cursor(collection, since: Optional[datetime]):
+    return (
+        collection.find(export_query(since), {"_id": 0})
+        .sort(EXPORT_SORT)
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+
+
+async def iter_ndjson(cursor, model: Type[BaseModel]) -> AsyncIterator[bytes]:
+    """One validated JSON document per line; at most one cursor batch is held in memory"""
+    try:
+        async for document in cursor:
+            yield model(**document).model_dump_json().encode("utf-8") + b"\n"
+    except Exception as e:
+        # Headers are already sent, so the truncated body is the only signal left
+        logger.error(f"Export aborted: {e}")
+
+
+def _csv_cell(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def iter_csv(cursor, model: Type[BaseModel]) -> AsyncIterator[bytes]:
+    """CSV with a header row taken from the model's fields; lists and dicts are JSON-encoded"""
+    fields: List[str] = list(model.model_fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so spreadsheet apps detect UTF-8 and render the Arabic text
+    yield "\ufeff".encode("utf-8")
+    writer.writerow(fields)
+    try:
+        async for document in cursor:
+            row = model(**document)
+            writer.writerow([_csv_cell(getattr(row, field)) for field in fields])
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    except Exception as e:
+        logger.error(f"Export aborted: {e}")
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def iter_export(cursor, model: Type[BaseModel], export_format: str) -> AsyncIterator[bytes]:
+    if export_format == "csv":
+        return iter_csv(cursor, model)
+    return iter_ndjson(cursor, model)
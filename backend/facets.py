@@ -0,0 +1,56 @@
+"""In-memory facet counts over projects, updated one document at a time"""
+
+from collections import Counter
+from typing import Dict, Iterable, Mapping, Tuple
+
+# Project fields counted, and whether each holds a list of values
+FACETS = {"category": False, "year": False, "tags": True}
+
+
+def _values(document: Mapping[str, object], facet: str) -> Tuple[str, ...]:
+    value = document.get(facet)
+    if FACETS[facet]:
+        # A tag repeated on one project counts once
+        return tuple(dict.fromkeys(value or ()))
+    return (value,) if value else ()
+
+
+class FacetIndex:
+    """Value counts per facet, kept exact across adds, replacements and removals"""
+
+    def __init__(self):
+        self._counts: Dict[str, Counter] = {facet: Counter() for facet in FACETS}
+        self._doc_values: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_values)
+
+    def add(self, doc_id: str, document: Mapping[str, object]) -> None:
+        """Count ``document``, replacing what was counted for ``doc_id`` before"""
+        self.remove(doc_id)
+        values = {facet: _values(document, facet) for facet in FACETS}
+        for facet, facet_values in values.items():
+            self._counts[facet].update(facet_values)
+        self._doc_values[doc_id] = values
+
+    def remove(self, doc_id: str) -> None:
+        values = self._doc_values.pop(doc_id, None)
+        if values is None:
+            return
+        for facet, facet_values in values.items():
+            counts = self._counts[facet]
+            for value in facet_values:
+                counts[value] -= 1
+                if counts[value] <= 0:
+                    del counts[value]
+
+    def counts(self, facet: str) -> Dict[str, int]:
+        """Counts for ``facet``: categories by name, years newest first, tags most used first"""
+        counts = self._counts[facet]
+        if facet == "category":
+            order: Iterable[Tuple[str, int]] = sorted(counts.items())
+        elif facet == "year":
+            order = sorted(counts.items(), reverse=True)
+        else:
+            order = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return dict(order)
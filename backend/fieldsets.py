@@ -0,0 +1,42 @@
+"""Sparse fieldsets: ``?fields=a,b`` parsed into a Mongo projection and a trimmed model"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple, Type
+
+from pydantic import BaseModel, create_model
+
+
+class UnknownFields(ValueError):
+    def __init__(self, fields):
+        super().__init__(", ".join(fields))
+        self.fields = fields
+
+
+def parse_fields(model: Type[BaseModel], raw: Optional[str],
+                 always: Iterable[str] = ("id",)) -> Optional[Tuple[str, ...]]:
+    """Requested field names in model order, or None when every field is wanted"""
+    if raw is None or not raw.strip():
+        return None
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = sorted(requested - set(model.model_fields))
+    if unknown:
+        raise UnknownFields(unknown)
+    requested.update(always)
+    return tuple(name for name in model.model_fields if name in requested)
+
+
+def projection(fields: Iterable[str]) -> Dict[str, int]:
+    return {"_id": 0, **{name: 1 for name in fields}}
+
+
+@lru_cache(maxsize=128)
+def partial_model(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """``model`` reduced to ``fields``, keeping each field's type and default"""
+    return create_model(
+        f"{model.__name__}Fields",
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields},
+    )
+
+
+def trim(row: dict, fields: Tuple[str, ...]) -> dict:
+    return {name: row[name] for name in fields if name in row}
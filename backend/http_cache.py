@@ -0,0 +1,168 @@
+"""Pre-rendered JSON bodies with ETag / Last-Modified conditional GET support
+and precompressed gzip / brotli variants"""
+
+import asyncio
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional
+
+import orjson
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Bodies smaller than this are always sent as-is
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+# Levels for variants built as responses are cached
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+# Levels for the snapshot files, compressed once per published version
+PRECOMPRESS_GZIP_LEVEL = int(os.environ.get('PRECOMPRESS_GZIP_LEVEL', '9'))
+PRECOMPRESS_BROTLI_QUALITY = int(os.environ.get('PRECOMPRESS_BROTLI_QUALITY', '9'))
+
+# Server preference when the client accepts several equally
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+def compress(body: bytes, encoding: str, precomputed: bool = False) -> bytes:
+    """``body`` in ``encoding``, at the snapshot levels when ``precomputed``"""
+    if encoding == "br":
+        return brotli.compress(body, quality=PRECOMPRESS_BROTLI_QUALITY if precomputed else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=PRECOMPRESS_GZIP_LEVEL if precomputed else GZIP_LEVEL, mtime=0)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best of ``ENCODINGS`` the ``Accept-Encoding`` header allows, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip()] = weight
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class RenderedResponse:
+    """A JSON body serialized once, with the validators derived from it.
+
+    ``content`` keeps the object the body was rendered from so composite
+    responses can be assembled without parsing the body back. Compressed
+    variants are built by ``precompress`` in a worker thread when the
+    rendering is cached and kept until the data changes; a rendering without
+    them is sent as-is rather than compressed on the event loop.
+    """
+
+    __slots__ = ("body", "etag", "last_modified", "content", "_encoded")
+
+    def __init__(self, body: bytes, last_modified: Optional[datetime] = None, content: Any = None):
+        self.body = body
+        self.content = content
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.last_modified = last_modified.replace(microsecond=0) if last_modified else None
+        self._encoded: Dict[str, bytes] = {}
+
+    @classmethod
+    def from_content(cls, content: Any, last_modified: Optional[datetime] = None) -> "RenderedResponse":
+        return cls(orjson.dumps(content), last_modified, content)
+
+    @property
+    def compressible(self) -> bool:
+        return len(self.body) >= COMPRESS_MIN_BYTES
+
+    def encoded(self, encoding: str) -> bytes:
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compress(self.body, encoding)
+        return body
+
+    def has_encoded(self, encoding: str) -> bool:
+        return encoding in self._encoded
+
+    async def precompress(self) -> "RenderedResponse":
+        """Build the missing compressed variants in a worker thread"""
+        missing = [encoding for encoding in ENCODINGS if not self.has_encoded(encoding)] if self.compressible else []
+        for encoding in missing:
+            self._encoded[encoding] = await asyncio.to_thread(compress, self.body, encoding)
+        return self
+
+    def negotiate(self, request: Request) -> Optional[str]:
+        if not self.compressible:
+            return None
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        # Without a ready variant identity is cheaper than compressing on the loop
+        return encoding if encoding is not None and self.has_encoded(encoding) else None
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        # Each representation needs its own strong validator
+        return self.etag if encoding is None else self.etag[:-1] + "-" + encoding + '"'
+
+    def headers(self, encoding: Optional[str] = None) -> dict:
+        headers = {"ETag": self.etag_for(encoding), "Cache-Control": "no-cache"}
+        if self.compressible:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        if self.last_modified:
+            headers["Last-Modified"] = format_datetime(
+                self.last_modified.replace(tzinfo=timezone.utc), usegmt=True
+            )
+        return headers
+
+    def is_fresh_for(self, request: Request) -> bool:
+        """True when the client's cached copy is still valid (If-None-Match wins over If-Modified-Since)"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*":
+                return True
+            # Any encoding of this rendering is the same content version
+            variants = {self.etag_for(None)} | {self.etag_for(encoding) for encoding in ENCODINGS}
+            for tag in if_none_match.split(","):
+                tag = tag.strip()
+                if tag.startswith("W/"):
+                    tag = tag[2:]
+                if tag in variants:
+                    return True
+            return False
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified.replace(tzinfo=timezone.utc) <= since
+        return False
+
+    def to_response(self, request: Request) -> Response:
+        encoding = self.negotiate(request)
+        headers = self.headers(encoding)
+        if self.is_fresh_for(request):
+            return Response(status_code=304, headers=headers)
+        body = self.body if encoding is None else self.encoded(encoding)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+def latest(values: Iterable[Optional[datetime]]) -> Optional[datetime]:
+    """Newest timestamp in ``values``, ignoring missing ones"""
+    present = [value for value in values if value is not None]
+    return max(present) if present else None
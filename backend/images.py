@@ -0,0 +1,219 @@
+"""Uploaded project images and their responsive derivatives
+
+    MEDIA_DIR/
+        <sha256 of the upload>.json   manifest, so uploading the same file again costs nothing
+        <content hash>.<ext>          one file per variant, never rewritten
+        .incoming/                    uploads while they are being received
+
+Uploads are streamed to disk as they arrive. Each width in ``WIDTHS`` is
+written as WebP and as JPEG (PNG when the image has transparency) in a
+process pool, so Pillow never runs on the event loop. Variant filenames are
+hashes of their bytes, so they can be cached by clients forever.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: uploads are refused without Pillow
+    Image = ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> target width; images are never upscaled
+WIDTHS = {"thumb": 400, "medium": 1200}
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+MEDIA_TYPES = {"webp": "image/webp", "jpg": "image/jpeg", "png": "image/png"}
+# Variant files only; manifests and uploads in progress are never served
+VARIANT_NAME = re.compile(r"^[0-9a-f]{20}\.(webp|jpg|png)$")
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class InvalidUpload(ValueError):
+    pass
+
+
+class UploadTooLarge(InvalidUpload):
+    pass
+
+
+async def receive_upload(content_type: Optional[str], chunks: AsyncIterator[bytes], directory: Path,
+                         max_bytes: int, field: str = "file") -> Tuple[Path, str]:
+    """Stream the ``field`` part of a multipart body to a file under ``directory``
+
+    Returns the file and the sha256 of its content; only one parser chunk is
+    held in memory at a time.
+    """
+    kind, options = parse_options_header(content_type)
+    if kind != b"multipart/form-data" or b"boundary" not in options:
+        raise InvalidUpload("expected multipart/form-data")
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / uuid.uuid4().hex
+    digest = hashlib.sha256()
+    state = {"header": b"", "value": b"", "ours": False, "found": False, "size": 0}
+    pending: List[bytes] = []
+
+    def on_header_field(data, start, end):
+        state["header"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        if state["header"].lower() == b"content-disposition":
+            _, disposition = parse_options_header(state["value"])
+            state["ours"] = disposition.get(b"name") == field.encode() and b"filename" in disposition
+            state["found"] = state["found"] or state["ours"]
+        state["header"] = state["value"] = b""
+
+    def on_part_data(data, start, end):
+        if state["ours"]:
+            pending.append(data[start:end])
+
+    def on_part_end():
+        state["ours"] = False
+
+    parser = MultipartParser(options[b"boundary"], {
+        "on_header_field": on_header_field, "on_header_value": on_header_value,
+        "on_header_end": on_header_end, "on_part_data": on_part_data, "on_part_end": on_part_end,
+    })
+    try:
+        with open(path, "wb") as f:
+            async for chunk in chunks:
+                parser.write(chunk)
+                if pending:
+                    data = b"".join(pending)
+                    pending.clear()
+                    state["size"] += len(data)
+                    if state["size"] > max_bytes:
+                        raise UploadTooLarge(f"upload exceeds {max_bytes} bytes")
+                    digest.update(data)
+                    await asyncio.to_thread(f.write, data)
+            parser.finalize()
+    except InvalidUpload:
+        path.unlink(missing_ok=True)
+        raise
+    except Exception as e:
+        path.unlink(missing_ok=True)
+        raise InvalidUpload(f"malformed multipart body: {e}")
+    if not state["found"] or not state["size"]:
+        path.unlink(missing_ok=True)
+        raise InvalidUpload(f"no file in field {field!r}")
+    return path, digest.hexdigest()
+
+
+def _save(image, directory: Path, extension: str) -> str:
+    buffer = io.BytesIO()
+    if extension == "webp":
+        image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+    elif extension == "jpg":
+        image.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, "PNG", optimize=True)
+    body = buffer.getvalue()
+    name = f"{hashlib.sha256(body).hexdigest()[:20]}.{extension}"
+    target = directory / name
+    if not target.exists():
+        staging = directory / f".{name}-{os.getpid()}"
+        staging.write_bytes(body)
+        os.replace(staging, target)
+    return name
+
+
+def make_variants(source: str, directory: str) -> Dict[str, Any]:
+    """Decode ``source`` and write every variant into ``directory``; runs in a worker process"""
+    try:
+        with Image.open(source) as opened:
+            image = ImageOps.exif_transpose(opened)
+            image.load()
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise InvalidUpload(f"not a supported image: {e}")
+    transparent = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    image = image.convert("RGBA" if transparent else "RGB")
+    fallback = "png" if transparent else "jpg"
+
+    variants = {}
+    for name, width in WIDTHS.items():
+        resized = image
+        if image.width > width:
+            resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        variants[name] = {
+            "width": resized.width,
+            "height": resized.height,
+            "files": {extension: _save(resized, Path(directory), extension) for extension in ("webp", fallback)},
+        }
+    return {"width": image.width, "height": image.height, "variants": variants}
+
+
+class ImageStore:
+    def __init__(self, directory: Path, workers: Optional[int] = None):
+        self.directory = Path(directory)
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def incoming(self) -> Path:
+        return self.directory / ".incoming"
+
+    async def ingest(self, upload: Path, digest: str) -> Dict[str, Any]:
+        """Variants for the received ``upload`` (consumed), reusing an earlier upload of the same bytes"""
+        manifest_path = self.directory / f"{digest}.json"
+        try:
+            if manifest_path.exists():
+                return json.loads(manifest_path.read_text("utf-8"))
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            loop = asyncio.get_running_loop()
+            manifest = await loop.run_in_executor(self._pool, make_variants, str(upload), str(self.directory))
+            manifest["id"] = digest
+            staging = self.directory / f".{digest}.json-{os.getpid()}"
+            staging.write_text(json.dumps(manifest), "utf-8")
+            os.replace(staging, manifest_path)
+            logger.info(f"Stored image {digest[:12]} ({manifest['width']}x{manifest['height']})")
+            return manifest
+        finally:
+            upload.unlink(missing_ok=True)
+
+    def path(self, name: str) -> Optional[Path]:
+        """The variant file ``name``, or None for anything else"""
+        if not VARIANT_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def srcset(manifest: Dict[str, Any], base_url: str) -> Dict[str, str]:
+    """``{media type: srcset}`` for ``<source type srcset>``, narrowest first"""
+    candidates: Dict[str, Dict[int, str]] = {}
+    for variant in manifest["variants"].values():
+        for extension, name in variant["files"].items():
+            candidates.setdefault(MEDIA_TYPES[extension], {})[variant["width"]] = f"{base_url}{name}"
+    return {
+        media_type: ", ".join(f"{url} {width}w" for width, url in sorted(urls.items()))
+        for media_type, urls in candidates.items()
+    }
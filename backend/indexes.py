@@ -0,0 +1,127 @@
+"""Declarative MongoDB indexes and query-plan diagnostics for the hot queries
+
+Run from the backend directory (against whichever STORAGE_BACKEND is configured):
+
+    python indexes.py ensure    # create any missing indexes
+    python indexes.py explain   # print the winning plan of each hot query
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+from pagination import KEYSET_SORT
+
+
+# collection -> index specs; everything but ``keys`` is passed to create_index
+INDEX_SPECS: Dict[str, List[Dict[str, Any]]] = {
+    "projects": [
+        {"keys": [("id", 1)], "name": "id_unique", "unique": True},
+        {"keys": [("category", 1), ("created_at", -1), ("id", -1)], "name": "category_created_at"},
+        {"keys": [("created_at", -1), ("id", -1)], "name": "created_at"},
+    ],
+    "contact_messages": [
+        {"keys": [("id", 1)], "name": "id_unique", "unique": True},
+        # Admin inbox pages, all messages or one status, newest first
+        {"keys": [("created_at", -1), ("id", -1)], "name": "created_at_id"},
+        {"keys": [("status", 1), ("created_at", -1), ("id", -1)], "name": "status_created_at"},
+    ],
+    # Concurrent seeding upserts the default config by id; only a unique index keeps that to one document
+    "site_config": [
+        {"keys": [("id", 1)], "name": "id_unique", "unique": True},
+    ],
+}
+
+# Every query shape a public route issues, with placeholder values
+HOT_QUERIES: Dict[str, Dict[str, Any]] = {
+    "get_project": {"collection": "projects", "filter": {"id": "__probe__"}},
+    "get_projects": {"collection": "projects", "filter": {}, "sort": KEYSET_SORT},
+    "get_projects_by_category": {"collection": "projects", "filter": {"category": "__probe__"}, "sort": KEYSET_SORT},
+    "get_categories": {"collection": "projects", "distinct": "category"},
+    "contact_by_created_at": {"collection": "contact_messages", "filter": {}, "sort": KEYSET_SORT},
+    "contact_by_status": {"collection": "contact_messages", "filter": {"status": "new"}, "sort": KEYSET_SORT},
+}
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create every index in ``INDEX_SPECS``; existing identical indexes are a no-op"""
+    created: Dict[str, List[str]] = {}
+    for collection, specs in INDEX_SPECS.items():
+        names = await asyncio.gather(*(
+            db[collection].create_index(
+                spec["keys"], **{k: v for k, v in spec.items() if k != "keys"}
+            )
+            for spec in specs
+        ))
+        created[collection] = list(names)
+    return created
+
+
+def plan_stages(plan: Optional[Dict[str, Any]]) -> List[str]:
+    """Flatten a winning plan tree into its stage names, outermost first"""
+    stages: List[str] = []
+    while plan:
+        if "queryPlan" in plan:
+            plan = plan["queryPlan"]
+            continue
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        children = plan.get("inputStages") or ([plan["inputStage"]] if "inputStage" in plan else [])
+        for child in children[1:]:
+            stages.extend(plan_stages(child))
+        plan = children[0] if children else None
+    return stages
+
+
+async def explain_query(db, spec: Dict[str, Any]) -> List[str]:
+    collection = db[spec["collection"]]
+    if "distinct" in spec:
+        explained = await db.command({
+            "explain": {"distinct": spec["collection"], "key": spec["distinct"], "query": {}},
+            "verbosity": "queryPlanner",
+        })
+    else:
+        cursor = collection.find(spec["filter"])
+        if spec.get("sort"):
+            cursor = cursor.sort(spec["sort"])
+        explained = await cursor.explain()
+    winning_plan = explained.get("queryPlanner", {}).get("winningPlan")
+    return plan_stages(winning_plan)
+
+
+async def explain_hot_queries(db) -> List[Dict[str, Any]]:
+    """Explain every query in ``HOT_QUERIES`` and flag the ones that scan the whole collection"""
+    report = []
+    for name, spec in HOT_QUERIES.items():
+        stages = await explain_query(db, spec)
+        report.append({
+            "query": name,
+            "collection": spec["collection"],
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return report
+
+
+async def _main(command: str) -> int:
+    from server import storage
+
+    try:
+        if command == "ensure":
+            print(json.dumps(await storage.ensure_indexes(), ensure_ascii=False, indent=2))
+            return 0
+        report = await storage.explain_hot_queries()
+        for row in report:
+            flag = "COLLSCAN" if row["collscan"] else "ok"
+            print(f"{flag:9} {row['query']:28} {' <- '.join(row['stages'])}")
+        return 1 if any(row["collscan"] for row in report) else 0
+    finally:
+        await storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["ensure", "explain"])
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.command)))
@@ -0,0 +1,220 @@
+"""Prometheus text-format metrics: HTTP middleware and Mongo command monitoring
+
+Everything is kept in process; ``/metrics`` renders the current values in the
+Prometheus exposition format so any scraper (or curl) can read them.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+HTTP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (),
+                 buckets: Iterable[float] = HTTP_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts incl. +Inf, sum)
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1][0] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labels + ("le",), label_values + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+        self._gauge_callbacks: List[Tuple[str, str, Callable[[], Dict[LabelValues, float]], Tuple[str, ...]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def gauge_callback(self, name: str, documentation: str,
+                       callback: Callable[[], Dict[LabelValues, float]], labels: Iterable[str] = ()) -> None:
+        """A gauge whose values are read from ``callback`` at scrape time"""
+        self._gauge_callbacks.append((name, documentation, callback, tuple(labels)))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, documentation, callback, labels in self._gauge_callbacks:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for label_values, value in sorted(callback().items()):
+                lines.append(f"{name}{_format_labels(labels, label_values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template, method and status code",
+    ("method", "route", "status"),
+))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route"), HTTP_BUCKETS,
+))
+mongo_commands = registry.register(Counter(
+    "mongo_commands_total", "MongoDB commands by collection, command name and outcome",
+    ("collection", "command", "outcome"),
+))
+mongo_latency = registry.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command round-trip time by collection and command name",
+    ("collection", "command"), MONGO_BUCKETS,
+))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts and latency per route template.
+
+    It sits inside FastAPI's exception handling, so the 500s the routes raise
+    as HTTPException are counted with their real status; anything that escapes
+    unhandled is counted as a 500 before being re-raised.
+    """
+
+    def __init__(self, app, skip_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_latency.observe(time.perf_counter() - started, method, template)
+            http_requests.inc(method, template, str(status["code"]))
+
+
+# Commands whose first field names the collection they act on
+_COLLECTION_COMMANDS = {
+    "find", "insert", "update", "delete", "distinct", "count", "aggregate",
+    "findAndModify", "createIndexes", "getMore",
+}
+
+
+def command_collection(event) -> str:
+    """Collection a started command acts on, "-" for commands such as ping"""
+    if event.command_name in _COLLECTION_COMMANDS:
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        if isinstance(target, str):
+            return target
+    return "-"
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener timing every command the shared client sends"""
+
+    def __init__(self):
+        self._pending: Dict[Tuple[int, Optional[int]], str] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, event) -> Tuple[int, Optional[int]]:
+        return event.request_id, getattr(event, "operation_id", None)
+
+    def started(self, event) -> None:
+        with self._lock:
+            self._pending[self._key(event)] = command_collection(event)
+
+    def _finish(self, event, outcome: str) -> None:
+        with self._lock:
+            collection = self._pending.pop(self._key(event), "-")
+        seconds = event.duration_micros / 1_000_000
+        mongo_latency.observe(seconds, collection, event.command_name)
+        mongo_commands.inc(collection, event.command_name, outcome)
+
+    def succeeded(self, event) -> None:
+        self._finish(event, "success")
+
+    def failed(self, event) -> None:
+        self._finish(event, "failure")
@@ -0,0 +1,312 @@
+"""On-demand request profiling and slow-request logging
+
+Every request runs under a ``RequestTrace`` held in a context variable, so
+the pymongo command listener (Motor copies the context into its executor
+threads) can attribute each command to the request that sent it. Backends
+without a driver listener (SQLite, memory) have each repository call timed
+instead (``trace_repositories``).
+
+A request is profiled when it sends ``X-Profile: 1`` with a valid admin
+token, or is picked at ``PROFILE_SAMPLE_RATE``. While it is in flight a
+thread samples the event loop's stack; each sample is put in one bucket
+(waiting on I/O, Pydantic, JSON encoding, storage driver, other) and the
+profile, with its folded stacks and the commands sent, is written to a
+rotating directory. Requests slower than ``SLOW_REQUEST_MS`` are logged with
+their route, params and commands whether profiled or not.
+
+The sampler sees the whole loop thread, so work for other requests that
+overlaps a profiled one is counted in its profile too.
+"""
+
+import asyncio
+import contextvars
+import inspect
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from metrics import command_collection
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_DEPTH = 64
+# A loop thread found in its selector has nothing to run: the request is awaiting I/O
+WAITING = re.compile(r"selectors\.py:(select|poll)$")
+# Otherwise the leaf-most frame matching one of these, checked in order against "<file>:<function>"
+CATEGORIES: Tuple[Tuple[str, re.Pattern], ...] = (
+    ("json", re.compile(r"orjson|[/\\]json[/\\]|responses\.py:render$|encoders\.py:jsonable_encoder$")),
+    # Pydantic v2 validates in Rust, so FastAPI's calls into it stand for the time spent there
+    ("pydantic", re.compile(r"[/\\]pydantic[/\\]|_compat\.py:(validate|serialize)$|routing\.py:serialize_response$")),
+    ("storage", re.compile(r"[/\\](motor|pymongo|bson|storage)[/\\]|sqlite3")),
+)
+
+
+class RequestTrace:
+    """What one request did: the storage commands it sent and, when profiled, its stack samples"""
+
+    def __init__(self, profiled: bool = False):
+        self.profiled = profiled
+        self.started = time.perf_counter()
+        self.db_calls: List[Dict[str, Any]] = []
+        self._pending: Dict[Tuple[int, Optional[int]], Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def command_started(self, key, collection: str) -> None:
+        with self._lock:
+            self._pending[key] = (collection, time.perf_counter() - self.started)
+
+    def command_finished(self, key, command: str, seconds: float, outcome: str) -> None:
+        with self._lock:
+            collection, offset = self._pending.pop(key, ("-", None))
+        self.call_finished(collection, command, seconds, offset, outcome)
+
+    def call_finished(self, collection: str, command: str, seconds: float, offset: Optional[float],
+                      outcome: str) -> None:
+        with self._lock:
+            self.db_calls.append({
+                "collection": collection,
+                "command": command,
+                "ms": round(seconds * 1000, 3),
+                "at_ms": round(offset * 1000, 3) if offset is not None else None,
+                "outcome": outcome,
+            })
+
+
+current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("current_trace", default=None)
+
+
+class CommandTracer(monitoring.CommandListener):
+    """pymongo command listener adding each command to the trace of the request that sent it"""
+
+    @staticmethod
+    def _key(event) -> Tuple[int, Optional[int]]:
+        return event.request_id, getattr(event, "operation_id", None)
+
+    def started(self, event) -> None:
+        trace = current_trace.get()
+        if trace is not None:
+            trace.command_started(self._key(event), command_collection(event))
+
+    def succeeded(self, event) -> None:
+        self._finish(event, "success")
+
+    def failed(self, event) -> None:
+        self._finish(event, "failure")
+
+    def _finish(self, event, outcome: str) -> None:
+        trace = current_trace.get()
+        if trace is not None:
+            trace.command_finished(self._key(event), event.command_name, event.duration_micros / 1_000_000, outcome)
+
+
+class TracedRepository:
+    """A storage repository whose coroutine methods add themselves to the current request's trace"""
+
+    def __init__(self, repository, collection: str):
+        self._repository = repository
+        self._collection = collection
+
+    def __getattr__(self, name: str):
+        method = getattr(self._repository, name)
+        if not inspect.iscoroutinefunction(method):
+            return method
+
+        async def traced(*args, **kwargs):
+            trace = current_trace.get()
+            if trace is None:
+                return await method(*args, **kwargs)
+            started = time.perf_counter()
+            outcome = "failure"
+            try:
+                result = await method(*args, **kwargs)
+                outcome = "success"
+                return result
+            finally:
+                trace.call_finished(self._collection, name, time.perf_counter() - started,
+                                    started - trace.started, outcome)
+        return traced
+
+
+def trace_repositories(storage) -> None:
+    """Time every repository call of ``storage`` into request traces (for backends without CommandTracer)"""
+    for collection in ("projects", "contact_messages", "site_config"):
+        setattr(storage, collection, TracedRepository(getattr(storage, collection), collection))
+
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_code.co_filename}:{frame.f_code.co_name}"
+
+
+def categorize(stack: List[str]) -> str:
+    """Bucket of a sampled stack, listed leaf first"""
+    if WAITING.search(stack[0]):
+        return "waiting"
+    for frame in stack:
+        for category, pattern in CATEGORIES:
+            if pattern.search(frame):
+                return category
+    return "other"
+
+
+class StackSampler:
+    """Samples the stack of one thread every ``interval`` seconds from a background thread"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.categories: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.categories[categorize(stack)] += 1
+                # Folded format (root first), ready for flamegraph.pl or speedscope
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+class ProfileStore:
+    """Profiles as JSON files in ``directory``, keeping the newest ``keep``"""
+
+    NAME = re.compile(r"^[0-9T]+-[a-z]+-[A-Za-z0-9-]+-[0-9a-f]{6}\.json$")
+
+    def __init__(self, directory: Path, keep: int):
+        self.directory = Path(directory)
+        self.keep = max(keep, 1)
+
+    def write(self, profile: Dict[str, Any]) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        route = re.sub(r"[^A-Za-z0-9]+", "-", profile["route"]).strip("-") or "root"
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{profile['method'].lower()}-{route}-{uuid.uuid4().hex[:6]}.json"
+        (self.directory / name).write_text(json.dumps(profile, ensure_ascii=False, indent=1), "utf-8")
+        for stale in sorted(self.directory.glob("*.json"))[:-self.keep]:
+            stale.unlink(missing_ok=True)
+        return name
+
+    def names(self) -> List[str]:
+        """Stored profiles, newest first"""
+        return sorted((path.name for path in self.directory.glob("*.json")), reverse=True) if self.directory.exists() else []
+
+    def path(self, name: str) -> Optional[Path]:
+        """The profile ``name``, or None for anything else"""
+        if not self.NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware tracing every request, profiling the ones asked for or sampled and logging slow ones"""
+
+    def __init__(self, app, store: ProfileStore, authorize: Callable[[Optional[str]], bool],
+                 sample_rate: float = 0.0, interval: float = 0.001, slow_seconds: Optional[float] = None,
+                 skip_paths=("/metrics", "/healthz", "/readyz")):
+        self.app = app
+        self.store = store
+        self.authorize = authorize
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.slow_seconds = slow_seconds
+        self.skip_paths = set(skip_paths)
+
+    def _wants_profile(self, scope) -> bool:
+        headers = dict(scope.get("headers") or ())
+        if headers.get(b"x-profile") in (b"1", b"true"):
+            token = headers.get(b"x-admin-token")
+            return self.authorize(token.decode("latin-1") if token else None)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(profiled=self._wants_profile(scope))
+        token = current_trace.set(trace)
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        sampler = None
+        if trace.profiled:
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            seconds = time.perf_counter() - trace.started
+            if sampler:
+                sampler.stop()
+            current_trace.reset(token)
+            await self._report(scope, trace, status["code"], seconds, sampler)
+
+    async def _report(self, scope, trace: RequestTrace, status: int, seconds: float,
+                sampler: Optional[StackSampler]) -> None:
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        request = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "params": {
+                "path": {name: str(value) for name, value in (scope.get("path_params") or {}).items()},
+                "query": (scope.get("query_string") or b"").decode("latin-1"),
+            },
+            "status": status,
+            "duration_ms": round(seconds * 1000, 3),
+            "db_calls": trace.db_calls,
+            "db_ms": round(sum(call["ms"] for call in trace.db_calls), 3),
+        }
+        if sampler is not None:
+            samples = sum(sampler.categories.values())
+            request["profile"] = {
+                "interval_ms": self.interval * 1000,
+                "samples": samples,
+                # Wall time split by where the loop thread was found
+                "breakdown_ms": {
+                    category: round(seconds * 1000 * count / samples, 3)
+                    for category, count in sampler.categories.most_common()
+                } if samples else {},
+                "stacks": dict(sampler.stacks.most_common()),
+            }
+            try:
+                # File writes and pruning off the event loop
+                request["profile"]["file"] = await asyncio.to_thread(
+                    self.store.write, dict(request, at=datetime.utcnow().isoformat()))
+                logger.info(f"Profiled {request['method']} {route} -> {request['profile']['file']}")
+            except OSError as e:
+                logger.error(f"Error writing request profile: {e}")
+        if self.slow_seconds is not None and seconds >= self.slow_seconds:
+            calls = ", ".join(f"{call['command']} {call['collection']} {call['ms']}ms" for call in trace.db_calls)
+            logger.warning(
+                f"Slow request {request['method']} {route} {request['duration_ms']}ms status={status} "
+                f"params={request['params']} db_calls={len(trace.db_calls)} ({request['db_ms']}ms)"
+                + (f": {calls}" if calls else "")
+            )
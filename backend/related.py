@@ -0,0 +1,233 @@
+"""Related projects by tag and category overlap, precomputed as top-k lists
+
+Every project is a unit vector over its tags and its category, so the dot
+product of two rows is their cosine similarity. The vectors are kept sparse,
+as an inverted index from each feature to the projects that have it, so
+memory follows the number of (project, feature) pairs rather than projects
+times vocabulary. The top ``top_k`` most similar projects of each row are
+kept, which makes a lookup O(k); a change only recomputes the lists it can
+affect, in place, instead of the whole index.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+import numpy as np
+
+RELATED_TOP_K = 12
+# Similarity rows scored at once, bounded so one block stays around this size
+BLOCK_BYTES = 16 * 1024 * 1024
+# Columns per chunk when narrowing a similarity row down to its top-k candidates
+CHUNK = 128
+
+
+def _features(document: Mapping[str, object]) -> List[str]:
+    features = [f"category:{document.get('category')}"] if document.get("category") else []
+    return features + [f"tag:{tag}" for tag in dict.fromkeys(document.get("tags") or ())]
+
+
+class RelatedIndex:
+    def __init__(self, top_k: int = RELATED_TOP_K):
+        self.top_k = top_k
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._vocab: Dict[str, int] = {}
+        # row -> its feature columns, and column -> the rows that have it
+        self._columns: List[List[int]] = []
+        self._postings: List[Set[int]] = []
+        self._posting_arrays: Dict[int, np.ndarray] = {}
+        self._weights = np.zeros(0, dtype=np.float32)
+        self._top_rows = np.full((0, top_k), -1, dtype=np.int32)
+        self._top_scores = np.zeros((0, top_k), dtype=np.float32)
+        # Updates run in a worker thread while lookups keep reading the lists
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, documents: Iterable[Mapping[str, object]], top_k: int = RELATED_TOP_K) -> "RelatedIndex":
+        index = cls(top_k)
+        for document in documents:
+            index._assign(document)
+        rows = np.arange(len(index._ids))
+        index._top_rows[rows], index._top_scores[rows] = index._top(rows)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        pairs = sum(len(posting) for posting in self._postings)
+        # Each pair is held once per direction, as a row's column and a column's row
+        return self._weights.nbytes + self._top_rows.nbytes + self._top_scores.nbytes + 2 * 4 * pairs
+
+    def related(self, project_id: str, limit: Optional[int] = None) -> Optional[List[str]]:
+        """Ids of the most similar projects, best first; None for an unknown project"""
+        row = self._rows.get(project_id)
+        if row is None:
+            return None
+        return [self._ids[other] for other in self._top_rows[row, :limit] if other >= 0]
+
+    def update(self, documents: Sequence[Mapping[str, object]] = (), removed: Sequence[str] = ()) -> None:
+        """Add or replace ``documents`` and drop ``removed`` ids, then repair the affected top-k lists"""
+        with self._lock:
+            self._update(documents, removed)
+
+    def _update(self, documents: Sequence[Mapping[str, object]], removed: Sequence[str]) -> None:
+        changed = np.array(sorted({self._assign(document) for document in documents}), dtype=np.int64)
+        dropped = np.array([self._drop(project_id) for project_id in removed if project_id in self._rows],
+                           dtype=np.int64)
+        touched = np.concatenate([changed, dropped])
+        if not touched.size:
+            return
+        count = len(self._ids)
+        # Lists that mention a touched project may have lost it or ranked it lower
+        stale = np.nonzero(np.isin(self._top_rows[:count], touched).any(axis=1))[0]
+        recompute = np.setdiff1d(np.union1d(changed, stale), dropped)
+        if recompute.size:
+            self._top_rows[recompute], self._top_scores[recompute] = self._top(recompute)
+        # Every other list can only gain a changed project, so merge it in where it now ranks
+        settled = np.zeros(count, dtype=bool)
+        settled[recompute] = True
+        settled[dropped] = True
+        for block in self._blocks(changed, count):
+            scores = self._scores(block, count)
+            gaining = np.nonzero(~settled & (scores > self._top_scores[:count, -1]).any(axis=0))[0]
+            if gaining.size:
+                self._merge(gaining, block, scores[:, gaining].T)
+
+    # Rows and sparse vectors
+    def _assign(self, document: Mapping[str, object]) -> int:
+        project_id = document["id"]
+        row = self._rows.get(project_id)
+        if row is None:
+            row = self._free.pop() if self._free else len(self._ids)
+            if row == len(self._ids):
+                self._ids.append(project_id)
+                self._columns.append([])
+            else:
+                self._ids[row] = project_id
+            self._rows[project_id] = row
+        self._grow(len(self._ids))
+        self._unlink(row)
+        columns = sorted({self._column(feature) for feature in _features(document)})
+        for column in columns:
+            self._postings[column].add(row)
+            self._posting_arrays.pop(column, None)
+        self._columns[row] = columns
+        self._weights[row] = 1 / np.sqrt(len(columns)) if columns else 0
+        return row
+
+    def _drop(self, project_id: str) -> int:
+        row = self._rows.pop(project_id)
+        self._ids[row] = None
+        self._free.append(row)
+        # A row without features scores 0 against everything, so it never ranks
+        self._unlink(row)
+        self._weights[row] = 0
+        self._top_rows[row] = -1
+        self._top_scores[row] = 0
+        return row
+
+    def _unlink(self, row: int) -> None:
+        for column in self._columns[row]:
+            self._postings[column].discard(row)
+            self._posting_arrays.pop(column, None)
+        self._columns[row] = []
+
+    def _column(self, feature: str) -> int:
+        column = self._vocab.get(feature)
+        if column is None:
+            column = self._vocab[feature] = len(self._vocab)
+            self._postings.append(set())
+        return column
+
+    def _posting(self, column: int) -> np.ndarray:
+        rows = self._posting_arrays.get(column)
+        if rows is None:
+            rows = self._posting_arrays[column] = np.fromiter(self._postings[column], dtype=np.int64)
+        return rows
+
+    def _grow(self, rows: int) -> None:
+        capacity = len(self._weights)
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 16)
+        weights = np.zeros(capacity, dtype=np.float32)
+        weights[:len(self._weights)] = self._weights
+        self._weights = weights
+        top_rows = np.full((capacity, self.top_k), -1, dtype=np.int32)
+        top_rows[:len(self._top_rows)] = self._top_rows
+        top_scores = np.zeros((capacity, self.top_k), dtype=np.float32)
+        top_scores[:len(self._top_scores)] = self._top_scores
+        self._top_rows, self._top_scores = top_rows, top_scores
+
+    def _scores(self, block: np.ndarray, width: int) -> np.ndarray:
+        """Similarity of each of ``block`` to every row, as a dense ``len(block)`` x ``width`` array"""
+        scores = np.zeros((len(block), width), dtype=np.float32)
+        sharing: Dict[int, List[int]] = {}
+        for position, row in enumerate(block.tolist()):
+            for column in self._columns[row]:
+                sharing.setdefault(column, []).append(position)
+        weights = self._weights[block]
+        # Feature by feature: every block row with it gains its weight product with every other row with it
+        for column, positions in sharing.items():
+            others = self._posting(column)
+            positions = np.array(positions)
+            scores[np.ix_(positions, others)] += np.outer(weights[positions], self._weights[others])
+        return scores
+
+    # Top-k lists
+    def _blocks(self, rows: np.ndarray, count: int):
+        size = max(1, BLOCK_BYTES // (max(count, 1) * 4))
+        for start in range(0, len(rows), size):
+            yield rows[start:start + size]
+
+    def _top(self, rows: np.ndarray):
+        """Top-k rows and scores for each of ``rows``, computed against every project"""
+        count = len(self._ids)
+        top_rows = np.full((len(rows), self.top_k), -1, dtype=np.int32)
+        top_scores = np.zeros((len(rows), self.top_k), dtype=np.float32)
+        # Padded to whole chunks; padding and dropped rows score 0
+        padded = -(-count // CHUNK) * CHUNK
+        start = 0
+        for block in self._blocks(rows, padded):
+            scores = self._scores(block, padded)
+            scores[np.arange(len(block)), block] = 0
+            chunks = scores.reshape(len(block), -1, CHUNK)
+            best = chunks.max(axis=2)
+            # k chunks reach the k-th best chunk maximum, so it never exceeds the k-th best score:
+            # only chunks reaching it can hold a top-k entry, and a full sort of each row is avoided
+            floor = np.zeros(len(block), dtype=np.float32)
+            if best.shape[1] >= self.top_k:
+                floor = np.partition(best, best.shape[1] - self.top_k, axis=1)[:, best.shape[1] - self.top_k]
+            floor = np.maximum(floor, np.finfo(np.float32).tiny)
+            hit_rows, hit_chunks = np.nonzero(best >= floor[:, None])
+            values = chunks[hit_rows, hit_chunks]
+            hits, offsets = np.nonzero(values >= floor[hit_rows, None])
+            self._select(start + hit_rows[hits], hit_chunks[hits] * CHUNK + offsets, values[hits, offsets],
+                         top_rows, top_scores)
+            start += len(block)
+        return top_rows, top_scores
+
+    def _merge(self, rows: np.ndarray, changed: np.ndarray, scores: np.ndarray) -> None:
+        """Merge ``changed`` rows, scored ``scores[row, changed]``, into the lists of ``rows``"""
+        candidates = np.concatenate([self._top_rows[rows], np.broadcast_to(changed, (len(rows), len(changed)))], axis=1)
+        candidate_scores = np.concatenate([self._top_scores[rows], scores], axis=1)
+        owners = np.broadcast_to(np.arange(len(rows))[:, None], candidates.shape)
+        keep = (candidate_scores > 0) & (candidates != rows[:, None])
+        top_rows = np.full((len(rows), self.top_k), -1, dtype=np.int32)
+        top_scores = np.zeros((len(rows), self.top_k), dtype=np.float32)
+        self._select(owners[keep], candidates[keep], candidate_scores[keep], top_rows, top_scores)
+        self._top_rows[rows], self._top_scores[rows] = top_rows, top_scores
+
+    def _select(self, owners: np.ndarray, candidates: np.ndarray, scores: np.ndarray,
+                top_rows: np.ndarray, top_scores: np.ndarray) -> None:
+        """Keep the best ``top_k`` of the positive (owner, candidate, score) triples per owner"""
+        # Best first; ties go to the earlier row so results are stable
+        order = np.lexsort((candidates, -scores, owners))
+        owners, candidates, scores = owners[order], candidates[order], scores[order]
+        rank = np.arange(len(owners)) - np.searchsorted(owners, owners)
+        keep = rank < self.top_k
+        top_rows[owners[keep], rank[keep]] = candidates[keep]
+        top_scores[owners[keep], rank[keep]] = scores[keep]
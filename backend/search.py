@@ -0,0 +1,139 @@
+"""Arabic-aware in-memory full-text index over projects"""
+
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Harakat, superscript alef and Quranic annotation marks
+_TASHKEEL = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]")
+_TATWEEL = "\u0640"
+_LETTER_VARIANTS = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و", "ئ": "ي",
+    "ة": "ه",
+    "ى": "ي",
+    "٠": "0", "١": "1", "٢": "2", "٣": "3", "٤": "4",
+    "٥": "5", "٦": "6", "٧": "7", "٨": "8", "٩": "9",
+})
+_TOKEN = re.compile(r"\w+")
+# Definite article with its common attached conjunctions/prepositions
+_ARTICLE_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+
+# Relative weight of each searchable Project field
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "client": 1.5, "description": 1.0}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_EXPANSIONS = 50
+
+
+def normalize_arabic(text: str) -> str:
+    """Strip tashkeel and tatweel and fold alef/hamza, taa marbuta and alef maqsura variants"""
+    text = _TASHKEEL.sub("", text).replace(_TATWEEL, "")
+    return text.translate(_LETTER_VARIANTS).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN.findall(normalize_arabic(text)):
+        for prefix in _ARTICLE_PREFIXES:
+            if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+                token = token[len(prefix):]
+                break
+        tokens.append(token)
+    return tokens
+
+
+class SearchIndex:
+    """Inverted index with BM25 ranking, updated one document at a time"""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, float] = {}
+        self._total_length = 0.0
+        self._sorted_terms: Optional[List[str]] = None
+        self.documents: Dict[str, object] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, doc_id: str, fields: Dict[str, object], document: object = None) -> None:
+        """Index (or re-index) ``doc_id``; ``document`` is what searches return for it"""
+        self.remove(doc_id)
+        terms: Counter = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            value = fields.get(field) or ""
+            text = " ".join(value) if isinstance(value, (list, tuple)) else str(value)
+            for token in tokenize(text):
+                terms[token] += weight
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._sorted_terms = None
+            postings[doc_id] = frequency
+        length = sum(terms.values())
+        self._doc_terms[doc_id] = terms
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        self.documents[doc_id] = document
+
+    def remove(self, doc_id: str) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                self._sorted_terms = None
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        self.documents.pop(doc_id, None)
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def _expand(self, token: str) -> List[str]:
+        """The token itself if indexed, otherwise indexed terms it is a prefix of (search-as-you-type)"""
+        if token in self._postings:
+            return [token]
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = []
+        start = bisect_left(self._sorted_terms, token)
+        for term in self._sorted_terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, limit: int = 20,
+               accept: Optional[Callable[[str], bool]] = None) -> Tuple[int, List[Tuple[str, float]]]:
+        """Return ``(total_matches, [(doc_id, score), ...])`` for the best ``limit`` documents"""
+        doc_count = len(self._doc_terms)
+        if not doc_count:
+            return 0, []
+        lengths = self._doc_lengths
+        # BM25 length normalisation, k1 * (1 - b + b * length / average_length), split into a + c * length
+        norm_base = BM25_K1 * (1 - BM25_B)
+        # Documents with no indexable text add nothing to the total length
+        norm_scale = BM25_K1 * BM25_B * doc_count / max(self._total_length, 1)
+        scores: Dict[str, float] = {}
+        get = scores.get
+        for token in dict.fromkeys(tokenize(query)):
+            for term in self._expand(token):
+                postings = self._postings[term]
+                weight = (BM25_K1 + 1) * math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    if accept is not None and not accept(doc_id):
+                        continue
+                    scores[doc_id] = get(doc_id, 0.0) + weight * frequency / (
+                        frequency + norm_base + norm_scale * lengths[doc_id]
+                    )
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return len(scores), best
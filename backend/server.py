@@ -1,26 +1,170 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import hashlib
+import math
+import secrets
 import logging
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, Field, EmailStr, ValidationError
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
 import uuid
 from datetime import datetime
 
+import orjson
+
+from cache import SingleFlight, TTLCache, cache_key
+from http_cache import RenderedResponse, latest
+import metrics
+import profiling
+from export import EXPORT_FORMATS, iter_export
+from facets import FACETS, FacetIndex
+from images import (
+    CACHE_CONTROL as IMAGE_CACHE_CONTROL, MEDIA_TYPES, ImageStore, InvalidUpload, UploadTooLarge, receive_upload, srcset,
+)
+from related import RELATED_TOP_K, RelatedIndex
+from search import SearchIndex
+from throttle import TokenBucketLimiter
+from shared_snapshot import SharedSnapshot
+from snapshot import SnapshotPublisher, project_file, projects_file
+from write_behind import QueueFull, WriteBehindQueue
+from fieldsets import UnknownFields, parse_fields, partial_model, trim
+from pagination import InvalidCursor, decode_cursor, next_cursor
+from storage import open_storage
+from storage.base import ProjectWrite, WriteResult
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Storage backend (STORAGE_BACKEND=mongo|sqlite|memory); Mongo commands are timed for /metrics
+# and listed in the trace of the request that sent them (slow-request log, profiles), as are the
+# repository calls of the other backends
+mongo_metrics = metrics.MongoCommandMetrics()
+storage = open_storage(default_sqlite_path=str(ROOT_DIR / 'portfolio.sqlite3'),
+                       event_listeners=[mongo_metrics, profiling.CommandTracer()])
+if storage.name != "mongo":
+    profiling.trace_repositories(storage)
+
+# Read cache for the public routes, invalidated whenever a cached collection changes
+read_cache = TTLCache(
+    maxsize=int(os.environ.get('CACHE_MAX_ENTRIES', '256')),
+    ttl=float(os.environ.get('CACHE_TTL_SECONDS', '300')),
+)
+CACHED_COLLECTIONS = ("projects", "site_config")
+# Concurrent misses for the same key share one fetch and render
+in_flight = SingleFlight()
+# Bumped by every write hook; a render started before a write is not cached after it
+content_version = 0
+
+# Keyset pagination for GET /api/projects
+DEFAULT_PAGE_SIZE = int(os.environ.get('PROJECTS_PAGE_SIZE', '24'))
+MAX_PAGE_SIZE = 100
+cache_watcher_task: Optional[asyncio.Task] = None
+
+# Project writes are counted in storage (ProjectRepository.bump_version) so each worker notices the
+# ones made by other processes: the count the indexes reflect and the counts this process added since
+indexed_version = 0
+own_versions: Set[int] = set()
+# Newest count this process has applied, its own writes included; part of every project read's cache key
+projects_version = 0
+PROJECT_VERSION_POLL_SECONDS = float(os.environ.get('PROJECT_VERSION_POLL_SECONDS', '5'))
+version_watcher_task: Optional[asyncio.Task] = None
+
+# Uploaded images and their resized variants, served from /api/media/
+image_store = ImageStore(
+    Path(os.environ.get('MEDIA_DIR') or ROOT_DIR / 'media'),
+    workers=int(os.environ['IMAGE_WORKERS']) if os.environ.get('IMAGE_WORKERS') else None,
+)
+IMAGE_MAX_UPLOAD_BYTES = int(float(os.environ.get('IMAGE_MAX_UPLOAD_MB', '20')) * 1024 * 1024)
+MEDIA_URL = "/api/media/"
+
+# Admin bulk project writes (POST /api/projects/bulk) are committed this many lines at a time
+PROJECTS_BULK_CHUNK_SIZE = int(os.environ.get('PROJECTS_BULK_CHUNK_SIZE', '500'))
+# Longest NDJSON line accepted; a longer one ends the import with 413 instead of being buffered whole
+PROJECTS_BULK_MAX_LINE_BYTES = int(os.environ.get('PROJECTS_BULK_MAX_LINE_KB', '256')) * 1024
+
+# Optional write-behind batching for contact form submissions
+CONTACT_WRITE_BEHIND = os.environ.get('CONTACT_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+contact_queue = WriteBehindQueue(
+    lambda: storage.contact_messages,
+    max_size=int(os.environ.get('CONTACT_QUEUE_SIZE', '1000')),
+    batch_size=int(os.environ.get('CONTACT_BATCH_SIZE', '100')),
+    flush_interval=int(os.environ.get('CONTACT_FLUSH_INTERVAL_MS', '500')) / 1000,
+)
+
+# Contact form abuse throttling: token buckets per client IP and per email, in bounded LRU maps
+# (CONTACT_*_BURST=0 disables one); identical submissions within the dedup window are answered
+# with the original success response and written once
+CONTACT_THROTTLE_MAX_KEYS = int(os.environ.get('CONTACT_THROTTLE_MAX_KEYS', '10000'))
+contact_limiters = {
+    "ip": TokenBucketLimiter(
+        float(os.environ.get('CONTACT_IP_BURST', '5')), float(os.environ.get('CONTACT_IP_PER_HOUR', '30')) / 3600,
+        maxsize=CONTACT_THROTTLE_MAX_KEYS,
+    ),
+    "email": TokenBucketLimiter(
+        float(os.environ.get('CONTACT_EMAIL_BURST', '3')), float(os.environ.get('CONTACT_EMAIL_PER_HOUR', '10')) / 3600,
+        maxsize=CONTACT_THROTTLE_MAX_KEYS,
+    ),
+}
+contact_dedup = TTLCache(
+    maxsize=int(os.environ.get('CONTACT_DEDUP_MAX_ENTRIES', '10000')),
+    ttl=float(os.environ.get('CONTACT_DEDUP_SECONDS', '600')),
+)
+MAX_RETRY_AFTER_SECONDS = 3600
+
+# In-memory full-text index over projects, so searches never touch Mongo
+search_index = SearchIndex()
+# Category/year/tag counts for /api/categories, built with the search index (None until then)
+project_facets: Optional[FacetIndex] = None
+# Top-k similar projects by tags and category, built and maintained with the search index
+related_index: Optional[RelatedIndex] = None
+
+# Static JSON snapshots of the read routes, republished after every write; with SNAPSHOT_SERVE
+# the routes answer from them without touching storage, otherwise only when storage fails
+SNAPSHOT_SERVE = os.environ.get('SNAPSHOT_SERVE', '').lower() in ('1', 'true', 'yes')
+snapshot_publisher: Optional[SnapshotPublisher] = None
+if os.environ.get('SNAPSHOT_DIR'):
+    snapshot_publisher = SnapshotPublisher(Path(os.environ['SNAPSHOT_DIR']), lambda: snapshot_files())
+
+# The same renderings in one memory-mapped file shared by every uvicorn worker (SHARED_CACHE_DIR)
+shared_snapshot: Optional[SharedSnapshot] = None
+if os.environ.get('SHARED_CACHE_DIR'):
+    shared_snapshot = SharedSnapshot(Path(os.environ['SHARED_CACHE_DIR']), lambda: shared_snapshot_files())
+
+# Request profiles (X-Profile: 1 with the admin token, or PROFILE_SAMPLE_RATE), newest PROFILE_KEEP kept
+profile_store = profiling.ProfileStore(
+    Path(os.environ.get('PROFILE_DIR') or ROOT_DIR / 'profiles'), keep=int(os.environ.get('PROFILE_KEEP', '50')),
+)
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL_MS', '1')) / 1000
+# Requests at least this slow are logged with their route, params and storage commands (0 disables)
+SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_MS', '1000')) / 1000
+
+# Startup: connections opened by concurrent pings before serving, and how far /readyz has seen it get
+WARM_CONNECTIONS = int(os.environ.get('STARTUP_WARM_CONNECTIONS', '1'))
+READY_PING_TIMEOUT = int(os.environ.get('READY_PING_TIMEOUT_MS', '1000')) / 1000
+# "pending" until startup runs each step, then "ready" or "failed"
+startup_status: Dict[str, str] = {"indexes": "pending", "seed": "pending", "started": "pending"}
+# A failed seed is retried in the background, the wait doubling up to the maximum (0 disables)
+SEED_RETRY_SECONDS = float(os.environ.get('SEED_RETRY_SECONDS', '1'))
+SEED_RETRY_MAX_SECONDS = float(os.environ.get('SEED_RETRY_MAX_SECONDS', '60'))
+seed_retry_task: Optional[asyncio.Task] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
 
 # Create the main app
-app = FastAPI(title="Arabic Graphic Designer Portfolio API")
+app = FastAPI(title="Arabic Graphic Designer Portfolio API", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -37,6 +181,8 @@ class Project(BaseModel):
     status: str = "مكتمل"
     client: str
     year: str
+    # {media type: srcset} of an uploaded image's variants (POST /api/images)
+    srcset: Optional[Dict[str, str]] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -48,6 +194,28 @@ class ProjectCreate(BaseModel):
     tags: List[str]
     client: str
     year: str
+    srcset: Optional[Dict[str, str]] = None
+
+class ProjectUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    image: Optional[str] = None
+    tags: Optional[List[str]] = None
+    status: Optional[str] = None
+    client: Optional[str] = None
+    year: Optional[str] = None
+    srcset: Optional[Dict[str, str]] = None
+
+class ProjectImport(ProjectCreate):
+    """One NDJSON line of a bulk write; with an ``id`` it replaces (or creates) that project"""
+    id: Optional[str] = None
+    status: str = "مكتمل"
+    created_at: Optional[datetime] = None
+
+class ProjectPage(BaseModel):
+    items: List[Project]
+    next_cursor: Optional[str] = None
 
 class ContactMessage(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -58,6 +226,21 @@ class ContactMessage(BaseModel):
     status: str = "new"
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+# Inbox workflow: a message only moves forward through these statuses
+CONTACT_STATUSES = ("new", "read", "replied")
+CONTACT_STATUS_PATTERN = "^(" + "|".join(CONTACT_STATUSES) + ")$"
+MAX_BULK_STATUS_IDS = 1000
+
+class ContactStatusUpdate(BaseModel):
+    status: str = Field(pattern=CONTACT_STATUS_PATTERN)
+
+class ContactBulkStatusUpdate(ContactStatusUpdate):
+    ids: List[str] = Field(min_length=1, max_length=MAX_BULK_STATUS_IDS)
+
+class ContactMessagePage(BaseModel):
+    items: List[ContactMessage]
+    next_cursor: Optional[str] = None
+
 class ContactMessageCreate(BaseModel):
     name: str
     email: EmailStr
@@ -77,127 +260,451 @@ class SiteConfig(BaseModel):
     social_links: dict
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class Bootstrap(BaseModel):
+    config: SiteConfig
+    categories: List[str]
+    projects: ProjectPage
+
+
+# Stored documents -> response rows
+# Each document is validated once, so legacy rows or ones from other writers get the models' defaults;
+# set TRUSTED_READS=true when only this API writes the database to serialize them as fetched instead
+TRUSTED_READS = os.environ.get('TRUSTED_READS', 'false').lower() in ('1', 'true', 'yes')
+
+# Fetch exactly the models' fields, so stray stored keys never reach a response
+PROJECT_FIELDS = tuple(Project.model_fields)
+# Always fetched for sparse fieldsets (keyset cursors, Last-Modified) and trimmed from the response
+PROJECT_BOOKKEEPING_FIELDS = ("id", "created_at", "updated_at")
+CONFIG_FIELDS = tuple(SiteConfig.model_fields)
+
+def stored_row(model, document: dict) -> dict:
+    """A projected document as a response row, validated against ``model`` unless reads are trusted"""
+    if TRUSTED_READS:
+        return document
+    return model(**document).model_dump()
+
 
 # Initialize default data
-async def init_default_data():
-    """Initialize database with default data if empty"""
-    
-    # Check if projects exist
-    projects_count = await db.projects.count_documents({})
-    if projects_count == 0:
-        default_projects = [
-            {
-                "id": str(uuid.uuid4()),
-                "title": "هوية بصرية لمطعم راقي",
-                "description": "تصميم هوية بصرية متكاملة لمطعم راقي تشمل الشعار، القوائم، والمواد التسويقية",
-                "category": "الهوية البصرية",
-                "image": "https://via.placeholder.com/400x300/0a1535/d3af35?text=Restaurant+Brand",
-                "tags": ["شعار", "هوية بصرية", "مطبوعات"],
-                "status": "مكتمل",
-                "client": "مطعم الأصالة",
-                "year": "2024",
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "حملة تسويقية لوسائل التواصل",
-                "description": "تصميم مجموعة من المنشورات الإبداعية لحملة تسويقية على وسائل التواصل الاجتماعي",
-                "category": "وسائل التواصل",
-                "image": "https://via.placeholder.com/400x300/0d46ba/ffffff?text=Social+Media+Campaign",
-                "tags": ["انستغرام", "فيسبوك", "تسويق رقمي"],
-                "status": "مكتمل",
-                "client": "شركة التسويق الرقمي",
-                "year": "2024",
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "تصميم شعار وهوية تجارية",
-                "description": "إنشاء شعار مميز وهوية بصرية كاملة لشركة تقنية ناشئة",
-                "category": "الهوية البصرية",
-                "image": "https://via.placeholder.com/400x300/d3af35/0a1535?text=Tech+Logo+Design",
-                "tags": ["شعار", "هوية تجارية", "تقنية"],
-                "status": "مكتمل",
-                "client": "شركة التقنية المتقدمة",
-                "year": "2023",
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "منشورات إبداعية لمتجر أزياء",
-                "description": "سلسلة من المنشورات الإبداعية والجذابة لعرض مجموعة أزياء جديدة",
-                "category": "وسائل التواصل",
-                "image": "https://via.placeholder.com/400x300/0a1535/d3af35?text=Fashion+Posts",
-                "tags": ["أزياء", "تصوير المنتجات", "تصميم إعلاني"],
-                "status": "مكتمل",
-                "client": "متجر الأناقة",
-                "year": "2024",
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "تصميم كتالوج منتجات",
-                "description": "تصميم كتالوج أنيق وجذاب لعرض مجموعة منتجات شركة تجميل",
-                "category": "مطبوعات",
-                "image": "https://via.placeholder.com/400x300/0d46ba/ffffff?text=Product+Catalog",
-                "tags": ["كتالوج", "تجميل", "مطبوعات"],
-                "status": "مكتمل",
-                "client": "شركة الجمال الطبيعي",
-                "year": "2023",
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "هوية بصرية لمقهى عصري",
-                "description": "تطوير هوية بصرية شاملة لمقهى عصري تشمل التصميم الداخلي والخارجي",
-                "category": "الهوية البصرية",
-                "image": "https://via.placeholder.com/400x300/d3af35/0a1535?text=Cafe+Branding",
-                "tags": ["مقهى", "تصميم داخلي", "علامة تجارية"],
-                "status": "مكتمل",
-                "client": "مقهى الإبداع",
-                "year": "2024",
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
-        ]
-        await db.projects.insert_many(default_projects)
-        logger.info("Default projects inserted")
-    
-    # Check if site config exists
-    config_count = await db.site_config.count_documents({})
-    if config_count == 0:
-        default_config = {
-            "id": str(uuid.uuid4()),
-            "designer_name": "محمد أحمد - مصمم جرافيك",
-            "email": "designer@example.com",
-            "phone": "+966 50 123 4567",
-            "location": "الرياض، المملكة العربية السعودية",
-            "specializations": [
-                "تصميم الهوية البصرية",
-                "تصميم وسائل التواصل الاجتماعي",
-                "التصميم الإعلاني",
-                "تصميم المطبوعات"
-            ],
-            "experience": "5+ سنوات",
-            "projects_completed": "200+",
-            "clients_satisfied": "150+",
-            "social_links": {
-                "instagram": "https://instagram.com/designer",
-                "twitter": "https://twitter.com/designer",
-                "linkedin": "https://linkedin.com/in/designer",
-                "facebook": "https://facebook.com/designer",
-                "behance": "https://behance.net/designer",
-                "dribbble": "https://dribbble.com/designer"
-            },
+# Default documents get ids derived from a natural key (a project's title, the config's name), so
+# workers starting together upsert the same documents instead of each inserting its own copy
+SEED_NAMESPACE = uuid.UUID("5b0f3c8e-2d4a-4e61-9a7b-1c2d3e4f5a6b")
+
+def seed_id(kind: str, natural_key: str) -> str:
+    return str(uuid.uuid5(SEED_NAMESPACE, f"{kind}:{natural_key}"))
+
+def default_projects() -> List[dict]:
+    projects = [
+        {
+            "title": "هوية بصرية لمطعم راقي",
+            "description": "تصميم هوية بصرية متكاملة لمطعم راقي تشمل الشعار، القوائم، والمواد التسويقية",
+            "category": "الهوية البصرية",
+            "image": "https://via.placeholder.com/400x300/0a1535/d3af35?text=Restaurant+Brand",
+            "tags": ["شعار", "هوية بصرية", "مطبوعات"],
+            "status": "مكتمل",
+            "client": "مطعم الأصالة",
+            "year": "2024",
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        },
+        {
+            "title": "حملة تسويقية لوسائل التواصل",
+            "description": "تصميم مجموعة من المنشورات الإبداعية لحملة تسويقية على وسائل التواصل الاجتماعي",
+            "category": "وسائل التواصل",
+            "image": "https://via.placeholder.com/400x300/0d46ba/ffffff?text=Social+Media+Campaign",
+            "tags": ["انستغرام", "فيسبوك", "تسويق رقمي"],
+            "status": "مكتمل",
+            "client": "شركة التسويق الرقمي",
+            "year": "2024",
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        },
+        {
+            "title": "تصميم شعار وهوية تجارية",
+            "description": "إنشاء شعار مميز وهوية بصرية كاملة لشركة تقنية ناشئة",
+            "category": "الهوية البصرية",
+            "image": "https://via.placeholder.com/400x300/d3af35/0a1535?text=Tech+Logo+Design",
+            "tags": ["شعار", "هوية تجارية", "تقنية"],
+            "status": "مكتمل",
+            "client": "شركة التقنية المتقدمة",
+            "year": "2023",
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        },
+        {
+            "title": "منشورات إبداعية لمتجر أزياء",
+            "description": "سلسلة من المنشورات الإبداعية والجذابة لعرض مجموعة أزياء جديدة",
+            "category": "وسائل التواصل",
+            "image": "https://via.placeholder.com/400x300/0a1535/d3af35?text=Fashion+Posts",
+            "tags": ["أزياء", "تصوير المنتجات", "تصميم إعلاني"],
+            "status": "مكتمل",
+            "client": "متجر الأناقة",
+            "year": "2024",
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        },
+        {
+            "title": "تصميم كتالوج منتجات",
+            "description": "تصميم كتالوج أنيق وجذاب لعرض مجموعة منتجات شركة تجميل",
+            "category": "مطبوعات",
+            "image": "https://via.placeholder.com/400x300/0d46ba/ffffff?text=Product+Catalog",
+            "tags": ["كتالوج", "تجميل", "مطبوعات"],
+            "status": "مكتمل",
+            "client": "شركة الجمال الطبيعي",
+            "year": "2023",
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        },
+        {
+            "title": "هوية بصرية لمقهى عصري",
+            "description": "تطوير هوية بصرية شاملة لمقهى عصري تشمل التصميم الداخلي والخارجي",
+            "category": "الهوية البصرية",
+            "image": "https://via.placeholder.com/400x300/d3af35/0a1535?text=Cafe+Branding",
+            "tags": ["مقهى", "تصميم داخلي", "علامة تجارية"],
+            "status": "مكتمل",
+            "client": "مقهى الإبداع",
+            "year": "2024",
+            "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
-        await db.site_config.insert_one(default_config)
+    ]
+    return [{"id": seed_id("project", project["title"]), **project} for project in projects]
+
+def default_site_config() -> dict:
+    return {
+        "id": seed_id("site_config", "default"),
+        "designer_name": "محمد أحمد - مصمم جرافيك",
+        "email": "designer@example.com",
+        "phone": "+966 50 123 4567",
+        "location": "الرياض، المملكة العربية السعودية",
+        "specializations": [
+            "تصميم الهوية البصرية",
+            "تصميم وسائل التواصل الاجتماعي",
+            "التصميم الإعلاني",
+            "تصميم المطبوعات"
+        ],
+        "experience": "5+ سنوات",
+        "projects_completed": "200+",
+        "clients_satisfied": "150+",
+        "social_links": {
+            "instagram": "https://instagram.com/designer",
+            "twitter": "https://twitter.com/designer",
+            "linkedin": "https://linkedin.com/in/designer",
+            "facebook": "https://facebook.com/designer",
+            "behance": "https://behance.net/designer",
+            "dribbble": "https://dribbble.com/designer"
+        },
+        "updated_at": datetime.utcnow()
+    }
+
+async def seed_projects() -> int:
+    if await storage.projects.count():
+        return 0
+    projects = default_projects()
+    inserted = await storage.projects.insert_missing(projects)
+    if inserted:
+        rows = [stored_row(Project, project) for project in projects]
+        index_projects(rows)
+        notify_collection_changed("projects")
+        await update_related_index(rows)
+        logger.info("Default projects inserted")
+    return inserted
+
+async def seed_site_config() -> int:
+    if await storage.site_config.count():
+        return 0
+    inserted = await storage.site_config.insert_missing(default_site_config())
+    if inserted:
+        notify_collection_changed("site_config")
         logger.info("Default site config inserted")
+    return int(inserted)
+
+async def init_default_data() -> Dict[str, int]:
+    """Seed the default projects and site config into empty collections; returns how many were inserted
+
+    Both collections are checked and seeded concurrently. Running it again, or from several workers at
+    once, inserts nothing twice.
+    """
+    projects, site_config = await asyncio.gather(seed_projects(), seed_site_config())
+    return {"projects": projects, "site_config": site_config}
+
+
+# Admin access
+def is_admin(token: Optional[str]) -> bool:
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    return bool(admin_token and token and secrets.compare_digest(token, admin_token))
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin routes require an X-Admin-Token header matching ADMIN_TOKEN (disabled when unset)"""
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=401, detail="غير مصرح")
+
+
+# Cache invalidation
+def notify_collection_changed(collection: str):
+    """Write hook: drop every cached read built from ``collection`` and bump the content version"""
+    global content_version
+    content_version += 1
+    dropped = read_cache.invalidate(collection)
+    in_flight.forget()
+    if dropped:
+        logger.info(f"Invalidated {dropped} cached responses for {collection}")
+    if snapshot_publisher:
+        snapshot_publisher.request()
+    if shared_snapshot:
+        shared_snapshot.request()
+
+async def watch_collection_changes():
+    """Invalidate the cache on writes made by other processes (Mongo on a replica set)"""
+    while True:
+        try:
+            async with storage.watch(CACHED_COLLECTIONS) as stream:
+                async for change in stream:
+                    collection = change["ns"]["coll"]
+                    # Indexes first, so reads rebuilt after the invalidation see the change
+                    if collection == "projects":
+                        await apply_project_change(change)
+                    notify_collection_changed(collection)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Changes may have been missed while the stream was down
+            logger.warning(f"Change stream interrupted, clearing read cache: {e}")
+            read_cache.clear()
+            await rebuild_project_indexes()
+            await asyncio.sleep(5)
+
+
+# Search index, facet and related-projects maintenance
+def index_projects(projects: List[dict] = (), removed: List[str] = ()):
+    for project in projects:
+        search_index.add(project["id"], project, project)
+        if project_facets is not None:
+            project_facets.add(project["id"], project)
+    for project_id in removed:
+        search_index.remove(project_id)
+        if project_facets is not None:
+            project_facets.remove(project_id)
+
+async def update_related_index(projects: List[dict] = (), removed: List[str] = ()):
+    """Re-score the related lists in a worker thread; lookups keep being answered meanwhile"""
+    while related_index is not None:
+        index = related_index
+        await asyncio.to_thread(index.update, projects, removed)
+        if related_index is index:
+            return
+        # A rebuild swapped in a newer index meanwhile, maybe listed before this write; apply it there too
+
+def index_project(project: dict):
+    index_projects([project])
+
+def unindex_project(project_id: str):
+    index_projects(removed=[project_id])
+
+async def rebuild_project_indexes():
+    """Load every project into fresh search, facet and related indexes and swap them in"""
+    global search_index, project_facets, related_index, indexed_version, projects_version
+    try:
+        # Read first: writes counted after this may or may not be in the listing, so they are checked again
+        version = await storage.projects.version()
+        fresh, facets = SearchIndex(), FacetIndex()
+        projects = [stored_row(Project, document) for document in await storage.projects.list(fields=PROJECT_FIELDS)]
+        for project in projects:
+            fresh.add(project["id"], project, project)
+            facets.add(project["id"], project)
+        # NumPy releases the GIL for the matrix products, so the loop keeps serving meanwhile
+        related = await asyncio.to_thread(RelatedIndex.build, projects)
+        search_index, project_facets, related_index = fresh, facets, related
+        indexed_version = version
+        projects_version = max(projects_version, version)
+        logger.info(f"Search index, facets and related projects built with {len(fresh)} projects")
+    except Exception as e:
+        logger.error(f"Error building search index: {e}")
+
+async def load_project_indexes():
+    """Build the in-memory project indexes on first use when startup has not built them"""
+    if project_facets is None:
+        await in_flight.run(("project_indexes",), rebuild_project_indexes)
+    if project_facets is None:
+        raise RuntimeError("project indexes are unavailable")
+
+async def refresh_project_indexes():
+    """Rebuild the indexes and drop cached reads when another process wrote projects since they were built"""
+    global indexed_version, own_versions, projects_version
+    current = await storage.projects.version()
+    projects_version = max(projects_version, current)
+    own = {version for version in own_versions if indexed_version < version <= current}
+    if len(own) < current - indexed_version:
+        logger.info(f"Projects written by another process (version {indexed_version} -> {current}), rebuilding indexes")
+        await rebuild_project_indexes()
+        notify_collection_changed("projects")
+    elif current > indexed_version:
+        indexed_version = current
+    own_versions = {version for version in own_versions if version > indexed_version}
+
+async def watch_project_versions():
+    """Poll the storage write count every PROJECT_VERSION_POLL_SECONDS"""
+    while True:
+        await asyncio.sleep(PROJECT_VERSION_POLL_SECONDS)
+        try:
+            await refresh_project_indexes()
+        except Exception as e:
+            logger.error(f"Error checking for project writes from other processes: {e}")
+
+async def load_facets() -> FacetIndex:
+    await load_project_indexes()
+    return project_facets
+
+async def apply_project_change(change: dict):
+    """Apply one change-stream event to the search index"""
+    document = change.get("fullDocument")
+    if change["operationType"] in ("insert", "update", "replace") and document:
+        project = stored_row(Project, {field: document.get(field) for field in Project.model_fields})
+        index_project(project)
+        await update_related_index([project])
+    else:
+        # Deletes only carry the Mongo _id, so re-read the collection
+        await rebuild_project_indexes()
+
+
+# Cached reads, shared by the individual routes and /api/bootstrap
+def project_fetch_fields(fields: Optional[Tuple[str, ...]]) -> Optional[Tuple[str, ...]]:
+    """Requested fields plus the ones pagination and Last-Modified rely on"""
+    if fields is None:
+        return None
+    return tuple(name for name in Project.model_fields if name in fields or name in PROJECT_BOOKKEEPING_FIELDS)
+
+def project_rows(documents: List[dict], fetched: Optional[Tuple[str, ...]]) -> List[dict]:
+    model = Project if fetched is None else partial_model(Project, fetched)
+    return [stored_row(model, document) for document in documents]
+
+def trim_rows(rows: List[dict], fields: Optional[Tuple[str, ...]]) -> List[dict]:
+    return rows if fields is None else [trim(row, fields) for row in rows]
+
+async def cached(key: tuple, collections: Tuple[str, ...],
+                 render: Callable[[], Awaitable[Optional[RenderedResponse]]]) -> Optional[RenderedResponse]:
+    """Cached rendering for ``key``; concurrent misses share a single ``render()``, None is not cached"""
+    if "projects" in collections:
+        key += (("projects_version", projects_version),)
+    found, rendered = read_cache.get(key)
+    if found:
+        return rendered
+
+    version = content_version
+
+    async def render_and_store():
+        rendered = await render()
+        if rendered is not None and version == content_version and read_cache.maxsize > 0:
+            await rendered.precompress()
+            if version == content_version:
+                read_cache.set(key, rendered, collections=collections)
+        return rendered
+
+    return await in_flight.run(key, render_and_store)
+
+async def load_projects(category: Optional[str], limit: int, cursor: Optional[str] = None,
+                        legacy: bool = False, fields: Optional[Tuple[str, ...]] = None) -> RenderedResponse:
+    if category == "الكل":
+        category = None
+
+    fields_key = ",".join(fields) if fields else None
+    if legacy:
+        key = cache_key("projects", category=category, fields=fields_key)
+    else:
+        key = cache_key("projects_page", category=category, cursor=cursor, limit=limit, fields=fields_key)
+    after = decode_cursor(cursor) if cursor else None
+
+    async def render():
+        fetched = project_fetch_fields(fields)
+        # Deletes leave no row behind to date them, so the last counted write dates the list too
+        modified = await storage.projects.modified()
+        if legacy:
+            projects = await storage.projects.list(category, fields=fetched or PROJECT_FIELDS)
+            rows = project_rows(projects, fetched)
+            result = trim_rows(rows, fields)
+        else:
+            projects = await storage.projects.list(category, after, limit + 1, fetched or PROJECT_FIELDS)
+            rows = project_rows(projects[:limit], fetched)
+            result = {"items": trim_rows(rows, fields), "next_cursor": next_cursor(projects, limit)}
+        return RenderedResponse.from_content(result, latest([modified, *(row["updated_at"] for row in rows)]))
+
+    return await cached(key, ("projects",), render)
+
+async def load_project(project_id: str, fields: Optional[Tuple[str, ...]] = None) -> Optional[RenderedResponse]:
+    """Rendered project, or None when there is no such project"""
+    key = cache_key("project", id=project_id, fields=",".join(fields) if fields else None)
+
+    async def render():
+        fetched = project_fetch_fields(fields)
+        project = await storage.projects.get(project_id, fetched or PROJECT_FIELDS)
+        if not project:
+            return None
+        row = project_rows([project], fetched)[0]
+        return RenderedResponse.from_content(trim_rows([row], fields)[0], row.get("updated_at"))
+
+    return await cached(key, ("projects",), render)
+
+async def load_categories(facets: Tuple[str, ...] = ()) -> RenderedResponse:
+    """Category names with project counts, plus counts for the other requested ``facets``"""
+    async def render():
+        index = await load_facets()
+        counts = index.counts("category")
+        result = {
+            "categories": ["الكل"] + list(counts),
+            "counts": {"الكل": len(index), **counts},
+        }
+        if facets:
+            result["facets"] = {facet: index.counts(facet) for facet in facets}
+        return RenderedResponse.from_content(result)
+
+    return await cached(cache_key("categories", facets=",".join(facets) or None), ("projects",), render)
+
+async def load_site_config() -> Optional[RenderedResponse]:
+    """Rendered site config, or None when it has not been created yet"""
+    async def render():
+        config = await storage.site_config.get(CONFIG_FIELDS)
+        if not config:
+            return None
+        result = stored_row(SiteConfig, config)
+        return RenderedResponse.from_content(result, result.get("updated_at"))
+
+    return await cached(cache_key("config"), ("site_config",), render)
+
+
+async def snapshot_files() -> Dict[str, RenderedResponse]:
+    """Every file of a static snapshot, rendered through the same loaders as the routes"""
+    categories = await load_categories()
+    files = {"categories.json": categories}
+    for category in [None] + categories.content["categories"][1:]:
+        files[projects_file(category, paged=False)] = await load_projects(category, DEFAULT_PAGE_SIZE, legacy=True)
+        files[projects_file(category, paged=True)] = await load_projects(category, DEFAULT_PAGE_SIZE)
+    config = await load_site_config()
+    if config is not None:
+        files["config.json"] = config
+    return files
+
+async def shared_snapshot_files() -> Dict[str, RenderedResponse]:
+    """The snapshot files plus one per project for the detail route, cut from the full list rendered for them"""
+    files = await snapshot_files()
+    for row in files[projects_file(None, paged=False)].content:
+        files[project_file(row["id"])] = RenderedResponse.from_content(row, row.get("updated_at"))
+    return files
+
+def snapshot_response(request: Request, name: Optional[str]) -> Optional[Response]:
+    """The published snapshot file ``name``, precompressed when the client accepts it"""
+    published = snapshot_publisher.get(name) if snapshot_publisher and name else None
+    return published.to_response(request) if published else None
+
+def published_response(request: Request, name: Optional[str], fallback: bool = False) -> Optional[Response]:
+    """Answer from the shared snapshot, else from the snapshot files with SNAPSHOT_SERVE (or as a ``fallback``)"""
+    if name is None:
+        return None
+    if shared_snapshot:
+        rendered = shared_snapshot.get(name)
+        if rendered is not None:
+            return rendered.to_response(request)
+    if SNAPSHOT_SERVE or fallback:
+        return snapshot_response(request, name)
+    return None
 
 
 # API Routes
@@ -205,75 +712,616 @@ async def init_default_data():
 async def root():
     return {"message": "Arabic Graphic Designer Portfolio API"}
 
-@api_router.get("/projects", response_model=List[Project])
-async def get_projects(category: Optional[str] = Query(None)):
-    """Get all projects or filter by category"""
+@api_router.get("/projects", response_model=Union[ProjectPage, List[Project]])
+async def get_projects(
+    request: Request,
+    category: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    legacy: bool = Query(False),
+    fields: Optional[str] = Query(None, description="Comma-separated Project fields to return; id is always included"),
+):
+    """Get a page of projects (or the full list with ``legacy=true``), optionally filtered by category"""
+    snapshot_name = None
+    if cursor is None and fields is None and (legacy or limit == DEFAULT_PAGE_SIZE):
+        snapshot_name = projects_file(category if category and category != "الكل" else None, paged=not legacy)
+    snapshot = published_response(request, snapshot_name)
+    if snapshot:
+        return snapshot
     try:
-        query = {}
-        if category and category != "الكل":
-            query["category"] = category
-        
-        projects = await db.projects.find(query).sort("created_at", -1).to_list(1000)
-        return [Project(**project) for project in projects]
+        rendered = await load_projects(category, limit, cursor, legacy, parse_fields(Project, fields))
+        return rendered.to_response(request)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="مؤشر الصفحة غير صالح")
+    except UnknownFields as e:
+        raise HTTPException(status_code=400, detail=f"حقول غير معروفة: {e}")
     except Exception as e:
         logger.error(f"Error fetching projects: {e}")
+        snapshot = published_response(request, snapshot_name, fallback=True)
+        if snapshot:
+            return snapshot
         raise HTTPException(status_code=500, detail="خطأ في جلب المشاريع")
 
+def export_response(repository, model, name: str, export_format: str, since: Optional[datetime]):
+    filename = f"{name}-{datetime.utcnow():%Y%m%d%H%M%S}.{export_format}"
+    return StreamingResponse(
+        iter_export(repository.export(since), model, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@api_router.get("/projects/export")
+async def export_projects(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = Query(None),
+):
+    """Stream all projects (oldest first) as NDJSON or CSV, resumable with ``since``"""
+    return export_response(storage.projects, Project, "projects", format, since)
+
+@api_router.get("/projects/search")
+async def search_projects(
+    q: str = Query(..., min_length=1, max_length=200),
+    category: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Ranked full-text search over title, description, tags and client"""
+    try:
+        await load_project_indexes()
+        index = search_index
+        accept = None
+        if category and category != "الكل":
+            accept = lambda project_id: index.documents[project_id]["category"] == category
+        total, hits = index.search(q, limit=limit, accept=accept)
+        return {
+            "total": total,
+            "items": [index.documents[project_id] for project_id, _ in hits],
+        }
+    except Exception as e:
+        logger.error(f"Error searching projects: {e}")
+        raise HTTPException(status_code=500, detail="خطأ في البحث عن المشاريع")
+
 @api_router.get("/projects/{project_id}", response_model=Project)
-async def get_project(project_id: str):
+async def get_project(
+    request: Request,
+    project_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated Project fields to return; id is always included"),
+):
     """Get single project by ID"""
+    snapshot_name = project_file(project_id) if fields is None else None
+    snapshot = published_response(request, snapshot_name)
+    if snapshot:
+        return snapshot
     try:
-        project = await db.projects.find_one({"id": project_id})
-        if not project:
+        rendered = await load_project(project_id, parse_fields(Project, fields))
+        if rendered is None:
             raise HTTPException(status_code=404, detail="المشروع غير موجود")
-        return Project(**project)
+        return rendered.to_response(request)
+    except UnknownFields as e:
+        raise HTTPException(status_code=400, detail=f"حقول غير معروفة: {e}")
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error fetching project: {e}")
+        snapshot = published_response(request, snapshot_name, fallback=True)
+        if snapshot:
+            return snapshot
         raise HTTPException(status_code=500, detail="خطأ في جलب المشروع")
 
+# Admin project writes
+async def write_projects(writes: List[ProjectWrite]) -> Tuple[List[WriteResult], Optional[int]]:
+    """Commit and count ``writes``, then update the search and facet indexes and invalidate reads before
+    any other request runs; the related lists are re-scored off the loop after that.
+
+    Returns the per-write results and the stored write count, None when nothing was written.
+    """
+    global projects_version
+    results = await storage.projects.bulk_write(writes)
+    outcomes = list(zip(writes, results))
+    written = [value for (_, value), (outcome, _) in outcomes if outcome in ("created", "updated")]
+    removed = [value for (_, value), (outcome, _) in outcomes if outcome == "deleted"]
+    if not written and not removed:
+        return results, None
+    version = None
+    # Counted before reads are invalidated, so lists rendered after that carry the new write time
+    try:
+        version = await storage.projects.bump_version()
+        own_versions.add(version)
+        projects_version = max(projects_version, version)
+    except Exception as e:
+        logger.error(f"Error counting project write: {e}")
+    index_projects(written, removed)
+    notify_collection_changed("projects")
+    # Off the loop, after the cheap indexes: related lists are not cached, so they catch up on their own
+    await update_related_index(written, removed)
+    return results, version
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'body'}: {e['msg']}" for e in error.errors())
+
+def parse_project_line(line: bytes) -> ProjectWrite:
+    """``{"delete": id}`` or a ProjectImport, raising ValueError when the line is invalid"""
+    item = orjson.loads(line)
+    if isinstance(item, dict) and set(item) == {"delete"} and isinstance(item["delete"], str):
+        return ("delete", item["delete"])
+    if not isinstance(item, dict):
+        raise ValueError("expected a JSON object")
+    try:
+        project = ProjectImport(**item)
+    except ValidationError as e:
+        raise ValueError(validation_message(e))
+    document = Project(**project.model_dump(exclude_none=True)).model_dump()
+    if project.id is None:
+        return ("insert", document)
+    if project.created_at is None:
+        # A replace keeps the stored created_at, so re-importing a project does not move it in the keyset order
+        del document["created_at"]
+    return ("replace", document)
+
+def line_too_long(number: int) -> HTTPException:
+    return HTTPException(status_code=413,
+                         detail=f"السطر {number} أطول من {PROJECTS_BULK_MAX_LINE_BYTES // 1024} كيلوبايت")
+
+async def ndjson_lines(chunks):
+    """``(line number, line)`` for each non-blank line of a streamed body; raises 413 on a line longer
+    than PROJECTS_BULK_MAX_LINE_BYTES as soon as that many bytes of it arrived"""
+    number, pending = 0, b""
+    async for chunk in chunks:
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            number += 1
+            if len(line) > PROJECTS_BULK_MAX_LINE_BYTES:
+                raise line_too_long(number)
+            if line.strip():
+                yield number, line
+        if len(pending) > PROJECTS_BULK_MAX_LINE_BYTES:
+            raise line_too_long(number + 1)
+    if pending.strip():
+        yield number + 1, pending
+
+@api_router.get("/projects/{project_id}/related", response_model=List[Project])
+async def get_related_projects(project_id: str, limit: int = Query(6, ge=1, le=RELATED_TOP_K)):
+    """Get the projects sharing the most tags and category with a project, most similar first"""
+    try:
+        await load_project_indexes()
+        related = related_index.related(project_id, limit)
+        if related is None:
+            raise HTTPException(status_code=404, detail="المشروع غير موجود")
+        # While an update is in flight the related lists may still name a just-deleted project
+        return [search_index.documents[related_id] for related_id in related if related_id in search_index.documents]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching related projects: {e}")
+        raise HTTPException(status_code=500, detail="خطأ في جلب المشاريع المشابهة")
+
+@api_router.post("/projects", response_model=Project, dependencies=[Depends(require_admin)])
+async def create_project(project_data: ProjectCreate):
+    """Create a project (admin)"""
+    try:
+        project = Project(**project_data.model_dump()).model_dump()
+        [(outcome, error)], _ = await write_projects([("insert", project)])
+        if outcome == "failed":
+            raise RuntimeError(error)
+        return project
+    except Exception as e:
+        logger.error(f"Error creating project: {e}")
+        raise HTTPException(status_code=500, detail="خطأ في إنشاء المشروع")
+
+@api_router.post("/projects/bulk", dependencies=[Depends(require_admin)])
+async def bulk_write_projects(request: Request):
+    """Create, replace (lines with an ``id``) or delete (``{"delete": id}``) projects from an NDJSON body
+
+    Lines are validated as they stream in and committed unordered in chunks of
+    PROJECTS_BULK_CHUNK_SIZE; each line gets its own result.
+    """
+    results: List[dict] = []
+    pending: List[Tuple[int, ProjectWrite]] = []
+    versions: List[int] = []
+
+    async def commit():
+        outcomes, version = await write_projects([write for _, write in pending])
+        if version is not None:
+            versions.append(version)
+        for (number, (operation, value)), (outcome, error) in zip(pending, outcomes):
+            project_id = value if operation == "delete" else value["id"]
+            result = {"line": number, "id": project_id, "status": outcome}
+            if error:
+                result["error"] = error
+            results.append(result)
+        pending.clear()
+
+    try:
+        async for number, line in ndjson_lines(request.stream()):
+            try:
+                pending.append((number, parse_project_line(line)))
+            except ValueError as e:
+                results.append({"line": number, "id": None, "status": "failed", "error": str(e)})
+                continue
+            if len(pending) >= PROJECTS_BULK_CHUNK_SIZE:
+                await commit()
+        if pending:
+            await commit()
+        # The stored write count every worker sees, not this one's in-memory invalidation counter
+        version = max(versions) if versions else await storage.projects.version()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in bulk project write: {e}")
+        raise HTTPException(status_code=500, detail="خطأ في حفظ المشاريع")
+    results.sort(key=lambda result: result["line"])
+    summary = {status: 0 for status in ("created", "updated", "deleted", "failed")}
+    for result in results:
+        summary[result["status"]] += 1
+    return {**summary, "version": version, "results": results}
+
+@api_router.put("/projects/{project_id}", response_model=Project, dependencies=[Depends(require_admin)])
+async def update_project(project_id: str, changes: ProjectUpdate):
+    """Update the fields sent for a project (admin); an explicit null clears an optional field"""
+    try:
+        existing = await storage.projects.get(project_id, PROJECT_FIELDS)
+        if not existing:
+            raise HTTPException(status_code=404, detail="المشروع غير موجود")
+        try:
+            project = Project(**{**existing, **changes.model_dump(exclude_unset=True),
+                                 "updated_at": datetime.utcnow()}).model_dump()
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=validation_message(e))
+        [(outcome, error)], _ = await write_projects([("replace", project)])
+        if outcome == "failed":
+            raise RuntimeError(error)
+        return project
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating project: {e}")
+        raise HTTPException(status_code=500, detail="خطأ في تحديث المشروع")
+
+@api_router.delete("/projects/{project_id}", dependencies=[Depends(require_admin)])
+async def delete_project(project_id: str):
+    """Delete a project (admin)"""
+    try:
+        if not await storage.projects.get(project_id, ("id",)):
+            raise HTTPException(status_code=404, detail="المشروع غير موجود")
+        [(outcome, error)], _ = await write_projects([("delete", project_id)])
+        if outcome == "failed":
+            raise RuntimeError(error)
+        return {"success": True, "message": "تم حذف المشروع"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting project: {e}")
+        raise HTTPException(status_code=500, detail="خطأ في حذف المشروع")
+
+@api_router.post("/images", dependencies=[Depends(require_admin)])
+async def upload_image(request: Request):
+    """Upload an image (multipart field ``file``) and get its variants as ``image`` + ``srcset`` (admin)"""
+    if not image_store.available:
+        raise HTTPException(status_code=503, detail="معالجة الصور غير متاحة على هذا الخادم")
+    if int(request.headers.get("content-length") or 0) > IMAGE_MAX_UPLOAD_BYTES + 64 * 1024:
+        raise HTTPException(status_code=413, detail="حجم الصورة أكبر من المسموح")
+    try:
+        upload, digest = await receive_upload(
+            request.headers.get("content-type"), request.stream(), image_store.incoming(), IMAGE_MAX_UPLOAD_BYTES,
+        )
+        manifest = await image_store.ingest(upload, digest)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="حجم الصورة أكبر من المسموح")
+    except InvalidUpload as e:
+        raise HTTPException(status_code=400, detail=f"ملف الصورة غير صالح: {e}")
+    except Exception as e:
+        logger.error(f"Error processing image upload: {e}")
+        raise HTTPException(status_code=500, detail="خطأ في معالجة الصورة")
+    medium = manifest["variants"]["medium"]["files"]
+    fallback = next(name for extension, name in medium.items() if extension != "webp")
+    return {
+        "id": manifest["id"],
+        "width": manifest["width"],
+        "height": manifest["height"],
+        "image": MEDIA_URL + fallback,
+        "srcset": srcset(manifest, MEDIA_URL),
+    }
+
+@api_router.get("/media/{name}")
+async def get_media(name: str):
+    """Serve an image variant; names are content hashes, so they never change"""
+    path = image_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="الصورة غير موجودة")
+    return FileResponse(path, media_type=MEDIA_TYPES[path.suffix[1:]], headers={"Cache-Control": IMAGE_CACHE_CONTROL})
+
 @api_router.get("/categories")
-async def get_categories():
-    """Get available project categories"""
+async def get_categories(request: Request, facets: Optional[str] = Query(None)):
+    """Get project categories with their counts, and optionally ``year``/``tags`` facets"""
+    requested = {name.strip() for name in (facets or "").split(",") if name.strip()}
+    selected = tuple(name for name in FACETS if name in requested and name != "category")
+    unknown = sorted(requested - set(selected))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"حقول غير معروفة: {', '.join(unknown)}")
+    snapshot = None if selected else published_response(request, "categories.json")
+    if snapshot:
+        return snapshot
     try:
-        categories = await db.projects.distinct("category")
-        return {"categories": ["الكل"] + categories}
+        rendered = await load_categories(selected)
+        return rendered.to_response(request)
     except Exception as e:
         logger.error(f"Error fetching categories: {e}")
+        snapshot = None if selected else published_response(request, "categories.json", fallback=True)
+        if snapshot:
+            return snapshot
         raise HTTPException(status_code=500, detail="خطأ في جلب الفئات")
 
+@api_router.get("/bootstrap", response_model=Bootstrap)
+async def get_bootstrap(request: Request, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    """Get site config, categories and the first projects page in one response"""
+    async def render():
+        config, categories, projects = await asyncio.gather(
+            load_site_config(), load_categories(), load_projects(None, limit),
+        )
+        if config is None:
+            return None
+        result = {
+            "config": config.content,
+            "categories": categories.content["categories"],
+            "projects": projects.content,
+        }
+        return RenderedResponse.from_content(result, latest([config.last_modified, projects.last_modified]))
+
+    try:
+        rendered = await cached(cache_key("bootstrap", limit=limit), ("projects", "site_config"), render)
+        if rendered is None:
+            raise HTTPException(status_code=404, detail="إعدادات الموقع غير موجودة")
+        return rendered.to_response(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching bootstrap data: {e}")
+        raise HTTPException(status_code=500, detail="خطأ في جلب بيانات الموقع")
+
+def contact_fingerprint(contact_data: ContactMessageCreate) -> str:
+    """Hash of the normalized email, subject and message; case and whitespace do not make a new message"""
+    parts = [contact_data.email.strip(), contact_data.subject, contact_data.message]
+    normalized = "\x1f".join(" ".join(part.split()).casefold() for part in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def throttle_contact(request: Request, contact_data: ContactMessageCreate):
+    """Take a token from both the IP and the email bucket, or from neither when either is empty"""
+    keys = {"ip": request.client.host if request.client else "unknown", "email": contact_data.email.strip().casefold()}
+    # Checked before anything is taken, so a request one bucket rejects does not spend the other's budget
+    wait = max(contact_limiters[name].peek(key) for name, key in keys.items())
+    if not wait:
+        for name, key in keys.items():
+            wait = max(wait, contact_limiters[name].acquire(key))
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="تم تجاوز عدد الرسائل المسموح به، يرجى المحاولة لاحقاً",
+            # A rate of 0 never refills (an infinite wait), so clamp before rounding
+            headers={"Retry-After": str(math.ceil(min(wait, MAX_RETRY_AFTER_SECONDS)))},
+        )
+
 @api_router.post("/contact")
-async def submit_contact_form(contact_data: ContactMessageCreate):
+async def submit_contact_form(contact_data: ContactMessageCreate, request: Request):
     """Submit contact form"""
+    fingerprint = contact_fingerprint(contact_data)
+    found, response = contact_dedup.get(fingerprint)
+    if found:
+        return response
+    throttle_contact(request, contact_data)
+    response = {
+        "success": True,
+        "message": "تم إرسال الرسالة بنجاح! سنقوم بالرد عليك في أقرب وقت ممكن."
+    }
+    # Remembered before the write, so a second click arriving while it is in progress is not written again
+    contact_dedup.set(fingerprint, response)
     try:
-        contact_message = ContactMessage(**contact_data.dict())
-        await db.contact_messages.insert_one(contact_message.dict())
-        return {
-            "success": True,
-            "message": "تم إرسال الرسالة بنجاح! سنقوم بالرد عليك في أقرب وقت ممكن."
-        }
+        contact_message = ContactMessage(**contact_data.model_dump())
+        if contact_queue.running:
+            contact_queue.submit(contact_message.model_dump())
+        else:
+            await storage.contact_messages.insert_one(contact_message.model_dump())
+        return response
+    except QueueFull:
+        contact_dedup.discard(fingerprint)
+        raise HTTPException(
+            status_code=503,
+            detail="الخدمة مشغولة حالياً، يرجى المحاولة بعد قليل",
+            headers={"Retry-After": str(contact_queue.retry_after())},
+        )
     except Exception as e:
+        contact_dedup.discard(fingerprint)
         logger.error(f"Error submitting contact form: {e}")
         raise HTTPException(status_code=500, detail="خطأ في إرسال الرسالة")
 
+def earlier_statuses(status: str) -> Tuple[str, ...]:
+    return CONTACT_STATUSES[:CONTACT_STATUSES.index(status)]
+
+@api_router.get("/contact", response_model=ContactMessagePage, dependencies=[Depends(require_admin)])
+async def get_contact_messages(
+    status: Optional[str] = Query(None, pattern=CONTACT_STATUS_PATTERN),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+):
+    """Get a page of contact messages, newest first, optionally with one status (admin)"""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+        messages = await storage.contact_messages.list(status, after, limit + 1)
+        return {
+            "items": [stored_row(ContactMessage, message) for message in messages[:limit]],
+            "next_cursor": next_cursor(messages, limit),
+        }
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="مؤشر الصفحة غير صالح")
+    except Exception as e:
+        logger.error(f"Error fetching contact messages: {e}")
+        raise HTTPException(status_code=500, detail="خطأ في جلب الرسائل")
+
+@api_router.post("/contact/status", dependencies=[Depends(require_admin)])
+async def update_contact_statuses(update: ContactBulkStatusUpdate):
+    """Move many messages forward to ``status`` in one update; others are left as they are (admin)"""
+    try:
+        updated = await storage.contact_messages.set_status(update.ids, update.status, earlier_statuses(update.status))
+        return {"updated": updated}
+    except Exception as e:
+        logger.error(f"Error updating contact statuses: {e}")
+        raise HTTPException(status_code=500, detail="خطأ في تحديث حالة الرسائل")
+
+@api_router.put("/contact/{message_id}", response_model=ContactMessage, dependencies=[Depends(require_admin)])
+async def update_contact_status(message_id: str, update: ContactStatusUpdate):
+    """Move one message forward to ``status`` (admin)"""
+    try:
+        message = await storage.contact_messages.get(message_id)
+        if not message:
+            raise HTTPException(status_code=404, detail="الرسالة غير موجودة")
+        if message.get("status") != update.status:
+            if message.get("status") not in earlier_statuses(update.status):
+                raise HTTPException(status_code=409, detail="لا يمكن إرجاع الرسالة إلى حالة سابقة")
+            await storage.contact_messages.set_status([message_id], update.status, earlier_statuses(update.status))
+            message["status"] = update.status
+        return stored_row(ContactMessage, message)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating contact status: {e}")
+        raise HTTPException(status_code=500, detail="خطأ في تحديث حالة الرسالة")
+
+@api_router.get("/contact/export", dependencies=[Depends(require_admin)])
+async def export_contact_messages(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = Query(None),
+):
+    """Stream contact messages (oldest first) as NDJSON or CSV, resumable with ``since``"""
+    return export_response(storage.contact_messages, ContactMessage, "contact-messages", format, since)
+
 @api_router.get("/config", response_model=SiteConfig)
-async def get_site_config():
+async def get_site_config(request: Request):
     """Get site configuration"""
+    snapshot = published_response(request, "config.json")
+    if snapshot:
+        return snapshot
     try:
-        config = await db.site_config.find_one()
-        if not config:
+        rendered = await load_site_config()
+        if rendered is None:
             raise HTTPException(status_code=404, detail="إعدادات الموقع غير موجودة")
-        return SiteConfig(**config)
+        return rendered.to_response(request)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error fetching site config: {e}")
+        snapshot = published_response(request, "config.json", fallback=True)
+        if snapshot:
+            return snapshot
         raise HTTPException(status_code=500, detail="خطأ في جلب إعدادات الموقع")
 
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    """Get read cache hit/miss counters"""
+    return {**read_cache.stats(), "single_flight": in_flight.stats(), "content_version": content_version,
+            "projects_version": projects_version}
+
+@api_router.get("/admin/query-plans", dependencies=[Depends(require_admin)])
+async def get_query_plans():
+    """Explain the hot queries and flag collection scans"""
+    try:
+        report = await storage.explain_hot_queries()
+        return {"collscans": sum(row["collscan"] for row in report), "queries": report}
+    except Exception as e:
+        logger.error(f"Error explaining queries: {e}")
+        raise HTTPException(status_code=500, detail="خطأ في تحليل الاستعلامات")
+
+@api_router.get("/admin/contact-queue", dependencies=[Depends(require_admin)])
+async def get_contact_queue_stats():
+    """Get write-behind queue depth and flush latency"""
+    return contact_queue.stats()
+
+@api_router.get("/admin/contact-throttle", dependencies=[Depends(require_admin)])
+async def get_contact_throttle_stats():
+    """Get contact form rate-limit and duplicate counters"""
+    return {
+        **{name: limiter.stats() for name, limiter in contact_limiters.items()},
+        "dedup": {"duplicates": contact_dedup.hits, "entries": len(contact_dedup), "window_seconds": contact_dedup.ttl},
+    }
+
+@api_router.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def get_profiles():
+    """List stored request profiles, newest first"""
+    return {"profiles": profile_store.names()}
+
+@api_router.get("/admin/profiles/{name}", dependencies=[Depends(require_admin)])
+async def get_profile(name: str):
+    """Get one stored request profile"""
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="ملف التحليل غير موجود")
+    return FileResponse(path, media_type="application/json")
+
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the process answers; never touches storage"""
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Readiness: startup finished, default data seeded and storage answering a ping"""
+    ping = {"backend": storage.name, "ok": False, "ping_ms": None}
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(storage.ping(), READY_PING_TIMEOUT)
+        ping.update(ok=True, ping_ms=round((time.perf_counter() - started) * 1000, 2))
+    except Exception as e:
+        ping["error"] = str(e) or type(e).__name__
+    # Failed index creation is reported but does not hold traffic back, as before
+    ready = ping["ok"] and startup_status["started"] == "ready" and startup_status["seed"] == "ready"
+    return ORJSONResponse({"ready": ready, "storage": ping, **startup_status}, status_code=200 if ready else 503)
+
+metrics.registry.gauge_callback(
+    "read_cache_lookups", "Read cache lookups by result since start",
+    lambda: {("hit",): read_cache.hits, ("miss",): read_cache.misses}, ("result",),
+)
+metrics.registry.gauge_callback(
+    "read_cache_entries", "Entries currently held in the read cache", lambda: {(): len(read_cache)},
+)
+metrics.registry.gauge_callback(
+    "contact_queue_depth", "Contact messages waiting in the write-behind queue", lambda: {(): contact_queue.depth},
+)
+metrics.registry.gauge_callback(
+    "contact_queue_flush_ms", "Write-behind flush latency in milliseconds",
+    lambda: {(stat,): contact_queue.stats()[f"{stat}_flush_ms"] for stat in ("last", "max", "avg")}, ("stat",),
+)
+
+metrics.registry.gauge_callback(
+    "contact_submissions", "Contact submissions by throttle check and decision since start",
+    lambda: {
+        **{(name, decision): getattr(limiter, decision)
+           for name, limiter in contact_limiters.items() for decision in ("allowed", "limited")},
+        ("dedup", "duplicate"): contact_dedup.hits,
+    },
+    ("check", "decision"),
+)
+
+metrics.registry.gauge_callback(
+    "shared_snapshot_version", "Shared snapshot version this worker has mapped",
+    lambda: {(): shared_snapshot.stats()["version"]} if shared_snapshot else {},
+)
+
+app.add_middleware(
+    profiling.ProfilingMiddleware,
+    store=profile_store,
+    authorize=is_admin,
+    sample_rate=PROFILE_SAMPLE_RATE,
+    interval=PROFILE_INTERVAL,
+    slow_seconds=SLOW_REQUEST_SECONDS or None,
+)
+
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -289,11 +1337,78 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("startup")
-async def startup_event():
-    await init_default_data()
-    logger.info("Portfolio API started successfully")
+async def create_indexes():
+    try:
+        await storage.ensure_indexes()
+        startup_status["indexes"] = "ready"
+    except Exception as e:
+        startup_status["indexes"] = "failed"
+        logger.error(f"Error creating indexes: {e}")
+
+async def warm_storage():
+    """Open connections before the first request rather than during it"""
+    try:
+        await asyncio.gather(*(storage.ping() for _ in range(max(WARM_CONNECTIONS, 1))))
+    except Exception as e:
+        logger.error(f"Error warming storage connections: {e}")
+
+async def seed_default_data() -> bool:
+    try:
+        await init_default_data()
+        startup_status["seed"] = "ready"
+        return True
+    except Exception as e:
+        startup_status["seed"] = "failed"
+        logger.error(f"Error seeding default data: {e}")
+        return False
+
+async def retry_seeding():
+    """Seed again after a failed attempt, backing off, until it succeeds and /readyz can pass"""
+    delay = SEED_RETRY_SECONDS
+    while True:
+        await asyncio.sleep(delay)
+        if await seed_default_data():
+            logger.info("Default data seeded after retrying")
+            return
+        delay = min(delay * 2, max(SEED_RETRY_MAX_SECONDS, SEED_RETRY_SECONDS))
+
+async def startup():
+    global cache_watcher_task, version_watcher_task, seed_retry_task
+    started = time.perf_counter()
+    # Seeding upserts rely on the unique id indexes, so they wait for both
+    await asyncio.gather(create_indexes(), warm_storage())
+    if not await seed_default_data() and SEED_RETRY_SECONDS > 0:
+        seed_retry_task = asyncio.create_task(retry_seeding())
+    await rebuild_project_indexes()
+    if snapshot_publisher:
+        snapshot_publisher.request()
+    if shared_snapshot:
+        shared_snapshot.start()
+    if CONTACT_WRITE_BEHIND:
+        contact_queue.start()
+    if os.environ.get('CACHE_WATCH_CHANGES', '').lower() in ('1', 'true', 'yes'):
+        if storage.name == "mongo":
+            cache_watcher_task = asyncio.create_task(watch_collection_changes())
+        else:
+            logger.warning(f"CACHE_WATCH_CHANGES ignored: {storage.name} storage has no change stream")
+    # Memory storage lives in this process only, so no other process can write to it
+    if PROJECT_VERSION_POLL_SECONDS > 0 and storage.name != "memory":
+        version_watcher_task = asyncio.create_task(watch_project_versions())
+    startup_status["started"] = "ready"
+    logger.info(f"Portfolio API started successfully ({storage.name} storage, {time.perf_counter() - started:.2f}s)")
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+async def shutdown():
+    startup_status["started"] = "pending"
+    if seed_retry_task:
+        seed_retry_task.cancel()
+    if cache_watcher_task:
+        cache_watcher_task.cancel()
+    if version_watcher_task:
+        version_watcher_task.cancel()
+    await contact_queue.stop()
+    if snapshot_publisher:
+        await snapshot_publisher.wait()
+    if shared_snapshot:
+        await shared_snapshot.stop()
+    image_store.close()
+    await storage.close()
@@ -0,0 +1,250 @@
+"""Read-side store shared by every uvicorn worker through a memory-mapped file
+
+Workers serve the snapshot routes (see ``snapshot.py``), plus each project's
+full detail (``projects/<id>.json``), from one mapping in the page cache
+instead of each holding its own copy and querying storage.
+
+    SHARED_CACHE_DIR/
+        header            magic + u64 version, bumped after each publish
+        data-<version>    magic + u32 index length + JSON index + bodies (offsets relative to the bodies)
+        leader.lock       held by the worker that publishes at startup
+        write.lock        serializes publishes across workers
+
+A publish writes a complete new data file, then bumps the header counter.
+Readers check the counter on every lookup and remap when it moves; old data
+files stay valid for readers that still map them even after being removed.
+Bodies are stored with their precompressed variants, so no worker compresses.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from http_cache import ENCODINGS, RenderedResponse, compress
+from snapshot import ScheduledPublisher, content_version
+
+logger = logging.getLogger(__name__)
+
+HEADER_MAGIC = b"PFSHM001"
+DATA_MAGIC = b"PFDATA01"
+HEADER = struct.Struct("<8sQ")
+INDEX_LENGTH = struct.Struct("<I")
+IDENTITY = "identity"
+LEADER_RETRY_SECONDS = 5.0
+
+
+class MappedResponse(RenderedResponse):
+    """A rendering whose bodies are slices of the shared mapping, copied out only when sent"""
+
+    __slots__ = ("_views",)
+
+    def __init__(self, views: Dict[str, memoryview], etag: str, last_modified: Optional[datetime]):
+        self._views = views
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content = None
+        self._encoded = {}
+
+    @property
+    def body(self) -> bytes:
+        return bytes(self._views[IDENTITY])
+
+    @property
+    def compressible(self) -> bool:
+        return len(self._views) > 1
+
+    def encoded(self, encoding: str) -> bytes:
+        view = self._views.get(encoding)
+        return bytes(view) if view is not None else super().encoded(encoding)
+
+    def has_encoded(self, encoding: str) -> bool:
+        return encoding in self._views
+
+
+def _lock(path: Path, blocking: bool) -> Optional[int]:
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock(fd: int) -> None:
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+class SharedSnapshot(ScheduledPublisher):
+    def __init__(self, directory: Path, render: Callable[[], Awaitable[Dict[str, RenderedResponse]]], keep: int = 2):
+        super().__init__()
+        self.directory = Path(directory)
+        self._render = render
+        self.keep = keep
+        self._header: Optional[mmap.mmap] = None
+        self._version = 0
+        self._digest: Optional[str] = None
+        self._data: Optional[mmap.mmap] = None
+        self._responses: Dict[str, MappedResponse] = {}
+        self._leader_fd: Optional[int] = None
+        self._leader_task: Optional[asyncio.Task] = None
+
+    # Reading, on every request
+    @property
+    def version(self) -> int:
+        """Published version according to the header, 0 before the first publish"""
+        if self._header is None:
+            try:
+                with open(self.directory / "header", "rb") as f:
+                    self._header = mmap.mmap(f.fileno(), HEADER.size, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                return 0
+        magic, version = HEADER.unpack_from(self._header)
+        return version if magic == HEADER_MAGIC else 0
+
+    def get(self, name: str) -> Optional[MappedResponse]:
+        version = self.version
+        if version != self._version:
+            self._remap(version)
+        return self._responses.get(name)
+
+    def _remap(self, version: int) -> None:
+        try:
+            with open(self.directory / f"data-{version}", "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            # Pruned between reading the header and opening it; the next lookup sees the newer version
+            return
+        (length,) = INDEX_LENGTH.unpack_from(data, len(DATA_MAGIC))
+        start = len(DATA_MAGIC) + INDEX_LENGTH.size
+        index = json.loads(data[start:start + length])
+        bodies = memoryview(data)[start + length:]
+        responses = {}
+        for name, entry in index["entries"].items():
+            views = {encoding: bodies[offset:offset + size] for encoding, (offset, size) in entry["bodies"].items()}
+            last_modified = datetime.fromisoformat(entry["last_modified"]) if entry["last_modified"] else None
+            responses[name] = MappedResponse(views, entry["etag"], last_modified)
+        # The previous mapping is released once no response still references it
+        self._data, self._responses = data, responses
+        self._version, self._digest = version, index["digest"]
+
+    # Publishing, after writes
+    async def publish(self) -> int:
+        """Render and publish a new version; unchanged content keeps the current one"""
+        files = await self._render()
+        return await asyncio.to_thread(self._write, content_version(files), files)
+
+    def _write(self, digest: str, files: Dict[str, RenderedResponse]) -> int:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = _lock(self.directory / "write.lock", blocking=True)
+        try:
+            current = self.version
+            if current and self._current_digest(current) == digest:
+                return current
+            version = current + 1
+            self._write_data(version, digest, files)
+            header = self.directory / "header"
+            if current:
+                # Overwritten in place so the mappings other workers hold see the new counter
+                with open(header, "r+b") as f:
+                    f.write(HEADER.pack(HEADER_MAGIC, version))
+            else:
+                staging = self.directory / f".header-{os.getpid()}"
+                staging.write_bytes(HEADER.pack(HEADER_MAGIC, version))
+                os.replace(staging, header)
+            self._prune(version)
+            logger.info(f"Published shared snapshot version {version} ({len(files)} entries)")
+            return version
+        finally:
+            _unlock(fd)
+
+    def _current_digest(self, version: int) -> Optional[str]:
+        if version == self._version:
+            return self._digest
+        try:
+            with open(self.directory / f"data-{version}", "rb") as f:
+                f.seek(len(DATA_MAGIC))
+                (length,) = INDEX_LENGTH.unpack(f.read(INDEX_LENGTH.size))
+                return json.loads(f.read(length))["digest"]
+        except (FileNotFoundError, ValueError, struct.error):
+            return None
+
+    def _write_data(self, version: int, digest: str, files: Dict[str, RenderedResponse]) -> None:
+        bodies = []
+        entries = {}
+        offset = 0
+        for name, rendered in files.items():
+            variants = {IDENTITY: rendered.body}
+            if rendered.compressible:
+                variants.update((encoding, compress(rendered.body, encoding, precomputed=True)) for encoding in ENCODINGS)
+            spans = {}
+            for encoding, body in variants.items():
+                spans[encoding] = (offset, len(body))
+                bodies.append(body)
+                offset += len(body)
+            entries[name] = {
+                "etag": rendered.etag,
+                "last_modified": rendered.last_modified.isoformat() if rendered.last_modified else None,
+                "bodies": spans,
+            }
+        index = json.dumps({"digest": digest, "entries": entries}).encode("utf-8")
+        staging = self.directory / f".data-{version}-{os.getpid()}"
+        with open(staging, "wb") as f:
+            f.write(DATA_MAGIC + INDEX_LENGTH.pack(len(index)) + index)
+            for body in bodies:
+                f.write(body)
+        os.replace(staging, self.directory / f"data-{version}")
+
+    def _prune(self, version: int) -> None:
+        for path in self.directory.glob("data-*"):
+            try:
+                if int(path.name[len("data-"):]) <= version - self.keep:
+                    path.unlink()
+            except (ValueError, FileNotFoundError):
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self._version,
+            "leader": self.is_leader,
+            "entries": len(self._responses),
+            "mapped_bytes": len(self._data) if self._data is not None else 0,
+        }
+
+    # Leadership: one worker publishes at startup, the others take over if it exits
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_fd is not None
+
+    def start(self) -> None:
+        self._leader_task = asyncio.create_task(self._lead())
+
+    async def _lead(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        while self._leader_fd is None:
+            self._leader_fd = _lock(self.directory / "leader.lock", blocking=False)
+            if self._leader_fd is None:
+                await asyncio.sleep(LEADER_RETRY_SECONDS)
+        logger.info(f"Worker {os.getpid()} leads the shared snapshot")
+        self.request()
+
+    async def stop(self) -> None:
+        if self._leader_task:
+            self._leader_task.cancel()
+            try:
+                await self._leader_task
+            except asyncio.CancelledError:
+                pass
+        await self.wait()
+        if self._leader_fd is not None:
+            _unlock(self._leader_fd)
+            self._leader_fd = None
+
@@ -0,0 +1,258 @@
+"""Versioned static JSON snapshots of the public read routes
+
+Each snapshot is a directory named after the hash of its contents, and the
+``current`` symlink is swapped atomically to publish it:
+
+    SNAPSHOT_DIR/current -> v-<hash>/
+        projects.json                     GET /api/projects?legacy=true
+        projects-page.json                GET /api/projects
+        categories/<category>.json        GET /api/projects?category=<category>&legacy=true
+        categories/<category>-page.json   GET /api/projects?category=<category>
+        categories.json                   GET /api/categories
+        config.json                       GET /api/config
+        manifest.json                     version and each file's ETag / Last-Modified
+
+``<category>`` is percent-encoded (UTF-8, uppercase hex). Large files get
+``.gz`` / ``.br`` siblings so a reverse proxy can serve them as-is, e.g.
+nginx with ``root SNAPSHOT_DIR/current`` and ``gzip_static on``.
+
+Run from the backend directory to publish on demand:
+
+    python snapshot.py publish [--dir DIR]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from http_cache import ENCODINGS, RenderedResponse, compress
+
+logger = logging.getLogger(__name__)
+
+CURRENT = "current"
+VERSION_PREFIX = "v-"
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def projects_file(category: Optional[str], paged: bool) -> str:
+    """Snapshot file answering a first-page (``paged``) or full-list projects request"""
+    suffix = "-page.json" if paged else ".json"
+    if category is None:
+        return "projects" + suffix
+    return "categories/" + quote(category, safe="") + suffix
+
+
+def project_file(project_id: str) -> str:
+    """Shared snapshot entry answering a full project detail request"""
+    return "projects/" + quote(project_id, safe="") + ".json"
+
+
+def content_version(files: Dict[str, RenderedResponse]) -> str:
+    """Hash over every file name and body"""
+    digest = hashlib.blake2b(digest_size=8)
+    for name in sorted(files):
+        digest.update(name.encode("utf-8") + b"\0" + files[name].body + b"\0")
+    return digest.hexdigest()
+
+
+class PublishedFile(RenderedResponse):
+    """A published snapshot file, sent from disk with the validators recorded when it was written"""
+
+    __slots__ = ("path", "_compressible")
+
+    def __init__(self, path: Path, etag: str, last_modified: Optional[datetime], compressible: bool):
+        self.path = path
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content = None
+        self._encoded = {}
+        self._compressible = compressible
+
+    @property
+    def body(self) -> bytes:
+        return self.path.read_bytes()
+
+    @property
+    def compressible(self) -> bool:
+        return self._compressible
+
+    def variant_path(self, encoding: Optional[str]) -> Path:
+        return self.path if encoding is None else self.path.with_name(self.path.name + SUFFIXES[encoding])
+
+    def has_encoded(self, encoding: str) -> bool:
+        return self.variant_path(encoding).is_file()
+
+    def to_response(self, request: Request) -> Response:
+        encoding = self.negotiate(request)
+        headers = self.headers(encoding)
+        if self.is_fresh_for(request):
+            return Response(status_code=304, headers=headers)
+        return FileResponse(self.variant_path(encoding), media_type="application/json", headers=headers)
+
+
+class ScheduledPublisher(ABC):
+    """Coalesces publish requests: at most one runs at a time and one more is queued behind it"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+
+    @abstractmethod
+    async def publish(self):
+        """Render and publish once"""
+
+    def request(self) -> None:
+        """Publish soon; requests made while a publish is running coalesce into one more run"""
+        if self._task and not self._task.done():
+            self._dirty = True
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._dirty = False
+            try:
+                await self.publish()
+            except Exception as e:
+                logger.error(f"Error publishing {type(self).__name__}: {e}")
+            if not self._dirty:
+                return
+
+    async def wait(self) -> None:
+        """Wait for any scheduled publish to finish"""
+        if self._task:
+            await self._task
+
+
+class SnapshotPublisher(ScheduledPublisher):
+    """Render the read routes through ``render`` and publish them under ``directory``"""
+
+    def __init__(self, directory: Path, render: Callable[[], Awaitable[Dict[str, RenderedResponse]]], keep: int = 2):
+        super().__init__()
+        self.directory = Path(directory)
+        self._render = render
+        self.keep = keep
+        self._manifest: Tuple[Optional[str], Dict[str, Any]] = (None, {})
+
+    @property
+    def version(self) -> Optional[str]:
+        current = self.directory / CURRENT
+        if not current.is_symlink():
+            return None
+        return os.readlink(current)[len(VERSION_PREFIX):]
+
+    def path(self, name: str) -> Optional[Path]:
+        """The published file ``name``, or None when there is no snapshot of it"""
+        path = self.directory / CURRENT / name
+        return path if path.is_file() else None
+
+    def get(self, name: str) -> Optional[PublishedFile]:
+        """The published file ``name`` with its validators, or None when there is no snapshot of it"""
+        version = self.version
+        if version is None:
+            return None
+        if self._manifest[0] != version:
+            try:
+                manifest = json.loads((self.directory / (VERSION_PREFIX + version) / "manifest.json").read_text("utf-8"))
+            except (OSError, ValueError):
+                return None
+            files = manifest.get("files")
+            # Older manifests list the names only; those snapshots are not served until republished
+            self._manifest = (version, files if isinstance(files, dict) else {})
+        entry = self._manifest[1].get(name)
+        if entry is None:
+            return None
+        # The versioned directory, so a publish swapping ``current`` cannot mix bodies and validators
+        path = self.directory / (VERSION_PREFIX + version) / name
+        if not path.is_file():
+            return None
+        last_modified = entry.get("last_modified")
+        return PublishedFile(path, entry["etag"], datetime.fromisoformat(last_modified) if last_modified else None,
+                             entry.get("compressible", False))
+
+    async def publish(self) -> str:
+        """Render and publish a snapshot; unchanged content keeps the current version"""
+        files = await self._render()
+        version = content_version(files)
+        if version != self.version:
+            await asyncio.to_thread(self._write, version, files)
+            logger.info(f"Published snapshot {version} ({len(files)} files)")
+        return version
+
+    def _write(self, version: str, files: Dict[str, RenderedResponse]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.directory / (VERSION_PREFIX + version)
+        if not target.is_dir():
+            staging = self.directory / f".staging-{version}-{os.getpid()}"
+            shutil.rmtree(staging, ignore_errors=True)
+            for name, rendered in files.items():
+                path = staging / name
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(rendered.body)
+                if rendered.compressible:
+                    for encoding in ENCODINGS:
+                        path.with_name(path.name + SUFFIXES[encoding]).write_bytes(compress(rendered.body, encoding, precomputed=True))
+            manifest = {
+                "version": version,
+                "generated_at": datetime.utcnow().isoformat(),
+                "files": {
+                    name: {
+                        "etag": files[name].etag,
+                        "last_modified": files[name].last_modified.isoformat() if files[name].last_modified else None,
+                        "compressible": files[name].compressible,
+                    }
+                    for name in sorted(files)
+                },
+            }
+            (staging / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), "utf-8")
+            os.replace(staging, target)
+        link = self.directory / f".{CURRENT}-{os.getpid()}"
+        if link.is_symlink():
+            link.unlink()
+        os.symlink(target.name, link)
+        os.replace(link, self.directory / CURRENT)
+        self._prune(target)
+
+    def _prune(self, current: Path) -> None:
+        versions = sorted(
+            (path for path in self.directory.glob(VERSION_PREFIX + "*") if path != current),
+            key=lambda path: path.stat().st_mtime, reverse=True,
+        )
+        # Older versions stay around briefly for requests already reading them
+        for path in versions[self.keep - 1:]:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+async def _main(directory: Optional[str]) -> int:
+    import server
+
+    directory = directory or os.environ.get('SNAPSHOT_DIR')
+    if not directory:
+        print("Set SNAPSHOT_DIR or pass --dir")
+        return 2
+    try:
+        version = await SnapshotPublisher(Path(directory), server.snapshot_files).publish()
+        print(f"{directory}/{CURRENT} -> {VERSION_PREFIX}{version}")
+        return 0
+    finally:
+        await server.storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["publish"])
+    parser.add_argument("--dir", help="snapshot directory (default: SNAPSHOT_DIR)")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.dir)))
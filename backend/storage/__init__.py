@@ -0,0 +1,34 @@
+"""Storage backends for projects, contact messages and site config
+
+``STORAGE_BACKEND`` picks one: ``mongo`` (default, Motor), ``sqlite`` (a
+local file, e.g. a read-heavy edge replica) or ``memory`` (tests and demos).
+"""
+
+import os
+from typing import Mapping, Optional
+
+from storage.base import ContactRepository, ProjectRepository, SiteConfigRepository, Storage
+from storage.memory import MemoryStorage
+from storage.mongo import MongoStorage
+from storage.sqlite import SQLiteStorage
+
+BACKENDS = ("mongo", "sqlite", "memory")
+
+
+def open_storage(environ: Mapping[str, str] = os.environ, default_sqlite_path: Optional[str] = None,
+                 **mongo_options) -> Storage:
+    """Storage selected by ``STORAGE_BACKEND``; ``mongo_options`` go to the Motor client"""
+    backend = environ.get('STORAGE_BACKEND', 'mongo').lower()
+    if backend == "mongo":
+        return MongoStorage.connect(environ['MONGO_URL'], environ['DB_NAME'], **mongo_options)
+    if backend == "sqlite":
+        return SQLiteStorage(environ.get('SQLITE_PATH') or default_sqlite_path or "portfolio.sqlite3")
+    if backend == "memory":
+        return MemoryStorage()
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+
+__all__ = [
+    "BACKENDS", "ContactRepository", "MemoryStorage", "MongoStorage", "ProjectRepository",
+    "SQLiteStorage", "SiteConfigRepository", "Storage", "open_storage",
+]
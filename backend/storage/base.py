@@ -0,0 +1,141 @@
+"""Repository interface shared by every storage backend
+
+Documents are plain dicts shaped like the API models, with datetimes as
+``datetime`` objects; backend-specific keys such as Mongo's ``_id`` never
+leave the repository.
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+Document = Dict[str, Any]
+# ``(created_at, id)`` of the last row already returned, in KEYSET_SORT order
+KeysetPosition = Tuple[datetime, str]
+# One bulk project write: ("insert", document), ("replace", document) upserting by id, or ("delete", id)
+ProjectWrite = Tuple[str, Any]
+# Outcome of one ProjectWrite: "created", "updated", "deleted" or "failed" (with the error)
+WriteResult = Tuple[str, Optional[str]]
+
+
+def select(document: Document, fields: Optional[Sequence[str]]) -> Document:
+    """``document`` reduced to ``fields`` (all of it when None), without backend keys"""
+    if fields is None:
+        return {key: value for key, value in document.items() if key != "_id"}
+    return {name: document[name] for name in fields if name in document}
+
+
+class ProjectRepository(ABC):
+    @abstractmethod
+    async def count(self) -> int: ...
+
+    @abstractmethod
+    async def insert_many(self, documents: List[Document]) -> None: ...
+
+    @abstractmethod
+    async def insert_missing(self, documents: List[Document]) -> int:
+        """Insert the documents whose ``id`` is not stored yet, leaving the others untouched; returns how many
+        were inserted. Concurrent callers with the same documents never store one twice."""
+
+    @abstractmethod
+    async def list(self, category: Optional[str] = None, after: Optional[KeysetPosition] = None,
+                   limit: Optional[int] = None, fields: Optional[Sequence[str]] = None) -> List[Document]:
+        """Projects newest first (``KEYSET_SORT``), starting after ``after`` when given"""
+
+    @abstractmethod
+    async def get(self, project_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Document]: ...
+
+    @abstractmethod
+    async def categories(self) -> List[str]:
+        """Distinct project categories, sorted"""
+
+    @abstractmethod
+    async def bulk_write(self, writes: List[ProjectWrite]) -> List[WriteResult]:
+        """Apply ``writes`` unordered, so one failure does not hold back the rest; one result per write.
+
+        A replace without ``created_at`` keeps the stored one (the current time when it creates the
+        project), and ``created_at`` is set on the written document so it can be indexed as stored.
+        """
+
+    @abstractmethod
+    async def bump_version(self) -> int:
+        """Count one more committed write to the projects and stamp its time; returns the new count"""
+
+    @abstractmethod
+    async def version(self) -> int:
+        """Writes counted by ``bump_version`` so far, by every process sharing this storage"""
+
+    @abstractmethod
+    async def modified(self) -> Optional[datetime]:
+        """When ``bump_version`` last counted a write (deletes included), None before the first"""
+
+    @abstractmethod
+    def export(self, since: Optional[datetime]) -> AsyncIterator[Document]:
+        """Every project oldest first, from ``since`` inclusive"""
+
+
+class ContactRepository(ABC):
+    @abstractmethod
+    async def count(self) -> int: ...
+
+    @abstractmethod
+    async def insert_one(self, document: Document) -> None: ...
+
+    @abstractmethod
+    async def insert_many(self, documents: List[Document]) -> None: ...
+
+    @abstractmethod
+    async def list(self, status: Optional[str] = None, after: Optional[KeysetPosition] = None,
+                   limit: Optional[int] = None, fields: Optional[Sequence[str]] = None) -> List[Document]:
+        """Messages newest first (``KEYSET_SORT``), starting after ``after`` when given"""
+
+    @abstractmethod
+    async def get(self, message_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Document]: ...
+
+    @abstractmethod
+    async def set_status(self, message_ids: Sequence[str], status: str, from_statuses: Sequence[str]) -> int:
+        """Move the listed messages that are in one of ``from_statuses`` to ``status``; returns how many moved"""
+
+    @abstractmethod
+    def export(self, since: Optional[datetime]) -> AsyncIterator[Document]:
+        """Every message oldest first, from ``since`` inclusive"""
+
+
+class SiteConfigRepository(ABC):
+    @abstractmethod
+    async def count(self) -> int: ...
+
+    @abstractmethod
+    async def get(self, fields: Optional[Sequence[str]] = None) -> Optional[Document]: ...
+
+    @abstractmethod
+    async def insert_one(self, document: Document) -> None: ...
+
+    @abstractmethod
+    async def insert_missing(self, document: Document) -> bool:
+        """Insert ``document`` unless its ``id`` is stored already; True when it was inserted"""
+
+
+class Storage(ABC):
+    name: str
+    projects: ProjectRepository
+    contact_messages: ContactRepository
+    site_config: SiteConfigRepository
+
+    async def ensure_indexes(self) -> Dict[str, List[str]]:
+        """Create any missing indexes; returns the index names per collection"""
+        return {}
+
+    async def ping(self) -> None:
+        """One round trip to the backend, opening a connection if none is open yet"""
+
+    async def explain_hot_queries(self) -> List[Dict[str, Any]]:
+        """Query plans of the hot queries, in the shape of ``indexes.explain_hot_queries``"""
+        return []
+
+    def watch(self, collections: Sequence[str]):
+        """Async context manager yielding Mongo-style change events for ``collections``"""
+        raise NotImplementedError(f"{self.name} storage has no change stream")
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,188 @@
+"""Pure in-memory storage: nothing persists past the process"""
+
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from storage.base import (
+    ContactRepository, Document, KeysetPosition, ProjectRepository, ProjectWrite, SiteConfigRepository, Storage,
+    WriteResult, select,
+)
+
+
+def _keyset(document: Document) -> Tuple[datetime, str]:
+    return document["created_at"], document["id"]
+
+
+class _OrderedDocuments:
+    """Documents by id plus a lazily rebuilt ``(created_at, id)`` ascending order"""
+
+    def __init__(self):
+        self.by_id: Dict[str, Document] = {}
+        self._ordered: Optional[List[Document]] = None
+        self._keys: List[Tuple[datetime, str]] = []
+
+    def add(self, document: Document) -> None:
+        document = select(document, None)
+        self.by_id[document["id"]] = document
+        self._ordered = None
+
+    def remove(self, document_id: str) -> None:
+        if self.by_id.pop(document_id, None) is not None:
+            self._ordered = None
+
+    def ordered(self) -> Tuple[List[Document], List[Tuple[datetime, str]]]:
+        if self._ordered is None:
+            self._ordered = sorted(self.by_id.values(), key=_keyset)
+            self._keys = [_keyset(document) for document in self._ordered]
+        return self._ordered, self._keys
+
+    def newest(self, after: Optional[KeysetPosition], limit: Optional[int], fields: Optional[Sequence[str]],
+               **equal) -> List[Document]:
+        """Documents newest first whose ``equal`` fields match, starting after ``after``"""
+        ordered, keys = self.ordered()
+        # Newest first is the ascending order walked backwards from the keyset position
+        end = bisect_left(keys, after) if after else len(ordered)
+        rows = []
+        for index in range(end - 1, -1, -1):
+            document = ordered[index]
+            if any(document.get(name) != value for name, value in equal.items()):
+                continue
+            rows.append(select(document, fields))
+            if limit and len(rows) >= limit:
+                break
+        return rows
+
+    async def export(self, since: Optional[datetime]):
+        ordered, keys = self.ordered()
+        start = bisect_left(keys, (since, "")) if since else 0
+        for document in ordered[start:]:
+            yield dict(document)
+
+
+class MemoryProjects(ProjectRepository):
+    def __init__(self):
+        self._documents = _OrderedDocuments()
+        self._version = 0
+        self._modified: Optional[datetime] = None
+
+    async def count(self) -> int:
+        return len(self._documents.by_id)
+
+    async def insert_many(self, documents: List[Document]) -> None:
+        for document in documents:
+            self._documents.add(document)
+
+    async def insert_missing(self, documents: List[Document]) -> int:
+        missing = [document for document in documents if document["id"] not in self._documents.by_id]
+        await self.insert_many(missing)
+        return len(missing)
+
+    async def list(self, category: Optional[str] = None, after: Optional[KeysetPosition] = None,
+                   limit: Optional[int] = None, fields: Optional[Sequence[str]] = None) -> List[Document]:
+        return self._documents.newest(after, limit, fields, **({"category": category} if category else {}))
+
+    async def get(self, project_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Document]:
+        document = self._documents.by_id.get(project_id)
+        return select(document, fields) if document else None
+
+    async def categories(self) -> List[str]:
+        return sorted({document["category"] for document in self._documents.by_id.values()})
+
+    async def bulk_write(self, writes: List[ProjectWrite]) -> List[WriteResult]:
+        results = []
+        for operation, value in writes:
+            if operation == "delete":
+                if value in self._documents.by_id:
+                    self._documents.remove(value)
+                    results.append(("deleted", None))
+                else:
+                    results.append(("failed", f"project {value} not found"))
+            elif operation == "insert" and value["id"] in self._documents.by_id:
+                results.append(("failed", f"duplicate project id {value['id']}"))
+            else:
+                existing = self._documents.by_id.get(value["id"])
+                if "created_at" not in value:
+                    value["created_at"] = existing["created_at"] if existing else datetime.utcnow()
+                existed = existing is not None
+                self._documents.add(value)
+                results.append(("updated" if existed else "created", None))
+        return results
+
+    async def bump_version(self) -> int:
+        self._version += 1
+        self._modified = datetime.utcnow()
+        return self._version
+
+    async def version(self) -> int:
+        return self._version
+
+    async def modified(self) -> Optional[datetime]:
+        return self._modified
+
+    def export(self, since: Optional[datetime]):
+        return self._documents.export(since)
+
+
+class MemoryContacts(ContactRepository):
+    def __init__(self):
+        self._documents = _OrderedDocuments()
+
+    async def count(self) -> int:
+        return len(self._documents.by_id)
+
+    async def insert_one(self, document: Document) -> None:
+        self._documents.add(document)
+
+    async def insert_many(self, documents: List[Document]) -> None:
+        for document in documents:
+            self._documents.add(document)
+
+    async def list(self, status: Optional[str] = None, after: Optional[KeysetPosition] = None,
+                   limit: Optional[int] = None, fields: Optional[Sequence[str]] = None) -> List[Document]:
+        return self._documents.newest(after, limit, fields, **({"status": status} if status else {}))
+
+    async def get(self, message_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Document]:
+        document = self._documents.by_id.get(message_id)
+        return select(document, fields) if document else None
+
+    async def set_status(self, message_ids: Sequence[str], status: str, from_statuses: Sequence[str]) -> int:
+        moved = 0
+        for message_id in set(message_ids):
+            document = self._documents.by_id.get(message_id)
+            if document and document.get("status") in from_statuses:
+                document["status"] = status
+                moved += 1
+        return moved
+
+    def export(self, since: Optional[datetime]):
+        return self._documents.export(since)
+
+
+class MemorySiteConfig(SiteConfigRepository):
+    def __init__(self):
+        self._documents: List[Document] = []
+
+    async def count(self) -> int:
+        return len(self._documents)
+
+    async def get(self, fields: Optional[Sequence[str]] = None) -> Optional[Document]:
+        return select(self._documents[0], fields) if self._documents else None
+
+    async def insert_one(self, document: Document) -> None:
+        self._documents.append(select(document, None))
+
+    async def insert_missing(self, document: Document) -> bool:
+        if any(stored["id"] == document["id"] for stored in self._documents):
+            return False
+        await self.insert_one(document)
+        return True
+
+
+class MemoryStorage(Storage):
+    name = "memory"
+
+    def __init__(self):
+        self.projects = MemoryProjects()
+        self.contact_messages = MemoryContacts()
+        self.site_config = MemorySiteConfig()
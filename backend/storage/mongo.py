@@ -0,0 +1,225 @@
+"""MongoDB storage through Motor"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from export import export_cursor
+from fieldsets import projection
+from indexes import ensure_indexes, explain_hot_queries
+from pagination import KEYSET_SORT, keyset_filter
+from storage.base import (
+    ContactRepository, Document, KeysetPosition, ProjectRepository, ProjectWrite, SiteConfigRepository, Storage,
+    WriteResult,
+)
+
+
+DUPLICATE_KEY = 11000
+
+
+def _projection(fields: Optional[Sequence[str]]) -> Dict[str, int]:
+    return projection(fields) if fields is not None else {"_id": 0}
+
+
+async def _newest(collection, query: Dict[str, Any], after: Optional[KeysetPosition], limit: Optional[int],
+                  fields: Optional[Sequence[str]]) -> List[Document]:
+    if after:
+        query = keyset_filter(query, after)
+    cursor = collection.find(query, _projection(fields)).sort(KEYSET_SORT)
+    if limit:
+        cursor = cursor.limit(limit)
+    return await cursor.to_list(None)
+
+
+class MongoProjects(ProjectRepository):
+    def __init__(self, collection, counters):
+        self.collection = collection
+        self.counters = counters
+
+    async def count(self) -> int:
+        return await self.collection.count_documents({})
+
+    async def insert_many(self, documents: List[Document]) -> None:
+        await self.collection.insert_many(documents)
+
+    async def insert_missing(self, documents: List[Document]) -> int:
+        if not documents:
+            return 0
+        operations = [UpdateOne({"id": d["id"]}, {"$setOnInsert": dict(d)}, upsert=True) for d in documents]
+        try:
+            return (await self.collection.bulk_write(operations, ordered=False)).upserted_count
+        except BulkWriteError as e:
+            # Two upserts of one id racing each other: the unique index lets one insert and fails the other
+            if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+                raise
+            return len(e.details["upserted"])
+
+    async def list(self, category: Optional[str] = None, after: Optional[KeysetPosition] = None,
+                   limit: Optional[int] = None, fields: Optional[Sequence[str]] = None) -> List[Document]:
+        return await _newest(self.collection, {"category": category} if category else {}, after, limit, fields)
+
+    async def get(self, project_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Document]:
+        return await self.collection.find_one({"id": project_id}, _projection(fields))
+
+    async def categories(self) -> List[str]:
+        return sorted(await self.collection.distinct("category"))
+
+    async def bulk_write(self, writes: List[ProjectWrite]) -> List[WriteResult]:
+        # Stored created_at of the replaces keeping it, and which deletes have a project to delete
+        lookup = [value["id"] for operation, value in writes if operation == "replace" and "created_at" not in value]
+        lookup += [value for operation, value in writes if operation == "delete"]
+        stored_created = {}
+        if lookup:
+            cursor = self.collection.find({"id": {"$in": lookup}}, {"_id": 0, "id": 1, "created_at": 1})
+            stored_created = {document["id"]: document["created_at"] async for document in cursor}
+        operations, positions, missing = [], [], set()
+        for position, (operation, value) in enumerate(writes):
+            if operation == "insert":
+                operations.append(InsertOne(dict(value)))
+            elif operation == "replace" and "created_at" in value:
+                operations.append(ReplaceOne({"id": value["id"]}, dict(value), upsert=True))
+            elif operation == "replace":
+                # $setOnInsert keeps the stored created_at even if the project changed since it was read
+                value["created_at"] = stored_created.get(value["id"]) or datetime.utcnow()
+                fields = {name: field for name, field in value.items() if name != "created_at"}
+                operations.append(UpdateOne({"id": value["id"]},
+                                            {"$set": fields, "$setOnInsert": {"created_at": value["created_at"]}},
+                                            upsert=True))
+            elif value in stored_created:
+                operations.append(DeleteOne({"id": value}))
+            else:
+                missing.add(position)
+                continue
+            positions.append(position)
+        errors, upserted = {}, set()
+        if operations:
+            try:
+                result = await self.collection.bulk_write(operations, ordered=False)
+                upserted = set(result.upserted_ids)
+            except BulkWriteError as e:
+                errors = {error["index"]: error["errmsg"] for error in e.details["writeErrors"]}
+                upserted = {entry["index"] for entry in e.details["upserted"]}
+        # Operation indexes back to write positions
+        errors = {positions[index]: error for index, error in errors.items()}
+        upserted = {positions[index] for index in upserted}
+        results = []
+        for index, (operation, value) in enumerate(writes):
+            if index in missing:
+                results.append(("failed", f"project {value} not found"))
+            elif index in errors:
+                results.append(("failed", errors[index]))
+            elif operation == "replace":
+                results.append(("created" if index in upserted else "updated", None))
+            else:
+                results.append(("created" if operation == "insert" else "deleted", None))
+        return results
+
+    async def bump_version(self) -> int:
+        counter = await self.counters.find_one_and_update(
+            {"_id": "projects"}, {"$inc": {"version": 1}, "$set": {"modified": datetime.utcnow()}},
+            upsert=True, return_document=ReturnDocument.AFTER,
+        )
+        return counter["version"]
+
+    async def version(self) -> int:
+        counter = await self.counters.find_one({"_id": "projects"})
+        return counter["version"] if counter else 0
+
+    async def modified(self) -> Optional[datetime]:
+        counter = await self.counters.find_one({"_id": "projects"})
+        return counter.get("modified") if counter else None
+
+    def export(self, since: Optional[datetime]):
+        return export_cursor(self.collection, since)
+
+
+class MongoContacts(ContactRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def count(self) -> int:
+        return await self.collection.count_documents({})
+
+    async def insert_one(self, document: Document) -> None:
+        await self.collection.insert_one(document)
+
+    async def insert_many(self, documents: List[Document]) -> None:
+        # Unordered, so one bad document does not hold back the rest of a batch
+        await self.collection.insert_many(documents, ordered=False)
+
+    async def list(self, status: Optional[str] = None, after: Optional[KeysetPosition] = None,
+                   limit: Optional[int] = None, fields: Optional[Sequence[str]] = None) -> List[Document]:
+        return await _newest(self.collection, {"status": status} if status else {}, after, limit, fields)
+
+    async def get(self, message_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Document]:
+        return await self.collection.find_one({"id": message_id}, _projection(fields))
+
+    async def set_status(self, message_ids: Sequence[str], status: str, from_statuses: Sequence[str]) -> int:
+        result = await self.collection.update_many(
+            {"id": {"$in": list(message_ids)}, "status": {"$in": list(from_statuses)}},
+            {"$set": {"status": status}},
+        )
+        return result.modified_count
+
+    def export(self, since: Optional[datetime]):
+        return export_cursor(self.collection, since)
+
+
+class MongoSiteConfig(SiteConfigRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def count(self) -> int:
+        return await self.collection.count_documents({})
+
+    async def get(self, fields: Optional[Sequence[str]] = None) -> Optional[Document]:
+        return await self.collection.find_one({}, _projection(fields))
+
+    async def insert_one(self, document: Document) -> None:
+        await self.collection.insert_one(document)
+
+    async def insert_missing(self, document: Document) -> bool:
+        try:
+            result = await self.collection.update_one(
+                {"id": document["id"]}, {"$setOnInsert": dict(document)}, upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return result.upserted_id is not None
+
+
+class MongoStorage(Storage):
+    name = "mongo"
+
+    def __init__(self, db, client: Optional[AsyncIOMotorClient] = None):
+        self.db = db
+        self.client = client
+        self.projects = MongoProjects(db.projects, db.counters)
+        self.contact_messages = MongoContacts(db.contact_messages)
+        self.site_config = MongoSiteConfig(db.site_config)
+
+    @classmethod
+    def connect(cls, url: str, db_name: str, **client_options) -> "MongoStorage":
+        client = AsyncIOMotorClient(url, **client_options)
+        return cls(client[db_name], client)
+
+    async def ensure_indexes(self) -> Dict[str, List[str]]:
+        return await ensure_indexes(self.db)
+
+    async def ping(self) -> None:
+        await self.db.command("ping")
+
+    async def explain_hot_queries(self) -> List[Dict[str, Any]]:
+        return await explain_hot_queries(self.db)
+
+    def watch(self, collections: Sequence[str]):
+        """Needs a replica set"""
+        pipeline = [{"$match": {"ns.coll": {"$in": list(collections)}}}]
+        return self.db.watch(pipeline, full_document="updateLookup")
+
+    async def close(self) -> None:
+        if self.client:
+            self.client.close()
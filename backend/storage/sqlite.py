@@ -0,0 +1,378 @@
+"""SQLite storage for single-node and read-only edge deployments
+
+Each row keeps the columns the hot queries filter and sort on next to the
+whole document as JSON. The stdlib driver is blocking, so every statement
+runs on one dedicated thread that owns the connection.
+"""
+
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+from export import EXPORT_BATCH_SIZE
+from storage.base import (
+    ContactRepository, Document, KeysetPosition, ProjectRepository, ProjectWrite, SiteConfigRepository, Storage,
+    WriteResult, select,
+)
+
+TABLES = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    document TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contact_messages (
+    id TEXT PRIMARY KEY,
+    status TEXT,
+    created_at TEXT NOT NULL,
+    document TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS site_config (
+    id TEXT PRIMARY KEY,
+    document TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# table -> index name -> columns, mirroring indexes.INDEX_SPECS
+INDEXES: Dict[str, Dict[str, str]] = {
+    "projects": {
+        "projects_category_created_at": "category, created_at DESC, id DESC",
+        "projects_created_at": "created_at DESC, id DESC",
+    },
+    "contact_messages": {
+        "contact_messages_created_at": "created_at, id",
+        "contact_messages_status_created_at": "status, created_at DESC, id DESC",
+    },
+}
+
+# Same names as indexes.HOT_QUERIES
+HOT_QUERIES: Dict[str, Tuple[str, str]] = {
+    "get_project": ("projects", "SELECT document FROM projects WHERE id = '__probe__'"),
+    "get_projects": ("projects", "SELECT document FROM projects ORDER BY created_at DESC, id DESC LIMIT 25"),
+    "get_projects_by_category": (
+        "projects",
+        "SELECT document FROM projects WHERE category = '__probe__' ORDER BY created_at DESC, id DESC LIMIT 25",
+    ),
+    "get_categories": ("projects", "SELECT DISTINCT category FROM projects"),
+    "contact_by_created_at": (
+        "contact_messages", "SELECT document FROM contact_messages ORDER BY created_at DESC, id DESC LIMIT 25",
+    ),
+    "contact_by_status": (
+        "contact_messages",
+        "SELECT document FROM contact_messages WHERE status = 'new' ORDER BY created_at DESC, id DESC LIMIT 25",
+    ),
+}
+
+DATETIME_FIELDS = ("created_at", "updated_at")
+# ``counters`` keeps the time of the last projects write as microseconds since EPOCH
+EPOCH = datetime(1970, 1, 1)
+# Stays under SQLite's bound parameter limit
+MAX_IDS_PER_STATEMENT = 500
+
+
+def _timestamp(value: datetime) -> str:
+    """Fixed-width UTC ISO text, so string order is time order"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="microseconds")
+
+
+def _dumps(document: Document) -> str:
+    return orjson.dumps(select(document, None)).decode("utf-8")
+
+
+def _loads(raw: str, fields: Optional[Sequence[str]] = None) -> Document:
+    document = select(orjson.loads(raw), fields)
+    for name in DATETIME_FIELDS:
+        if isinstance(document.get(name), str):
+            document[name] = datetime.fromisoformat(document[name])
+    return document
+
+
+def _project_row(document: Document) -> Tuple[str, str, str, str]:
+    return document["id"], document["category"], _timestamp(document["created_at"]), _dumps(document)
+
+
+class SQLiteStorage(Storage):
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._connection: Optional[sqlite3.Connection] = None
+        self.projects = SQLiteProjects(self)
+        self.contact_messages = SQLiteContacts(self)
+        self.site_config = SQLiteSiteConfig(self)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(TABLES)
+            self._connection = connection
+        return self._connection
+
+    async def run(self, work: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run ``work(connection)`` on the connection's thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: work(self._connect()))
+
+    async def fetch(self, sql: str, parameters: Sequence[Any] = ()) -> List[tuple]:
+        return await self.run(lambda connection: connection.execute(sql, parameters).fetchall())
+
+    async def write(self, sql: str, rows: List[Sequence[Any]]) -> None:
+        def work(connection):
+            with connection:
+                connection.executemany(sql, rows)
+        await self.run(work)
+
+    async def newest(self, table: str, column: str, value: Optional[str], after: Optional[KeysetPosition],
+                     limit: Optional[int], fields: Optional[Sequence[str]]) -> List[Document]:
+        """Rows newest first, where ``column`` equals ``value`` when given, starting after ``after``"""
+        conditions, parameters = [], []
+        if value:
+            conditions.append(f"{column} = ?")
+            parameters.append(value)
+        if after:
+            conditions.append("(created_at, id) < (?, ?)")
+            parameters.extend((_timestamp(after[0]), after[1]))
+        sql = f"SELECT document FROM {table}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return [_loads(raw, fields) for (raw,) in await self.fetch(sql, parameters)]
+
+    async def export(self, table: str, since: Optional[datetime], fields: Optional[Sequence[str]] = None):
+        """Oldest first in batches, each batch keyset-paginated after the previous one"""
+        position = (_timestamp(since), "") if since else ("", "")
+        while True:
+            rows = await self.fetch(
+                f"SELECT created_at, id, document FROM {table} WHERE (created_at, id) > (?, ?) "
+                f"ORDER BY created_at, id LIMIT ?",
+                (*position, EXPORT_BATCH_SIZE),
+            )
+            for _, _, raw in rows:
+                yield _loads(raw, fields)
+            if len(rows) < EXPORT_BATCH_SIZE:
+                return
+            position = rows[-1][:2]
+
+    async def ensure_indexes(self) -> Dict[str, List[str]]:
+        def work(connection):
+            with connection:
+                for table, indexes in INDEXES.items():
+                    for name, columns in indexes.items():
+                        connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        await self.run(work)
+        return {table: list(indexes) for table, indexes in INDEXES.items()}
+
+    async def ping(self) -> None:
+        await self.fetch("SELECT 1")
+
+    async def explain_hot_queries(self) -> List[Dict[str, Any]]:
+        report = []
+        for name, (table, sql) in HOT_QUERIES.items():
+            plan = await self.fetch(f"EXPLAIN QUERY PLAN {sql}")
+            stages = [row[3] for row in plan]
+            report.append({
+                "query": name,
+                "collection": table,
+                "stages": stages,
+                # "SCAN projects USING INDEX ..." walks an index in order; a bare SCAN reads the table
+                "collscan": any(stage == f"SCAN {table}" for stage in stages),
+            })
+        return report
+
+    async def close(self) -> None:
+        def work():
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+        await asyncio.get_running_loop().run_in_executor(self._executor, work)
+        self._executor.shutdown(wait=False)
+
+
+class SQLiteProjects(ProjectRepository):
+    def __init__(self, storage: SQLiteStorage):
+        self.storage = storage
+
+    async def count(self) -> int:
+        return (await self.storage.fetch("SELECT COUNT(*) FROM projects"))[0][0]
+
+    async def insert_many(self, documents: List[Document]) -> None:
+        await self.storage.write(
+            "INSERT INTO projects (id, category, created_at, document) VALUES (?, ?, ?, ?)",
+            [_project_row(d) for d in documents],
+        )
+
+    async def insert_missing(self, documents: List[Document]) -> int:
+        def work(connection):
+            with connection:
+                return connection.executemany(
+                    "INSERT OR IGNORE INTO projects (id, category, created_at, document) VALUES (?, ?, ?, ?)",
+                    [_project_row(d) for d in documents],
+                ).rowcount
+        return max(await self.storage.run(work), 0) if documents else 0
+
+    async def list(self, category: Optional[str] = None, after: Optional[KeysetPosition] = None,
+                   limit: Optional[int] = None, fields: Optional[Sequence[str]] = None) -> List[Document]:
+        return await self.storage.newest("projects", "category", category, after, limit, fields)
+
+    async def get(self, project_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Document]:
+        rows = await self.storage.fetch("SELECT document FROM projects WHERE id = ?", (project_id,))
+        return _loads(rows[0][0], fields) if rows else None
+
+    async def categories(self) -> List[str]:
+        rows = await self.storage.fetch("SELECT DISTINCT category FROM projects ORDER BY category")
+        return [category for (category,) in rows]
+
+    async def bulk_write(self, writes: List[ProjectWrite]) -> List[WriteResult]:
+        def work(connection):
+            results = []
+            # One transaction; a failed statement is reported and the rest still commit
+            with connection:
+                for operation, value in writes:
+                    try:
+                        if operation == "delete":
+                            if connection.execute("DELETE FROM projects WHERE id = ?", (value,)).rowcount:
+                                results.append(("deleted", None))
+                            else:
+                                results.append(("failed", f"project {value} not found"))
+                        elif operation == "insert":
+                            connection.execute(
+                                "INSERT INTO projects (id, category, created_at, document) VALUES (?, ?, ?, ?)",
+                                _project_row(value),
+                            )
+                            results.append(("created", None))
+                        elif "created_at" in value:
+                            existed = connection.execute("SELECT 1 FROM projects WHERE id = ?", (value["id"],)).fetchone()
+                            connection.execute(
+                                "INSERT OR REPLACE INTO projects (id, category, created_at, document) VALUES (?, ?, ?, ?)",
+                                _project_row(value),
+                            )
+                            results.append(("updated" if existed else "created", None))
+                        else:
+                            existed = connection.execute("SELECT 1 FROM projects WHERE id = ?", (value["id"],)).fetchone()
+                            # The stored created_at survives the replace, in the column and in the document
+                            (created_at,) = connection.execute(
+                                "INSERT INTO projects (id, category, created_at, document) VALUES (?, ?, ?, ?) "
+                                "ON CONFLICT (id) DO UPDATE SET category = excluded.category, document = "
+                                "json_set(excluded.document, '$.created_at', json_extract(projects.document, '$.created_at')) "
+                                "RETURNING created_at",
+                                _project_row(dict(value, created_at=datetime.utcnow())),
+                            ).fetchone()
+                            value["created_at"] = datetime.fromisoformat(created_at)
+                            results.append(("updated" if existed else "created", None))
+                    except sqlite3.Error as e:
+                        results.append(("failed", str(e)))
+            return results
+        return await self.storage.run(work)
+
+    async def bump_version(self) -> int:
+        def work(connection):
+            with connection:
+                connection.execute(
+                    "INSERT INTO counters (name, value) VALUES ('projects_modified', ?) "
+                    "ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+                    ((datetime.utcnow() - EPOCH) // timedelta(microseconds=1),),
+                )
+                return connection.execute(
+                    "INSERT INTO counters (name, value) VALUES ('projects', 1) "
+                    "ON CONFLICT (name) DO UPDATE SET value = value + 1 RETURNING value"
+                ).fetchone()[0]
+        return await self.storage.run(work)
+
+    async def version(self) -> int:
+        rows = await self.storage.fetch("SELECT value FROM counters WHERE name = 'projects'")
+        return rows[0][0] if rows else 0
+
+    async def modified(self) -> Optional[datetime]:
+        rows = await self.storage.fetch("SELECT value FROM counters WHERE name = 'projects_modified'")
+        return EPOCH + timedelta(microseconds=rows[0][0]) if rows else None
+
+    def export(self, since: Optional[datetime]):
+        return self.storage.export("projects", since)
+
+
+class SQLiteContacts(ContactRepository):
+    def __init__(self, storage: SQLiteStorage):
+        self.storage = storage
+
+    async def count(self) -> int:
+        return (await self.storage.fetch("SELECT COUNT(*) FROM contact_messages"))[0][0]
+
+    async def insert_one(self, document: Document) -> None:
+        await self.insert_many([document])
+
+    async def insert_many(self, documents: List[Document]) -> None:
+        await self.storage.write(
+            "INSERT INTO contact_messages (id, status, created_at, document) VALUES (?, ?, ?, ?)",
+            [(d["id"], d.get("status"), _timestamp(d["created_at"]), _dumps(d)) for d in documents],
+        )
+
+    async def list(self, status: Optional[str] = None, after: Optional[KeysetPosition] = None,
+                   limit: Optional[int] = None, fields: Optional[Sequence[str]] = None) -> List[Document]:
+        return await self.storage.newest("contact_messages", "status", status, after, limit, fields)
+
+    async def get(self, message_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Document]:
+        rows = await self.storage.fetch("SELECT document FROM contact_messages WHERE id = ?", (message_id,))
+        return _loads(rows[0][0], fields) if rows else None
+
+    async def set_status(self, message_ids: Sequence[str], status: str, from_statuses: Sequence[str]) -> int:
+        ids = list(dict.fromkeys(message_ids))
+        from_marks = ", ".join("?" * len(from_statuses))
+
+        def work(connection):
+            moved = 0
+            with connection:
+                for start in range(0, len(ids), MAX_IDS_PER_STATEMENT):
+                    chunk = ids[start:start + MAX_IDS_PER_STATEMENT]
+                    # The indexed column and the stored document change together
+                    moved += connection.execute(
+                        f"UPDATE contact_messages SET status = ?, document = json_set(document, '$.status', ?) "
+                        f"WHERE status IN ({from_marks}) AND id IN ({', '.join('?' * len(chunk))})",
+                        (status, status, *from_statuses, *chunk),
+                    ).rowcount
+            return moved
+        return await self.storage.run(work)
+
+    def export(self, since: Optional[datetime]):
+        return self.storage.export("contact_messages", since)
+
+
+class SQLiteSiteConfig(SiteConfigRepository):
+    def __init__(self, storage: SQLiteStorage):
+        self.storage = storage
+
+    async def count(self) -> int:
+        return (await self.storage.fetch("SELECT COUNT(*) FROM site_config"))[0][0]
+
+    async def get(self, fields: Optional[Sequence[str]] = None) -> Optional[Document]:
+        rows = await self.storage.fetch("SELECT document FROM site_config LIMIT 1")
+        return _loads(rows[0][0], fields) if rows else None
+
+    async def insert_one(self, document: Document) -> None:
+        await self.storage.write(
+            "INSERT INTO site_config (id, document) VALUES (?, ?)", [(document["id"], _dumps(document))],
+        )
+
+    async def insert_missing(self, document: Document) -> bool:
+        def work(connection):
+            with connection:
+                return connection.execute(
+                    "INSERT OR IGNORE INTO site_config (id, document) VALUES (?, ?)", (document["id"], _dumps(document)),
+                ).rowcount
+        return await self.storage.run(work) == 1
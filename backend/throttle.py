@@ -0,0 +1,83 @@
+"""Per-key token buckets for throttling form submissions"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class TokenBucketLimiter:
+    """One bucket of ``capacity`` tokens per key, refilled at ``refill_per_second``.
+
+    Buckets live in a bounded LRU map: when it is full the least recently seen
+    key is evicted and starts again with a full bucket if it comes back. A
+    ``capacity`` of 0 disables the limiter.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float, maxsize: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.maxsize = maxsize
+        self._clock = clock
+        # key -> (tokens, time they were counted)
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+        self.evictions = 0
+
+    def _wait(self, tokens: float) -> float:
+        if tokens >= 1:
+            return 0.0
+        return (1 - tokens) / self.refill_per_second if self.refill_per_second > 0 else float("inf")
+
+    def _tokens(self, key: Hashable, now: float) -> float:
+        tokens, counted_at = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - counted_at) * self.refill_per_second)
+
+    def peek(self, key: Hashable) -> float:
+        """Seconds until ``key`` has a token, without taking it (0 when one is available now); a wait counts as limited"""
+        if self.capacity <= 0:
+            return 0.0
+        with self._lock:
+            wait = self._wait(self._tokens(key, self._clock()))
+            if wait:
+                self.limited += 1
+            return wait
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token for ``key``: 0 when one was taken, otherwise seconds until one is available"""
+        if self.capacity <= 0:
+            self.allowed += 1
+            return 0.0
+        now = self._clock()
+        with self._lock:
+            tokens = self._tokens(key, now)
+            if tokens >= 1:
+                tokens -= 1
+                self.allowed += 1
+                wait = 0.0
+            else:
+                self.limited += 1
+                wait = self._wait(tokens)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+            return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._buckets),
+            "maxsize": self.maxsize,
+            "capacity": self.capacity,
+            "refill_per_second": self.refill_per_second,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,160 @@
+"""Bounded write-behind queue that batches inserts with insert_many"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class QueueFull(Exception):
+    pass
+
+
+class WriteBehindQueue:
+    """Buffer documents in memory and flush them when ``batch_size`` is reached or
+    ``flush_interval`` seconds after the first buffered document, whichever comes first.
+
+    ``insert_many`` is expected to be unordered, so after a partial failure only the
+    documents it reports as failed are retried. A duplicate key on a retry means an
+    earlier attempt stored the document, which is counted once as written.
+    """
+
+    def __init__(self, collection: Callable[[], Any], max_size: int = 1000,
+                 batch_size: int = 100, flush_interval: float = 0.5, max_retries: int = 3):
+        self._collection = collection
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._batch: List[Dict[str, Any]] = []
+        self._inflight: Optional[asyncio.Future] = None
+        self.enqueued = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting documents and flush everything still queued"""
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._inflight:
+            await self._inflight
+        batch, self._batch = self._batch, []
+        await self._flush(batch)
+        while not self._queue.empty():
+            await self._flush(self._drain(self.batch_size))
+
+    def submit(self, document: Dict[str, Any]) -> None:
+        """Queue ``document`` for writing; raises :class:`QueueFull` when at capacity"""
+        try:
+            self._queue.put_nowait(document)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFull()
+        self.enqueued += 1
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait: roughly one flush window"""
+        return max(1, round(self.flush_interval))
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # The batch being filled lives on self so stop() can flush it
+            self._batch = batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                batch.extend(self._drain(self.batch_size - len(batch)))
+                remaining = deadline - loop.time()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            self._batch = []
+            # Shielded so cancelling the flusher on shutdown cannot abort a write; stop() awaits it
+            self._inflight = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._inflight)
+            self._inflight = None
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        started = time.perf_counter()
+        pending = batch
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                await self._collection().insert_many(pending)
+                self.written += len(pending)
+                pending = []
+            except BulkWriteError as e:
+                failed = {error["index"] for error in e.details["writeErrors"] if error.get("code") != DUPLICATE_KEY}
+                self.written += len(pending) - len(failed)
+                pending = [document for index, document in enumerate(pending) if index in failed]
+                error = e
+            except Exception as e:
+                error = e
+            if not pending:
+                break
+            if attempt == self.max_retries:
+                self.failed += len(pending)
+                logger.error(f"Dropped {len(pending)} queued documents after {attempt} attempts: {error}")
+            else:
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.batches += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "depth": self.depth,
+            "max_size": self.max_size,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.batches, 3) if self.batches else 0.0,
+        }
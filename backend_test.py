@@ -4,14 +4,16 @@ Comprehensive Backend API Testing for Arabic Graphic Designer Portfolio
 Tests all endpoints with Arabic content and validates database operations
 """
 
+import os
 import requests
 import json
 import sys
 from datetime import datetime
 import uuid
 
-# Backend URL from frontend/.env
-BACKEND_URL = "https://6d74dfd7-953f-4a2c-87e3-ae6262e70d0b.preview.emergentagent.com/api"
+# Defaults to a local `uvicorn server:app --port 8001`; point BACKEND_URL at a deployment to smoke-test it.
+# Throughput and latency are measured offline by benchmarks/load_test.py.
+BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:8001/api")
 
 class BackendTester:
     def __init__(self):
@@ -59,7 +61,7 @@ class BackendTester:
     def test_get_all_projects(self):
         """Test GET /api/projects - fetch all projects"""
         try:
-            response = requests.get(f"{BACKEND_URL}/projects")
+            response = requests.get(f"{BACKEND_URL}/projects", params={"legacy": "true"})
             if response.status_code == 200:
                 projects = response.json()
                 if isinstance(projects, list) and len(projects) > 0:
@@ -80,7 +82,7 @@ class BackendTester:
         """Test GET /api/projects?category=الهوية البصرية - filter by Arabic category"""
         try:
             category = "الهوية البصرية"
-            response = requests.get(f"{BACKEND_URL}/projects", params={"category": category})
+            response = requests.get(f"{BACKEND_URL}/projects", params={"category": category, "legacy": "true"})
             if response.status_code == 200:
                 projects = response.json()
                 if isinstance(projects, list):
@@ -108,7 +110,7 @@ class BackendTester:
         """Test GET /api/projects?category=وسائل التواصل - filter by another category"""
         try:
             category = "وسائل التواصل"
-            response = requests.get(f"{BACKEND_URL}/projects", params={"category": category})
+            response = requests.get(f"{BACKEND_URL}/projects", params={"category": category, "legacy": "true"})
             if response.status_code == 200:
                 projects = response.json()
                 if isinstance(projects, list):
@@ -135,7 +137,7 @@ class BackendTester:
         """Test GET /api/projects/{project_id} - get single project"""
         try:
             # First get all projects to get a valid ID
-            response = requests.get(f"{BACKEND_URL}/projects")
+            response = requests.get(f"{BACKEND_URL}/projects", params={"legacy": "true"})
             if response.status_code == 200:
                 projects = response.json()
                 if projects and len(projects) > 0:
@@ -0,0 +1,70 @@
+"""Time-to-data for the first paint: three read calls versus one /api/bootstrap call
+
+Runs the app in process over an ASGI transport against the in-memory Mongo
+stand-in, with simulated client<->API and API<->Mongo round trips.
+
+    python benchmarks/bench_bootstrap.py --rtt-ms 40 --db-ms 2
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from synthetic import make_projects, percentile
+
+import httpx
+
+import server
+from storage import MongoStorage
+from tests.fake_mongo import FakeDatabase
+
+THREE_CALLS = ["/api/config", "/api/categories", "/api/projects"]
+
+
+async def timed(client: httpx.AsyncClient, path: str, rtt: float):
+    await asyncio.sleep(rtt)
+    response = await client.get(path)
+    response.raise_for_status()
+
+
+async def run(rounds: int, rtt: float, cold: bool) -> dict:
+    transport = httpx.ASGITransport(app=server.app)
+    results = {"three_sequential": [], "three_parallel": [], "bootstrap": []}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(rounds):
+            for scenario in results:
+                if cold:
+                    server.read_cache.clear()
+                started = time.perf_counter()
+                if scenario == "three_sequential":
+                    for path in THREE_CALLS:
+                        await timed(client, path, rtt)
+                elif scenario == "three_parallel":
+                    await asyncio.gather(*(timed(client, path, rtt) for path in THREE_CALLS))
+                else:
+                    await timed(client, "/api/bootstrap", rtt)
+                results[scenario].append((time.perf_counter() - started) * 1000)
+    return {
+        scenario: {"p50_ms": round(percentile(samples, 0.5), 2), "p95_ms": round(percentile(samples, 0.95), 2)}
+        for scenario, samples in results.items()
+    }
+
+
+async def main(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    server.storage = MongoStorage(FakeDatabase(latency=args.db_ms / 1000))
+    await server.init_default_data()
+    await server.storage.projects.insert_many(make_projects(args.projects))
+    for cold in (True, False):
+        label = "cold cache" if cold else "warm cache"
+        print(label, await run(args.rounds, args.rtt_ms / 1000, cold))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--rtt-ms", type=float, default=40.0, help="simulated browser <-> API round trip")
+    parser.add_argument("--db-ms", type=float, default=2.0, help="simulated API <-> Mongo round trip")
+    asyncio.run(main(parser.parse_args()))
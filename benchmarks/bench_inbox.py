@@ -0,0 +1,114 @@
+"""Admin inbox latency over a large contact_messages collection
+
+Seeds synthetic messages into the chosen storage, creates the indexes the
+app creates at startup, then times keyset pages (first page and deep in
+the inbox, per status), the same deep page through OFFSET for comparison
+(SQLite only), and one bulk status transition. Page latency should stay
+flat however deep the cursor is.
+
+    python benchmarks/bench_inbox.py --messages 1000000
+    python benchmarks/bench_inbox.py --storage mongo --mongo-url mongodb://localhost:27017
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+
+from synthetic import make_messages, percentile
+
+from storage import MemoryStorage, MongoStorage, SQLiteStorage
+
+SEED_BATCH = 10_000
+STATUSES = (None, "new", "read", "replied")
+
+
+async def timed(work, rounds: int) -> dict:
+    latencies = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await work()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {"p50_ms": round(percentile(latencies, 0.50), 3), "p95_ms": round(percentile(latencies, 0.95), 3)}
+
+
+def make_storage(args, workdir: str):
+    if args.storage == "sqlite":
+        return SQLiteStorage(f"{workdir}/inbox.sqlite3")
+    if args.storage == "memory":
+        return MemoryStorage()
+    return MongoStorage.connect(args.mongo_url, args.db_name)
+
+
+async def bench(args, workdir: str) -> dict:
+    storage = make_storage(args, workdir)
+    inbox = storage.contact_messages
+    if args.storage == "mongo":
+        await storage.db.contact_messages.drop()
+    try:
+        started = time.perf_counter()
+        deep = None
+        for start in range(0, args.messages, SEED_BATCH):
+            batch = make_messages(min(SEED_BATCH, args.messages - start), start=start)
+            await inbox.insert_many(batch)
+            if deep is None and start + len(batch) > args.messages * 9 // 10:
+                # A position 90% of the way down the inbox
+                message = batch[args.messages * 9 // 10 - start]
+                deep = (message["created_at"], message["id"])
+        seed_s = time.perf_counter() - started
+        started = time.perf_counter()
+        await storage.ensure_indexes()
+        index_s = time.perf_counter() - started
+
+        result = {
+            "storage": args.storage,
+            "messages": args.messages,
+            "seed_s": round(seed_s, 1),
+            "ensure_indexes_s": round(index_s, 1),
+            "pages": {},
+        }
+        for status in STATUSES:
+            name = status or "all"
+            result["pages"][name] = {
+                "first": await timed(lambda: inbox.list(status, None, args.page_size + 1), args.rounds),
+                "at_90pct": await timed(lambda: inbox.list(status, deep, args.page_size + 1), args.rounds),
+            }
+
+        if args.storage == "sqlite":
+            offset = args.messages * 9 // 10
+            result["offset_at_90pct"] = await timed(lambda: storage.fetch(
+                "SELECT document FROM contact_messages ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                (args.page_size + 1, offset),
+            ), max(1, args.rounds // 5))
+
+        rng = random.Random(7)
+        unread = [message["id"] for message in await inbox.list("new", limit=args.bulk * 3)]
+        ids = rng.sample(unread, min(args.bulk, len(unread)))
+        started = time.perf_counter()
+        moved = await inbox.set_status(ids, "read", ("new",))
+        result["bulk_status"] = {"ids": len(ids), "moved": moved,
+                                 "ms": round((time.perf_counter() - started) * 1000, 3)}
+
+        plans = await storage.explain_hot_queries()
+        result["collscans"] = [row["query"] for row in plans if row["collscan"]]
+        return result
+    finally:
+        if args.storage == "mongo":
+            await storage.db.contact_messages.drop()
+        await storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--storage", choices=["sqlite", "memory", "mongo"], default="sqlite")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="portfolio_bench")
+    parser.add_argument("--page-size", type=int, default=24)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--bulk", type=int, default=1000, help="messages moved by the bulk status update")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        print(json.dumps(asyncio.run(bench(args, workdir)), ensure_ascii=False, indent=2))
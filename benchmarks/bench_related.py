@@ -0,0 +1,79 @@
+"""Related-projects index build time, memory, lookup and update latency on synthetic projects
+
+    python benchmarks/bench_related.py --sizes 10000 50000 --tags 2000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from synthetic import make_project, make_projects, percentile, tag_vocabulary, tag_weights
+
+from related import RelatedIndex
+
+
+def bench(size: int, rounds: int, measure_memory: bool, tag_count: int) -> dict:
+    tags = tag_vocabulary(tag_count)
+    cum_weights = tag_weights(tags)
+    projects = make_projects(size, tags=tags)
+
+    started = time.perf_counter()
+    index = RelatedIndex.build(projects)
+    build_seconds = time.perf_counter() - started
+
+    peak_mb = None
+    if measure_memory:
+        # NumPy reports its buffers to tracemalloc, so the peak includes the similarity blocks
+        tracemalloc.start()
+        RelatedIndex.build(projects)
+        peak_mb = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+        tracemalloc.stop()
+
+    rng = random.Random(7)
+    lookups = []
+    for _ in range(rounds * 200):
+        project_id = rng.choice(projects)["id"]
+        started = time.perf_counter()
+        index.related(project_id, 6)
+        lookups.append((time.perf_counter() - started) * 1e6)
+
+    def timed_update(count: int) -> float:
+        changed = [dict(rng.choice(projects), tags=list(set(rng.choices(tags, cum_weights=cum_weights, k=3))))
+                   for _ in range(count)]
+        started = time.perf_counter()
+        index.update(changed, [])
+        return (time.perf_counter() - started) * 1000
+
+    single = [timed_update(1) for _ in range(rounds * 4)]
+    batch = [timed_update(500) for _ in range(rounds)]
+    inserts = []
+    for i in range(rounds * 4):
+        project = make_project(rng, size + i, projects[0]["created_at"], tags, cum_weights)
+        started = time.perf_counter()
+        index.update([project])
+        inserts.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "projects": size,
+        "tags": tag_count,
+        "build_s": round(build_seconds, 3),
+        "build_peak_mb": peak_mb,
+        "index_mb": round(index.nbytes / 1e6, 1),
+        "lookup_p50_us": round(percentile(lookups, 0.50), 2),
+        "lookup_p99_us": round(percentile(lookups, 0.99), 2),
+        "update_one_p50_ms": round(percentile(single, 0.50), 3),
+        "insert_one_p50_ms": round(percentile(inserts, 0.50), 3),
+        "update_500_p50_ms": round(percentile(batch, 0.50), 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--tags", type=int, default=2000, help="size of the tag vocabulary")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    args = parser.parse_args()
+    for size in args.sizes:
+        print(bench(size, args.rounds, not args.no_memory, args.tags))
@@ -0,0 +1,72 @@
+"""Search index build time, memory and query latency on synthetic projects
+
+    python benchmarks/bench_search.py --sizes 10000 100000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from synthetic import WORDS, TAGS, make_projects, percentile
+
+from search import SearchIndex
+
+QUERIES = ["هوية", "الهويّة البصرية", "شعار مطعم", "تص", "حملة تسويقية إبداعية", "خطوط عربية", "مقهى"]
+
+
+def build(projects: list) -> SearchIndex:
+    index = SearchIndex()
+    for project in projects:
+        index.add(project["id"], project, project)
+    return index
+
+
+def bench(size: int, rounds: int, measure_memory: bool) -> dict:
+    projects = make_projects(size)
+
+    started = time.perf_counter()
+    index = build(projects)
+    build_seconds = time.perf_counter() - started
+
+    index_mb = None
+    if measure_memory:
+        # Separate pass: tracemalloc slows allocation-heavy code several times over
+        tracemalloc.start()
+        build(projects)
+        index_mb = round(tracemalloc.get_traced_memory()[0] / 1e6, 1)
+        tracemalloc.stop()
+
+    rng = random.Random(7)
+    queries = QUERIES + [rng.choice(WORDS) + " " + rng.choice(TAGS) for _ in range(20)]
+    latencies = []
+    for _ in range(rounds):
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, limit=20)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    for project in projects[:1000]:
+        index.add(project["id"], project, project)
+    reindex_ms = (time.perf_counter() - started)  # seconds per 1000 == ms per project
+
+    return {
+        "projects": size,
+        "build_s": round(build_seconds, 3),
+        "index_mb": index_mb,
+        "query_p50_ms": round(percentile(latencies, 0.50), 3),
+        "query_p95_ms": round(percentile(latencies, 0.95), 3),
+        "query_p99_ms": round(percentile(latencies, 0.99), 3),
+        "reindex_ms_per_project": round(reindex_ms, 4),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    args = parser.parse_args()
+    for size in args.sizes:
+        print(bench(size, args.rounds, not args.no_memory))
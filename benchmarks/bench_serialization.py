@@ -0,0 +1,86 @@
+"""Requests per second for GET /api/projects: original response path versus the current one
+
+"before" re-creates the original route: whole documents including _id,
+``Project(**doc)`` per row, response_model re-validation and the stdlib JSON
+encoder. "after" is the app's own route (``legacy=true`` for the same
+full-list shape) with the read cache disabled so every request pays for
+fetching and serialization. Exits non-zero when "after" is slower than
+``--min-speedup`` times "before" at any size.
+
+    python benchmarks/bench_serialization.py --sizes 100 1000 10000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from typing import List
+
+from synthetic import make_projects
+
+import httpx
+from fastapi import FastAPI
+
+import server
+from cache import TTLCache
+from storage import MongoStorage
+from tests.fake_mongo import FakeDatabase
+
+
+def original_app(db) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/projects", response_model=List[server.Project])
+    async def get_projects():
+        projects = await db.projects.find({}).sort("created_at", -1).to_list(1000000)
+        return [server.Project(**project) for project in projects]
+
+    return app
+
+
+async def requests_per_second(app, path: str, seconds: float, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    deadline = time.perf_counter() + seconds
+    completed = 0
+
+    async def worker(client):
+        nonlocal completed
+        while time.perf_counter() < deadline:
+            response = await client.get(path)
+            response.raise_for_status()
+            completed += 1
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        return completed / (time.perf_counter() - started)
+
+
+async def main(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    server.read_cache = TTLCache(maxsize=0)
+    regressions = []
+    for size in args.sizes:
+        db = FakeDatabase()
+        await db.projects.insert_many(make_projects(size))
+        server.storage = MongoStorage(db)
+        before_app = original_app(db)
+        before = await requests_per_second(before_app, "/api/projects", args.seconds, args.concurrency)
+        after = await requests_per_second(server.app, "/api/projects?legacy=true", args.seconds, args.concurrency)
+        print({"projects": size, "before_rps": round(before, 1), "after_rps": round(after, 1),
+               "speedup": round(after / before, 2)})
+        if after < before * args.min_speedup:
+            regressions.append(size)
+    if regressions:
+        print(f"Slower than {args.min_speedup}x the original route at sizes {regressions}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--min-speedup", type=float, default=1.0)
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,220 @@
+"""Local load test: throughput, latency percentiles and allocations per endpoint
+
+Boots ``server.app`` in process over an ASGI transport, backed by the
+in-memory Mongo stand-in (or the SQLite / memory storage with ``--storage``)
+seeded with synthetic Arabic projects, so it needs neither a network nor a
+database server. Results are written as JSON for comparing
+runs; ``--baseline`` prints the change against an earlier result file.
+
+    python benchmarks/load_test.py --projects 1000 --concurrency 16 --output run.json
+    python benchmarks/load_test.py --baseline run.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from synthetic import ROOT_DIR, make_projects, percentile
+
+import httpx
+
+import server
+from cache import TTLCache
+from storage import MemoryStorage, MongoStorage, SQLiteStorage
+from throttle import TokenBucketLimiter
+from tests.fake_mongo import FakeDatabase
+
+CONTACT_BODY = {
+    "name": "أحمد محمد",
+    "email": "ahmed@example.com",
+    "subject": "تصميم الهوية البصرية",
+    "message": "أرغب في تصميم هوية بصرية متكاملة لمطعمي الجديد",
+}
+
+contact_counter = itertools.count()
+
+# name -> (method, path); "{project_id}" is filled with a seeded project
+ENDPOINTS = {
+    "projects_page": ("GET", "/api/projects"),
+    "projects_category": ("GET", "/api/projects?category=مطبوعات"),
+    "projects_legacy": ("GET", "/api/projects?legacy=true"),
+    "projects_fields": ("GET", "/api/projects?fields=title,image,category"),
+    "project_detail": ("GET", "/api/projects/{project_id}"),
+    "project_search": ("GET", "/api/projects/search?q=هوية"),
+    "categories": ("GET", "/api/categories"),
+    "config": ("GET", "/api/config"),
+    "bootstrap": ("GET", "/api/bootstrap"),
+    "contact": ("POST", "/api/contact"),
+}
+
+
+async def send(client: httpx.AsyncClient, method: str, path: str) -> None:
+    if method == "POST":
+        # Distinct messages, so each one is written rather than answered as a duplicate
+        body = dict(CONTACT_BODY, message=f"{CONTACT_BODY['message']} {next(contact_counter)}")
+        response = await client.post(path, json=body)
+    else:
+        response = await client.get(path)
+    response.raise_for_status()
+
+
+async def measure_latency(client, method: str, path: str, requests: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            await send(client, method, path)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "max_ms": round(max(latencies), 3),
+    }
+
+
+async def measure_allocations(client, method: str, path: str, requests: int) -> Dict:
+    """Sequential pass under tracemalloc; kept apart from the timed pass it would slow down"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await send(client, method, path)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_kib_mean": round(sum(peaks) / len(peaks) / 1024, 1),
+        "alloc_peak_kib_max": round(max(peaks) / 1024, 1),
+    }
+
+
+def make_storage(backend: str, workdir: str):
+    if backend == "sqlite":
+        return SQLiteStorage(f"{workdir}/load-test.sqlite3")
+    if backend == "memory":
+        return MemoryStorage()
+    return MongoStorage(FakeDatabase())
+
+
+async def seed(backend: str, projects: int, workdir: str) -> str:
+    server.storage = make_storage(backend, workdir)
+    await server.storage.ensure_indexes()
+    await server.storage.projects.insert_many(make_projects(projects))
+    await server.init_default_data()
+    await server.rebuild_project_indexes()
+    newest = await server.storage.projects.list(limit=1, fields=("id",))
+    return newest[0]["id"]
+
+
+async def run(args, workdir: str) -> Dict:
+    project_id = await seed(args.storage, args.projects, workdir)
+    if args.no_cache:
+        server.read_cache = TTLCache(maxsize=0)
+    # Every request comes from one client address; measure the write path, not the throttle
+    server.contact_limiters = {name: TokenBucketLimiter(0, 0) for name in server.contact_limiters}
+    transport = httpx.ASGITransport(app=server.app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+        for name in args.endpoints:
+            method, path = ENDPOINTS[name]
+            path = path.format(project_id=project_id)
+            for _ in range(args.warmup):
+                await send(client, method, path)
+            result = {"method": method, "path": path}
+            result.update(await measure_latency(client, method, path, args.requests, args.concurrency))
+            if not args.no_memory:
+                result.update(await measure_allocations(client, method, path, args.alloc_requests))
+            results[name] = result
+            print(name, result)
+    await server.storage.close()
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["endpoints"]
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        changes = {
+            metric: f"{(result[metric] - before[metric]) / before[metric] * 100:+.1f}%"
+            for metric in ("rps", "p50_ms", "p95_ms", "p99_ms", "alloc_peak_kib_mean")
+            if before.get(metric) and metric in result
+        }
+        print("vs baseline", name, changes)
+
+
+async def main(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as workdir:
+        results = await run(args, workdir)
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "settings": {
+            "storage": args.storage,
+            "projects": args.projects,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "read_cache": not args.no_cache,
+            "trusted_reads": server.TRUSTED_READS,
+        },
+        "endpoints": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"wrote {args.output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--storage", choices=["mongo", "sqlite", "memory"], default="mongo",
+                        help="mongo runs against the in-memory Mongo stand-in")
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000, help="timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--alloc-requests", type=int, default=50)
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--no-cache", action="store_true", help="disable the read cache")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,95 @@
+"""Synthetic Arabic portfolio data for the benchmarks"""
+
+import itertools
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+for path in (ROOT_DIR, ROOT_DIR / "backend"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+CATEGORIES = ["الهوية البصرية", "وسائل التواصل", "مطبوعات", "تصميم إعلاني", "تغليف", "واجهات"]
+TAGS = [
+    "شعار", "هوية بصرية", "مطبوعات", "انستغرام", "فيسبوك", "تسويق رقمي", "هوية تجارية", "تقنية",
+    "أزياء", "تصوير المنتجات", "تصميم إعلاني", "كتالوج", "تجميل", "مقهى", "تصميم داخلي",
+    "علامة تجارية", "مطعم", "لافتات", "بطاقات عمل", "تغليف", "موشن جرافيك", "رسوم توضيحية",
+    "خطوط عربية", "مجلة", "ملصقات", "عقارات", "تعليم", "رياضة", "سياحة", "صحة",
+]
+WORDS = [
+    "تصميم", "هوية", "بصرية", "متكاملة", "لمطعم", "راقي", "حملة", "تسويقية", "إبداعية", "شركة",
+    "ناشئة", "مجموعة", "منشورات", "جذابة", "أنيق", "عصري", "مقهى", "متجر", "منتجات", "شعار",
+    "مميز", "كتالوج", "تجميل", "طبيعي", "الرياض", "جدة", "معرض", "فعالية", "إطلاق", "علامة",
+]
+CLIENTS = ["مطعم الأصالة", "شركة التسويق الرقمي", "شركة التقنية المتقدمة", "متجر الأناقة",
+           "شركة الجمال الطبيعي", "مقهى الإبداع", "مؤسسة النخبة", "دار الضيافة"]
+
+
+def tag_vocabulary(size: int) -> list:
+    """``size`` distinct tags: ``TAGS`` first, then combinations as a real portfolio grows them"""
+    combined = [f"{first} {second}" for first in TAGS for second in WORDS]
+    numbered = (f"وسم {number}" for number in itertools.count(1))
+    vocabulary = (TAGS + combined)[:size]
+    return vocabulary + list(itertools.islice(numbered, size - len(vocabulary)))
+
+
+def tag_weights(vocabulary: list) -> list:
+    """Cumulative Zipf-like weights: the first tags are on about a tenth of the projects, most on a handful"""
+    return list(itertools.accumulate(1 / (rank + 5) for rank in range(len(vocabulary))))
+
+
+def make_project(rng: random.Random, index: int, base: datetime, tags: list = TAGS,
+                 cum_weights: list = None) -> dict:
+    created_at = base - timedelta(minutes=index)
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "title": " ".join(rng.sample(WORDS, 4)),
+        "description": " ".join(rng.choices(WORDS, k=18)),
+        "category": rng.choice(CATEGORIES),
+        "image": f"https://via.placeholder.com/400x300?text=Project+{index}",
+        "tags": (list(dict.fromkeys(rng.choices(tags, cum_weights=cum_weights, k=rng.randint(2, 5))))
+                 if cum_weights else rng.sample(tags, rng.randint(2, 5))),
+        "status": "مكتمل",
+        "client": rng.choice(CLIENTS),
+        "year": str(2018 + index % 7),
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def make_projects(count: int, seed: int = 42, tags: list = TAGS) -> list:
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    cum_weights = tag_weights(tags) if tags is not TAGS else None
+    return [make_project(rng, index, base, tags, cum_weights) for index in range(count)]
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+SUBJECTS = ["استفسار عن الأسعار", "تصميم هوية بصرية", "طلب عرض سعر", "تعاون", "تصميم شعار", "حملة إعلانية"]
+# Most of an old inbox has been answered; the unread tail is small
+MESSAGE_STATUSES = ["new"] * 1 + ["read"] * 2 + ["replied"] * 7
+
+
+def make_messages(count: int, seed: int = 42, start: int = 0) -> list:
+    """``count`` contact messages, one second apart, newest first from ``start``"""
+    rng = random.Random(seed + start)
+    base = datetime(2025, 1, 1)
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": rng.choice(CLIENTS),
+            "email": f"client{index}@example.com",
+            "subject": rng.choice(SUBJECTS),
+            "message": " ".join(rng.choices(WORDS, k=25)),
+            "status": rng.choice(MESSAGE_STATUSES),
+            "created_at": base - timedelta(seconds=index),
+        }
+        for index in range(start, start + count)
+    ]
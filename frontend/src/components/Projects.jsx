@@ -15,14 +15,16 @@ const Projects = () => {
   const [activeCategory, setActiveCategory] = React.useState('الكل');
   const [loading, setLoading] = React.useState(true);
   const [error, setError] = React.useState(null);
+  const [nextCursor, setNextCursor] = React.useState(null);
 
   // Fetch all projects
   const fetchProjects = async () => {
     try {
       setLoading(true);
       const response = await axios.get(`${API}/projects`);
-      setProjects(response.data);
-      setFilteredProjects(response.data);
+      setProjects(response.data.items);
+      setFilteredProjects(response.data.items);
+      setNextCursor(response.data.next_cursor);
       setError(null);
     } catch (error) {
       console.error('Error fetching projects:', error);
@@ -50,7 +52,8 @@ const Projects = () => {
         ? `${API}/projects` 
         : `${API}/projects?category=${encodeURIComponent(category)}`;
       const response = await axios.get(url);
-      setFilteredProjects(response.data);
+      setFilteredProjects(response.data.items);
+      setNextCursor(response.data.next_cursor);
       setError(null);
     } catch (error) {
       console.error('Error fetching projects by category:', error);
@@ -60,6 +63,26 @@ const Projects = () => {
     }
   };
 
+  // Fetch the next page for the active category
+  const fetchMoreProjects = async () => {
+    try {
+      setLoading(true);
+      const params = { cursor: nextCursor };
+      if (activeCategory !== 'الكل') {
+        params.category = activeCategory;
+      }
+      const response = await axios.get(`${API}/projects`, { params });
+      setFilteredProjects((current) => [...current, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+      setError(null);
+    } catch (error) {
+      console.error('Error fetching more projects:', error);
+      setError('حدث خطأ في تحميل المشاريع');
+    } finally {
+      setLoading(false);
+    }
+  };
+
   React.useEffect(() => {
     fetchProjects();
     fetchCategories();
@@ -143,11 +166,17 @@ const Projects = () => {
           {filteredProjects.map((project) => (
             <Card key={project.id} className="group overflow-hidden border-none shadow-lg hover:shadow-2xl transition-all duration-500 bg-white">
               <div className="relative overflow-hidden">
-                <img
-                  src={project.image}
-                  alt={project.title}
-                  className="w-full h-64 object-cover transition-transform duration-500 group-hover:scale-110"
-                />
+                <picture>
+                  {project.srcset && Object.entries(project.srcset).map(([type, srcSet]) => (
+                    <source key={type} type={type} srcSet={srcSet} sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw" />
+                  ))}
+                  <img
+                    src={project.image}
+                    alt={project.title}
+                    loading="lazy"
+                    className="w-full h-64 object-cover transition-transform duration-500 group-hover:scale-110"
+                  />
+                </picture>
                 <div className="absolute inset-0 bg-gradient-to-t from-[#0a1535]/80 via-transparent to-transparent opacity-0 group-hover:opacity-100 transition-opacity duration-300">
                   <div className="absolute bottom-4 right-4 flex gap-2">
                     <Button size="sm" className="bg-[#d3af35] hover:bg-[#c49d2f] text-[#0a1535]">
@@ -197,6 +226,19 @@ const Projects = () => {
           </div>
         )}
 
+        {nextCursor && (
+          <div className="text-center mt-12">
+            <Button
+              variant="outline"
+              onClick={fetchMoreProjects}
+              disabled={loading}
+              className="border-[#0d46ba] text-[#0d46ba] hover:bg-[#0d46ba] hover:text-white px-8"
+            >
+              عرض المزيد
+            </Button>
+          </div>
+        )}
+
         <div className="text-center mt-12">
           <Button 
             size="lg" 
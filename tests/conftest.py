@@ -0,0 +1,51 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+
+import server  # noqa: E402
+from cache import TTLCache  # noqa: E402
+from storage import MongoStorage  # noqa: E402
+from throttle import TokenBucketLimiter  # noqa: E402
+from tests.fake_mongo import FakeDatabase  # noqa: E402
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Back the app's Mongo storage with an in-memory database"""
+    database = FakeDatabase()
+    monkeypatch.setattr(server, "storage", MongoStorage(database))
+    monkeypatch.setattr(server, "read_cache", TTLCache(maxsize=server.read_cache.maxsize, ttl=server.read_cache.ttl))
+    monkeypatch.setattr(server, "project_facets", None)
+    monkeypatch.setattr(server, "related_index", None)
+    monkeypatch.setattr(server, "indexed_version", 0)
+    monkeypatch.setattr(server, "own_versions", set())
+    monkeypatch.setattr(server, "projects_version", 0)
+    monkeypatch.setattr(server, "contact_limiters", {
+        name: TokenBucketLimiter(limiter.capacity, limiter.refill_per_second, limiter.maxsize)
+        for name, limiter in server.contact_limiters.items()
+    })
+    monkeypatch.setattr(server, "contact_dedup", TTLCache(maxsize=server.contact_dedup.maxsize, ttl=server.contact_dedup.ttl))
+    return database
+
+
+@pytest.fixture
+def seeded_db(fake_db):
+    """In-memory database seeded and indexed the way app startup does it"""
+    import asyncio
+    asyncio.run(server.init_default_data())
+    asyncio.run(server.rebuild_project_indexes())
+    fake_db.calls.clear()
+    return fake_db
+
+
+@pytest.fixture
+def api(seeded_db):
+    from fastapi.testclient import TestClient
+    return TestClient(server.app)
@@ -0,0 +1,429 @@
+"""In-memory stand-in for the subset of the Motor API used by server.py"""
+
+import asyncio
+import copy
+import itertools
+import re
+
+from pymongo import DeleteOne, InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+_object_ids = itertools.count(1)
+
+
+def _get(doc, path):
+    if "." not in path:
+        return doc.get(path)
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _compare(value, op, operand):
+    if op == "$eq":
+        return value == operand or (isinstance(value, list) and operand in value)
+    if op == "$ne":
+        return not _compare(value, "$eq", operand)
+    if op == "$in":
+        values = value if isinstance(value, list) else [value]
+        return any(v in operand for v in values)
+    if op == "$nin":
+        return not _compare(value, "$in", operand)
+    if op == "$exists":
+        return (value is not None) == bool(operand)
+    if op == "$regex":
+        return value is not None and re.search(operand, value) is not None
+    if value is None:
+        return False
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    raise NotImplementedError(op)
+
+
+def matches(doc, query):
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            value = _get(doc, key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif not _compare(_get(doc, key), "$eq", condition):
+            return False
+    return True
+
+
+def project(doc, projection):
+    # Shallow copies: like Motor, every read hands out fresh top-level documents
+    if not projection:
+        return dict(doc)
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        result = {k: doc[k] for k in include if k in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    result = dict(doc)
+    for key, value in projection.items():
+        if not value:
+            result.pop(key, None)
+    return result
+
+
+def _apply_update(doc, update):
+    for op, fields in update.items():
+        for key, value in fields.items():
+            if op == "$set":
+                doc[key] = copy.deepcopy(value)
+            elif op == "$setOnInsert":
+                continue
+            elif op == "$unset":
+                doc.pop(key, None)
+            elif op == "$inc":
+                doc[key] = doc.get(key, 0) + value
+            else:
+                raise NotImplementedError(op)
+
+
+class _Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeCursor:
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+        self._batch_size = 0
+        self._iter = None
+
+    def sort(self, key, direction=None):
+        if isinstance(key, list):
+            self._sort.extend(key)
+        else:
+            self._sort.append((key, direction if direction is not None else 1))
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def batch_size(self, size):
+        self._batch_size = size
+        return self
+
+    def _results(self):
+        self._collection.database.calls.append((self._collection.name, "find"))
+        docs = [doc for doc in self._collection.docs if matches(doc, self._query)]
+        for key, direction in reversed(self._sort):
+            docs.sort(key=lambda d: (d.get(key) is not None, d.get(key)), reverse=direction < 0)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [project(doc, self._projection) for doc in docs]
+
+    async def to_list(self, length=None):
+        await self._collection.database.round_trip()
+        docs = self._results()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._iter is None:
+            await self._collection.database.round_trip()
+            self._iter = iter(self._results())
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def explain(self):
+        indexed = any(
+            all(field in self._query or field in dict(self._sort) for field, _ in spec["key"][:1])
+            for spec in self._collection.indexes.values()
+        )
+        stage = "IXSCAN" if indexed else "COLLSCAN"
+        return {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": stage}}}}
+
+
+class FakeCollection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.docs = []
+        self.indexes = {"_id_": {"key": [("_id", 1)]}}
+
+    def _record(self, operation):
+        self.database.calls.append((self.name, operation))
+
+    def find(self, query=None, projection=None):
+        return FakeCursor(self, query or {}, projection)
+
+    async def find_one(self, query=None, projection=None, sort=None):
+        await self.database.round_trip()
+        cursor = FakeCursor(self, query or {}, projection)
+        if sort:
+            cursor.sort(sort)
+        self._record("find_one")
+        docs = cursor._results()
+        self.database.calls.pop()
+        return docs[0] if docs else None
+
+    async def count_documents(self, query):
+        await self.database.round_trip()
+        self._record("count_documents")
+        return sum(1 for doc in self.docs if matches(doc, query))
+
+    async def estimated_document_count(self):
+        await self.database.round_trip()
+        self._record("count")
+        return len(self.docs)
+
+    async def distinct(self, key, query=None):
+        await self.database.round_trip()
+        self._record("distinct")
+        values = []
+        for doc in self.docs:
+            if not matches(doc, query or {}):
+                continue
+            value = _get(doc, key)
+            for item in value if isinstance(value, list) else [value]:
+                if item is not None and item not in values:
+                    values.append(item)
+        return values
+
+    async def insert_one(self, document):
+        await self.database.round_trip()
+        self._record("insert")
+        document.setdefault("_id", next(_object_ids))
+        self.docs.append(copy.deepcopy(document))
+        return _Result(inserted_id=document["_id"])
+
+    async def insert_many(self, documents, ordered=True):
+        await self.database.round_trip()
+        self._record("insert")
+        for document in documents:
+            document.setdefault("_id", next(_object_ids))
+            self.docs.append(copy.deepcopy(document))
+        return _Result(inserted_ids=[d["_id"] for d in documents])
+
+    async def update_one(self, query, update, upsert=False):
+        await self.database.round_trip()
+        self._record("update")
+        for doc in self.docs:
+            if matches(doc, query):
+                _apply_update(doc, update)
+                return _Result(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            doc = {k: v for k, v in query.items() if not k.startswith("$")}
+            doc.update(copy.deepcopy(update.get("$setOnInsert", {})))
+            _apply_update(doc, {k: v for k, v in update.items() if k != "$setOnInsert"})
+            doc["_id"] = next(_object_ids)
+            self.docs.append(doc)
+            return _Result(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+        return _Result(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=False):
+        """``return_document`` is ReturnDocument.AFTER (True) or BEFORE"""
+        await self.database.round_trip()
+        self._record("findAndModify")
+        for doc in self.docs:
+            if matches(doc, query):
+                before = copy.deepcopy(doc)
+                _apply_update(doc, update)
+                return copy.deepcopy(doc) if return_document else before
+        if upsert:
+            doc = {k: v for k, v in query.items() if not k.startswith("$")}
+            doc.update(copy.deepcopy(update.get("$setOnInsert", {})))
+            _apply_update(doc, {k: v for k, v in update.items() if k != "$setOnInsert"})
+            doc.setdefault("_id", next(_object_ids))
+            self.docs.append(doc)
+            return copy.deepcopy(doc) if return_document else None
+        return None
+
+    async def update_many(self, query, update):
+        await self.database.round_trip()
+        self._record("update")
+        count = 0
+        for doc in self.docs:
+            if matches(doc, query):
+                _apply_update(doc, update)
+                count += 1
+        return _Result(matched_count=count, modified_count=count)
+
+    async def replace_one(self, query, replacement, upsert=False):
+        await self.database.round_trip()
+        self._record("update")
+        for index, doc in enumerate(self.docs):
+            if matches(doc, query):
+                new_doc = copy.deepcopy(replacement)
+                new_doc["_id"] = doc["_id"]
+                self.docs[index] = new_doc
+                return _Result(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            new_doc = copy.deepcopy(replacement)
+            new_doc.setdefault("_id", next(_object_ids))
+            self.docs.append(new_doc)
+            return _Result(matched_count=0, modified_count=0, upserted_id=new_doc["_id"])
+        return _Result(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def delete_one(self, query):
+        await self.database.round_trip()
+        self._record("delete")
+        for index, doc in enumerate(self.docs):
+            if matches(doc, query):
+                del self.docs[index]
+                return _Result(deleted_count=1)
+        return _Result(deleted_count=0)
+
+    async def delete_many(self, query):
+        await self.database.round_trip()
+        self._record("delete")
+        before = len(self.docs)
+        self.docs = [doc for doc in self.docs if not matches(doc, query)]
+        return _Result(deleted_count=before - len(self.docs))
+
+    def _duplicate_key(self, document):
+        for spec in self.indexes.values():
+            if spec.get("unique"):
+                fields = [field for field, _ in spec["key"]]
+                if any(all(_get(doc, f) == _get(document, f) for f in fields) for doc in self.docs):
+                    return fields
+        return None
+
+    async def bulk_write(self, requests, ordered=True):
+        """InsertOne/ReplaceOne/UpdateOne/DeleteOne only; unique indexes are enforced like E11000"""
+        await self.database.round_trip()
+        self._record("bulkWrite")
+        write_errors, upserted = [], []
+        inserted = deleted = 0
+        for index, request in enumerate(requests):
+            if isinstance(request, InsertOne):
+                duplicate = self._duplicate_key(request._doc)
+                if duplicate:
+                    write_errors.append({"index": index, "code": 11000,
+                                         "errmsg": f"E11000 duplicate key error dup key: {duplicate}"})
+                    if ordered:
+                        break
+                    continue
+                document = copy.deepcopy(request._doc)
+                document.setdefault("_id", next(_object_ids))
+                self.docs.append(document)
+                inserted += 1
+            elif isinstance(request, ReplaceOne):
+                for position, doc in enumerate(self.docs):
+                    if matches(doc, request._filter):
+                        self.docs[position] = dict(copy.deepcopy(request._doc), _id=doc["_id"])
+                        break
+                else:
+                    if request._upsert:
+                        self.docs.append(dict(copy.deepcopy(request._doc), _id=next(_object_ids)))
+                        upserted.append({"index": index, "_id": self.docs[-1]["_id"]})
+            elif isinstance(request, UpdateOne):
+                for doc in self.docs:
+                    if matches(doc, request._filter):
+                        _apply_update(doc, request._doc)
+                        break
+                else:
+                    if request._upsert:
+                        doc = {k: v for k, v in request._filter.items() if not k.startswith("$")}
+                        doc.update(copy.deepcopy(request._doc.get("$setOnInsert", {})))
+                        _apply_update(doc, {k: v for k, v in request._doc.items() if k != "$setOnInsert"})
+                        self.docs.append(dict(doc, _id=next(_object_ids)))
+                        upserted.append({"index": index, "_id": self.docs[-1]["_id"]})
+            elif isinstance(request, DeleteOne):
+                for position, doc in enumerate(self.docs):
+                    if matches(doc, request._filter):
+                        del self.docs[position]
+                        deleted += 1
+                        break
+            else:
+                raise NotImplementedError(type(request).__name__)
+        if write_errors:
+            raise BulkWriteError({"writeErrors": write_errors, "upserted": upserted, "nInserted": inserted,
+                                  "nRemoved": deleted, "writeConcernErrors": []})
+        return _Result(inserted_count=inserted, deleted_count=deleted, upserted_count=len(upserted),
+                       upserted_ids={entry["index"]: entry["_id"] for entry in upserted})
+
+    async def create_index(self, keys, name=None, **options):
+        self._record("createIndexes")
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        self.indexes[name] = dict(options, key=list(keys))
+        return name
+
+    async def index_information(self):
+        return copy.deepcopy(self.indexes)
+
+    async def drop(self):
+        self.docs = []
+
+
+class FakeDatabase:
+    """Dict of :class:`FakeCollection` with a log of ``(collection, operation)`` calls.
+
+    ``latency`` (seconds) is slept on every operation to mimic a network round trip.
+    """
+
+    def __init__(self, latency=0.0):
+        self._collections = {}
+        self.calls = []
+        self.latency = latency
+
+    async def round_trip(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self, name)
+        return self._collections[name]
+
+    def count_calls(self, collection=None, operation=None):
+        return sum(
+            1 for coll, op in self.calls
+            if (collection is None or coll == collection) and (operation is None or op == operation)
+        )
+
+    async def command(self, command, *args, **kwargs):
+        if isinstance(command, dict) and "explain" in command:
+            distinct = command["explain"]["distinct"]
+            key = command["explain"]["key"]
+            indexed = any(spec["key"][0][0] == key for spec in self[distinct].indexes.values())
+            stage = "DISTINCT_SCAN" if indexed else "COLLSCAN"
+            return {"queryPlanner": {"winningPlan": {"stage": "PROJECTION_COVERED", "inputStage": {"stage": stage}}}}
+        return {"ok": 1.0}
+
+    async def list_collection_names(self):
+        return list(self._collections)
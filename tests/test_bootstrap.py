@@ -0,0 +1,21 @@
+def test_bootstrap_combines_read_routes(api, seeded_db):
+    body = api.get("/api/bootstrap", params={"limit": 4}).json()
+    assert body["config"] == api.get("/api/config").json()
+    assert body["categories"] == api.get("/api/categories").json()["categories"]
+    assert body["projects"] == api.get("/api/projects", params={"limit": 4}).json()
+    assert len(body["projects"]["items"]) == 4
+
+
+def test_bootstrap_is_cached_as_a_unit(api, seeded_db):
+    first = api.get("/api/bootstrap")
+    calls = len(seeded_db.calls)
+    # Config, the projects write time and the projects page; categories come from the facet counts
+    assert calls == 3
+    second = api.get("/api/bootstrap", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert len(seeded_db.calls) == calls
+
+
+def test_bootstrap_without_config(api, seeded_db):
+    seeded_db.site_config.docs.clear()
+    assert api.get("/api/bootstrap").status_code == 404
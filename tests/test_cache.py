@@ -0,0 +1,68 @@
+from cache import TTLCache, cache_key
+
+import server
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+    cache.set("a", 1)
+    assert cache.get("a") == (True, 1)
+    clock.now = 11
+    assert cache.get("a") == (False, None)
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.evictions == 1
+
+
+def test_invalidate_by_collection():
+    cache = TTLCache()
+    cache.set(cache_key("projects"), [], collections=("projects",))
+    cache.set(cache_key("config"), {}, collections=("site_config",))
+    assert cache.invalidate("projects") == 1
+    assert cache.get(cache_key("config"))[0]
+
+
+def test_projects_served_from_cache(api, seeded_db):
+    first = api.get("/api/projects", params={"category": "الهوية البصرية"})
+    second = api.get("/api/projects", params={"category": "الهوية البصرية"})
+    assert first.status_code == 200
+    assert first.json() == second.json()
+    assert seeded_db.count_calls("projects", "find") == 1
+
+    api.get("/api/projects")
+    assert seeded_db.count_calls("projects", "find") == 2
+
+    api.get("/api/categories")
+    api.get("/api/categories")
+    api.get("/api/config")
+    api.get("/api/config")
+    # Categories come from the facet counts built at startup
+    assert seeded_db.count_calls("projects") == 2
+    assert seeded_db.count_calls("site_config", "find_one") == 1
+    stats = api.get("/api/cache/stats").json()
+    assert stats["hits"] == 3 and stats["misses"] == 4
+
+
+def test_write_hook_invalidates(api, seeded_db):
+    api.get("/api/projects")
+    seeded_db.projects.docs.clear()
+    server.notify_collection_changed("projects")
+    assert api.get("/api/projects").json() == {"items": [], "next_cursor": None}
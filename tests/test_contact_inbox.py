@@ -0,0 +1,59 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+
+ADMIN = {"X-Admin-Token": "secret"}
+BASE = datetime(2025, 3, 1)
+
+
+@pytest.fixture
+def inbox(seeded_db, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    messages = [
+        server.ContactMessage(name="سارة", email="sara@example.com", subject="استفسار", message=f"رسالة {i}",
+                              status="new" if i % 3 else "read", created_at=BASE + timedelta(minutes=i)).dict()
+        for i in range(50)
+    ]
+    asyncio.run(server.storage.contact_messages.insert_many(messages))
+    return messages
+
+
+def _walk(api, **params):
+    ids, cursor = [], None
+    while True:
+        page = api.get("/api/contact", params={**params, "cursor": cursor} if cursor else params, headers=ADMIN).json()
+        ids += [message["id"] for message in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids
+
+
+def test_inbox_pages_newest_first(api, inbox):
+    assert api.get("/api/contact").status_code == 401
+    newest_first = [m["id"] for m in sorted(inbox, key=lambda m: m["created_at"], reverse=True)]
+    assert _walk(api, limit=7) == newest_first
+    unread = _walk(api, status="new", limit=10)
+    assert unread == [m["id"] for m in sorted(inbox, key=lambda m: m["created_at"], reverse=True)
+                      if m["status"] == "new"]
+    assert api.get("/api/contact", params={"status": "spam"}, headers=ADMIN).status_code == 422
+    assert api.get("/api/contact", params={"cursor": "bad"}, headers=ADMIN).status_code == 400
+
+
+def test_status_moves_forward_only(api, inbox, seeded_db):
+    unread = [m["id"] for m in inbox if m["status"] == "new"]
+    already_read = [m["id"] for m in inbox if m["status"] == "read"]
+
+    seeded_db.calls.clear()
+    moved = api.post("/api/contact/status", json={"ids": unread + already_read, "status": "read"}, headers=ADMIN)
+    assert moved.json() == {"updated": len(unread)}
+    assert seeded_db.count_calls("contact_messages", "update") == 1
+    assert _walk(api, status="new") == []
+
+    replied = api.put(f"/api/contact/{unread[0]}", json={"status": "replied"}, headers=ADMIN).json()
+    assert replied["status"] == "replied"
+    assert api.put(f"/api/contact/{unread[0]}", json={"status": "read"}, headers=ADMIN).status_code == 409
+    assert api.put("/api/contact/missing", json={"status": "read"}, headers=ADMIN).status_code == 404
+    assert api.post("/api/contact/status", json={"ids": [], "status": "read"}, headers=ADMIN).status_code == 422
@@ -0,0 +1,111 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from cache import TTLCache
+from throttle import TokenBucketLimiter
+
+
+def _message(email="sara@example.com", subject="استفسار", message="مرحبا"):
+    return {"name": "سارة", "email": email, "subject": subject, "message": message}
+
+
+def test_token_bucket_refills_and_evicts():
+    now = [0.0]
+    limiter = TokenBucketLimiter(2, refill_per_second=0.5, maxsize=2, clock=lambda: now[0])
+    assert [limiter.acquire("a") for _ in range(3)] == [0.0, 0.0, 2.0]
+    now[0] = 1.0
+    assert limiter.acquire("a") == pytest.approx(1.0)
+    now[0] = 2.0
+    assert limiter.acquire("a") == 0.0
+    limiter.acquire("b")
+    limiter.acquire("c")
+    # "a" was least recently seen, so it went to make room and comes back with a full bucket
+    assert len(limiter) == 2 and limiter.evictions == 1
+    assert limiter.acquire("a") == 0.0
+    assert TokenBucketLimiter(0, 0).acquire("anyone") == 0.0
+
+
+def test_route_answers_429_with_retry_after_and_dedups(api, seeded_db):
+    first = api.post("/api/contact", json=_message())
+    assert first.status_code == 200
+    # A double click, even with different case and spacing, is answered without writing again
+    again = api.post("/api/contact", json=_message(email="Sara@Example.com ", message="  مرحبا "))
+    assert again.json() == first.json()
+    assert seeded_db.count_calls("contact_messages", "insert") == 1
+
+    statuses = [api.post("/api/contact", json=_message(message=f"رسالة {i}")).status_code for i in range(4)]
+    # The email's bucket holds 3: the first message and two more
+    assert statuses == [200, 200, 429, 429]
+    limited = api.post("/api/contact", json=_message(message="أخرى"))
+    assert int(limited.headers["retry-after"]) > 0
+    assert seeded_db.count_calls("contact_messages", "insert") == 3
+
+
+def test_rejected_email_does_not_spend_the_ip_budget(api, seeded_db):
+    for i in range(3):
+        assert api.post("/api/contact", json=_message(message=f"رسالة {i}")).status_code == 200
+    # The IP bucket holds 5: three spent, and the email-limited attempts take nothing from it
+    for i in range(5):
+        assert api.post("/api/contact", json=_message(message=f"مكررة {i}")).status_code == 429
+    assert [api.post("/api/contact", json=_message(email=f"u{i}@example.com")).status_code for i in range(3)] == [
+        200, 200, 429,
+    ]
+
+
+def test_zero_rate_answers_429(api, seeded_db, monkeypatch):
+    monkeypatch.setitem(server.contact_limiters, "email", TokenBucketLimiter(1, refill_per_second=0))
+    assert api.post("/api/contact", json=_message()).status_code == 200
+    limited = api.post("/api/contact", json=_message(message="أخرى"))
+    assert limited.status_code == 429
+    assert limited.headers["retry-after"] == str(server.MAX_RETRY_AFTER_SECONDS)
+
+
+def test_failed_write_is_not_remembered(api, seeded_db, monkeypatch):
+    async def unavailable(document):
+        raise RuntimeError("mongo down")
+
+    monkeypatch.setattr(server.storage.contact_messages, "insert_one", unavailable)
+    assert api.post("/api/contact", json=_message()).status_code == 500
+    # So the retry is written rather than answered as a duplicate
+    assert len(server.contact_dedup) == 0
+
+
+def test_burst_of_10k_submissions(fake_db, monkeypatch):
+    frozen = lambda: 0.0  # noqa: E731 - no refill during the burst
+    monkeypatch.setattr(server, "contact_limiters", {
+        "ip": TokenBucketLimiter(5, 30 / 3600, maxsize=10000, clock=frozen),
+        "email": TokenBucketLimiter(3, 10 / 3600, maxsize=10000, clock=frozen),
+    })
+    monkeypatch.setattr(server, "contact_dedup", TTLCache(maxsize=10000, ttl=600, clock=frozen))
+
+    requests = []
+    # A bot on one address sending 5000 different messages
+    requests += [("10.0.0.1", _message(email=f"bot{i}@example.com", message=f"عرض {i}")) for i in range(5000)]
+    # 2000 visitors double-clicking send
+    requests += [(f"10.1.{i // 250}.{i % 250}", _message(email=f"user{i}@example.com")) for i in range(2000) for _ in range(2)]
+    # One address rotating through 1000 IPs
+    requests += [(f"10.2.{i // 250}.{i % 250}", _message(message=f"سبام {i}")) for i in range(1000)]
+    assert len(requests) == 10000
+
+    async def submit(ip, body):
+        request = SimpleNamespace(client=SimpleNamespace(host=ip))
+        try:
+            await server.submit_contact_form(server.ContactMessageCreate(**body), request)
+            return 200
+        except HTTPException as e:
+            return e.status_code
+
+    async def burst():
+        return await asyncio.gather(*(submit(ip, body) for ip, body in requests))
+
+    statuses = asyncio.run(burst())
+    assert statuses.count(200) == 5 + 4000 + 3
+    assert statuses.count(429) == 4995 + 997
+    assert len(fake_db.contact_messages.docs) == 5 + 2000 + 3
+    assert server.contact_dedup.hits == 2000
+    assert server.contact_limiters["ip"].limited == 4995
+    assert server.contact_limiters["email"].limited == 997
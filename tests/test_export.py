@@ -0,0 +1,35 @@
+import csv
+import io
+import json
+
+
+def test_projects_ndjson(api, seeded_db):
+    response = api.get("/api/projects/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 6
+    assert "_id" not in rows[0]
+    assert [r["created_at"] for r in rows] == sorted(r["created_at"] for r in rows)
+
+
+def test_projects_csv(api, seeded_db):
+    response = api.get("/api/projects/export", params={"format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert len(rows) == 6
+    assert isinstance(json.loads(rows[0]["tags"]), list)
+
+
+def test_since_resumes(api, seeded_db):
+    rows = [json.loads(line) for line in api.get("/api/projects/export").text.splitlines()]
+    resumed = api.get("/api/projects/export", params={"since": rows[-1]["created_at"]}).text.splitlines()
+    assert rows[-1]["id"] in {json.loads(line)["id"] for line in resumed}
+    assert len(resumed) < len(rows) or len({r["created_at"] for r in rows}) == 1
+
+
+def test_contact_export_requires_admin(api, seeded_db, monkeypatch):
+    api.post("/api/contact", json={"name": "سارة", "email": "sara@example.com", "subject": "تصميم", "message": "مرحبا"})
+    assert api.get("/api/contact/export").status_code == 401
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    response = api.get("/api/contact/export", headers={"X-Admin-Token": "secret"})
+    assert [json.loads(line)["name"] for line in response.text.splitlines()] == ["سارة"]
@@ -0,0 +1,54 @@
+import asyncio
+
+import server
+from facets import FacetIndex
+
+
+def test_counts_follow_adds_updates_and_removes():
+    index = FacetIndex()
+    index.add("a", {"category": "مطبوعات", "year": "2023", "tags": ["شعار", "طباعة", "شعار"]})
+    index.add("b", {"category": "مطبوعات", "year": "2024", "tags": ["شعار"]})
+    index.add("c", {"category": "الهوية البصرية", "year": "2024", "tags": []})
+    assert index.counts("category") == {"الهوية البصرية": 1, "مطبوعات": 2}
+    assert list(index.counts("year").items()) == [("2024", 2), ("2023", 1)]
+    assert list(index.counts("tags").items()) == [("شعار", 2), ("طباعة", 1)]
+
+    index.add("b", {"category": "الهوية البصرية", "year": "2024", "tags": ["هوية"]})
+    index.remove("a")
+    index.remove("missing")
+    assert index.counts("category") == {"الهوية البصرية": 2}
+    assert index.counts("tags") == {"هوية": 1}
+    assert index.counts("year") == {"2024": 2}
+    assert len(index) == 2
+
+
+def test_categories_route_counts_without_scanning(api, seeded_db):
+    body = api.get("/api/categories").json()
+    assert body["categories"] == ["الكل", "الهوية البصرية", "مطبوعات", "وسائل التواصل"]
+    assert body["counts"] == {"الكل": 6, "الهوية البصرية": 3, "مطبوعات": 1, "وسائل التواصل": 2}
+    assert "facets" not in body
+
+    faceted = api.get("/api/categories", params={"facets": "tags,year"}).json()
+    assert sum(faceted["facets"]["year"].values()) == 6
+    assert list(faceted["facets"]) == ["year", "tags"]
+    assert api.get("/api/categories", params={"facets": "client"}).status_code == 400
+    assert seeded_db.count_calls("projects") == 0
+
+
+def test_counts_track_indexed_changes(api, seeded_db):
+    project = server.Project(title="ملصق", description="وصف", category="مطبوعات", image="x",
+                             tags=["ملصق"], client="عميل", year="2026").dict()
+
+    async def insert():
+        await server.storage.projects.insert_many([project])
+        server.index_project(project)
+        server.notify_collection_changed("projects")
+
+    asyncio.run(insert())
+    body = api.get("/api/categories", params={"facets": "year"}).json()
+    assert body["counts"]["مطبوعات"] == 2 and body["counts"]["الكل"] == 7
+    assert body["facets"]["year"]["2026"] == 1
+
+    server.unindex_project(project["id"])
+    server.notify_collection_changed("projects")
+    assert api.get("/api/categories").json()["counts"]["مطبوعات"] == 1
@@ -0,0 +1,46 @@
+import pytest
+
+from fieldsets import UnknownFields, parse_fields, partial_model
+
+import server
+
+GRID_FIELDS = "id,title,category,image,tags"
+
+
+def test_parse_fields_orders_and_adds_id():
+    assert parse_fields(server.Project, "tags, title") == ("id", "title", "tags")
+    assert parse_fields(server.Project, None) is None
+    with pytest.raises(UnknownFields):
+        parse_fields(server.Project, "title,_id")
+
+
+def test_partial_model_keeps_types():
+    model = partial_model(server.Project, ("id", "tags"))
+    assert set(model.model_fields) == {"id", "tags"}
+    assert partial_model(server.Project, ("id", "tags")) is model
+
+
+def test_sparse_list_and_detail(api, seeded_db):
+    page = api.get("/api/projects", params={"fields": "title,tags", "limit": 3}).json()
+    assert [set(p) for p in page["items"]] == [{"id", "title", "tags"}] * 3
+    assert page["next_cursor"]
+    following = api.get("/api/projects", params={"fields": "title,tags", "limit": 3, "cursor": page["next_cursor"]})
+    assert len(following.json()["items"]) == 3
+
+    project_id = page["items"][0]["id"]
+    detail = api.get(f"/api/projects/{project_id}", params={"fields": "client"})
+    assert detail.json() == {"id": project_id, "client": api.get(f"/api/projects/{project_id}").json()["client"]}
+    assert "last-modified" in detail.headers
+
+
+def test_unknown_fields_rejected(api, seeded_db):
+    assert api.get("/api/projects", params={"fields": "title,password"}).status_code == 400
+    assert api.get("/api/projects/x", params={"fields": "nope"}).status_code == 400
+
+
+def test_grid_fieldset_saves_bytes(api, seeded_db):
+    full = api.get("/api/projects", params={"legacy": "true"})
+    sparse = api.get("/api/projects", params={"legacy": "true", "fields": GRID_FIELDS})
+    assert [p["id"] for p in sparse.json()] == [p["id"] for p in full.json()]
+    saved = 1 - len(sparse.content) / len(full.content)
+    assert saved > 0.3
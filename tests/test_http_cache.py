@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+
+
+def test_etag_round_trip(api, seeded_db):
+    for path in ("/api/projects", "/api/categories", "/api/config"):
+        first = api.get(path)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert etag.startswith('"')
+
+        again = api.get(path, headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+
+        assert api.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_single_project_etag(api, seeded_db):
+    project_id = api.get("/api/projects").json()["items"][0]["id"]
+    first = api.get(f"/api/projects/{project_id}")
+    assert api.get(f"/api/projects/{project_id}", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    assert api.get("/api/projects/missing").status_code == 404
+
+
+def test_if_modified_since(api, seeded_db):
+    first = api.get("/api/config")
+    last_modified = first.headers["last-modified"]
+    assert api.get("/api/config", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    earlier = format_datetime(datetime.utcnow() - timedelta(days=1), usegmt=False)
+    assert api.get("/api/config", headers={"If-Modified-Since": earlier}).status_code == 200
+
+
+def test_negotiate_encoding():
+    from http_cache import ENCODINGS, negotiate_encoding
+
+    preferred = ENCODINGS[0]
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip, br") == preferred
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    assert negotiate_encoding("*") == preferred
+    assert negotiate_encoding("br;q=0.2, gzip;q=0.8") == "gzip"
+
+
+def test_precompressed_variants_are_built_once(api, seeded_db, monkeypatch):
+    import http_cache
+
+    calls = []
+    original = http_cache.compress
+    monkeypatch.setattr(http_cache, "compress", lambda body, encoding: calls.append(encoding) or original(body, encoding))
+
+    plain = api.get("/api/projects", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+    for _ in range(3):
+        response = api.get("/api/projects", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.content == plain.content
+        assert response.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    # Every variant is built once, when the rendering is cached
+    assert calls == list(http_cache.ENCODINGS)
+    assert int(response.headers["content-length"]) < len(plain.content)
+
+    # A validator from either representation revalidates the other
+    revalidated = api.get("/api/projects", headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == response.headers["etag"]
+
+
+def test_uncached_renderings_are_sent_uncompressed(api, seeded_db, monkeypatch):
+    import server
+    from cache import TTLCache
+
+    monkeypatch.setattr(server, "read_cache", TTLCache(maxsize=0))
+    response = api.get("/api/projects", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_small_bodies_are_not_compressed(api, seeded_db):
+    response = api.get("/api/categories", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
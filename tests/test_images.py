@@ -0,0 +1,100 @@
+import asyncio
+import io
+import tracemalloc
+
+import pytest
+
+import server
+from images import ImageStore, InvalidUpload, receive_upload
+
+Image = pytest.importorskip("PIL.Image")
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    store = ImageStore(tmp_path / "media", workers=1)
+    monkeypatch.setattr(server, "image_store", store)
+    yield store
+    store.close()
+
+
+def _png(width, height, mode="RGBA"):
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), (200, 160, 50, 128) if mode == "RGBA" else (200, 160, 50)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_upload_makes_cacheable_variants(api, media):
+    body = _png(1600, 900)
+    assert api.post("/api/images", files={"file": ("logo.png", body)}).status_code == 401
+    uploaded = api.post("/api/images", files={"file": ("logo.png", body)}, headers=ADMIN).json()
+
+    assert (uploaded["width"], uploaded["height"]) == (1600, 900)
+    assert set(uploaded["srcset"]) == {"image/webp", "image/png"}
+    widths = [candidate.split()[1] for candidate in uploaded["srcset"]["image/webp"].split(", ")]
+    assert widths == ["400w", "1200w"]
+
+    thumb_url = uploaded["srcset"]["image/webp"].split()[0]
+    thumb = api.get(thumb_url)
+    assert thumb.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert thumb.headers["content-type"] == "image/webp"
+    assert Image.open(io.BytesIO(thumb.content)).size == (400, 225)
+    assert Image.open(io.BytesIO(api.get(uploaded["image"]).content)).size == (1200, 675)
+
+    # The same bytes again reuse the stored variants
+    files = sorted(path.name for path in media.directory.iterdir())
+    assert api.post("/api/images", files={"file": ("copy.png", body)}, headers=ADMIN).json() == uploaded
+    assert sorted(path.name for path in media.directory.iterdir()) == files
+    assert list(media.incoming().iterdir()) == []
+
+    project = {"title": "شعار", "description": "وصف", "category": "الهوية البصرية", "image": uploaded["image"],
+               "tags": [], "client": "عميل", "year": "2025", "srcset": uploaded["srcset"]}
+    created = api.post("/api/projects", json=project, headers=ADMIN).json()
+    assert api.get(f"/api/projects/{created['id']}").json()["srcset"] == uploaded["srcset"]
+
+
+def test_small_opaque_images_are_not_upscaled(api, media):
+    uploaded = api.post("/api/images", files={"file": ("photo.png", _png(300, 200, "RGB"))}, headers=ADMIN).json()
+    assert set(uploaded["srcset"]) == {"image/webp", "image/jpeg"}
+    assert uploaded["srcset"]["image/jpeg"].endswith(" 300w")
+    assert uploaded["image"].endswith(".jpg")
+
+
+def test_bad_uploads_are_refused(api, media, monkeypatch):
+    assert api.post("/api/images", files={"file": ("a.png", b"not an image")}, headers=ADMIN).status_code == 400
+    assert api.post("/api/images", files={"other": ("a.png", _png(10, 10))}, headers=ADMIN).status_code == 400
+    assert api.post("/api/images", json={"file": "x"}, headers=ADMIN).status_code == 400
+    monkeypatch.setattr(server, "IMAGE_MAX_UPLOAD_BYTES", 1000)
+    assert api.post("/api/images", files={"file": ("big.png", b"x" * 200_000)}, headers=ADMIN).status_code == 413
+    assert list(media.incoming().iterdir()) == []
+    assert api.get("/api/media/..%2Fserver.py").status_code == 404
+    assert api.get("/api/media/" + "0" * 40 + ".json").status_code == 404
+
+
+def test_uploads_stream_to_disk(tmp_path):
+    boundary = "bound"
+    size = 8 * 1024 * 1024
+
+    async def body():
+        yield f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="a.bin"\r\n\r\n'.encode()
+        for _ in range(size // 65536):
+            yield b"\xab" * 65536
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    async def scenario():
+        tracemalloc.start()
+        path, digest = await receive_upload(f"multipart/form-data; boundary={boundary}", body(), tmp_path, size)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return path, peak
+
+    path, peak = asyncio.run(scenario())
+    assert path.stat().st_size == size
+    assert peak < 1024 * 1024
+
+    with pytest.raises(InvalidUpload):
+        asyncio.run(receive_upload("multipart/form-data; boundary=bound", body(), tmp_path, size - 1))
+    assert list(tmp_path.iterdir()) == [path]
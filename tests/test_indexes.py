@@ -0,0 +1,30 @@
+import asyncio
+
+from indexes import INDEX_SPECS, ensure_indexes, plan_stages
+
+
+def test_ensure_indexes_is_idempotent(fake_db):
+    asyncio.run(ensure_indexes(fake_db))
+    asyncio.run(ensure_indexes(fake_db))
+    for collection, specs in INDEX_SPECS.items():
+        info = asyncio.run(fake_db[collection].index_information())
+        assert {spec["name"] for spec in specs} <= set(info)
+    assert asyncio.run(fake_db.projects.index_information())["id_unique"]["unique"]
+
+
+def test_plan_stages_flattens_nested_plans():
+    plan = {"queryPlan": {"stage": "FETCH", "inputStage": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}}
+    assert plan_stages(plan) == ["FETCH", "SORT", "COLLSCAN"]
+
+
+def test_query_plans_route(api, seeded_db, monkeypatch):
+    assert api.get("/api/admin/query-plans").status_code == 401
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    headers = {"X-Admin-Token": "secret"}
+
+    before = api.get("/api/admin/query-plans", headers=headers).json()
+    assert before["collscans"] > 0
+
+    asyncio.run(ensure_indexes(seeded_db))
+    after = api.get("/api/admin/query-plans", headers=headers).json()
+    assert after["collscans"] == 0, after
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+import metrics
+import server
+
+
+@pytest.fixture
+def fresh_registry(monkeypatch):
+    http_requests = metrics.Counter("http_requests_total", "", ("method", "route", "status"))
+    http_latency = metrics.Histogram("http_request_duration_seconds", "", ("method", "route"))
+    mongo_commands = metrics.Counter("mongo_commands_total", "", ("collection", "command", "outcome"))
+    mongo_latency = metrics.Histogram("mongo_command_duration_seconds", "", ("collection", "command"))
+    fresh = SimpleNamespace(http_requests=http_requests, http_latency=http_latency,
+                            mongo_commands=mongo_commands, mongo_latency=mongo_latency)
+    for name, metric in vars(fresh).items():
+        monkeypatch.setattr(metrics, name, metric)
+    return fresh
+
+
+def test_histogram_render():
+    histogram = metrics.Histogram("latency_seconds", "doc", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+    text = "\n".join(histogram.render())
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+
+
+def test_middleware_records_route_templates_and_500s(api, seeded_db, fresh_registry, monkeypatch):
+    project_id = api.get("/api/projects").json()["items"][0]["id"]
+    api.get(f"/api/projects/{project_id}")
+    api.get("/api/projects/does-not-exist")
+
+    async def broken(*args, **kwargs):
+        raise RuntimeError("mongo down")
+
+    monkeypatch.setattr(server, "load_categories", broken)
+    assert api.get("/api/categories").status_code == 500
+
+    requests = fresh_registry.http_requests
+    assert requests.value("GET", "/api/projects/{project_id}", "200") == 1
+    assert requests.value("GET", "/api/projects/{project_id}", "404") == 1
+    assert requests.value("GET", "/api/categories", "500") == 1
+    assert fresh_registry.http_latency.count("GET", "/api/projects") == 1
+
+
+def test_command_listener_with_stubbed_client(fresh_registry):
+    """Drive the listener the way pymongo would for one find and one failed insert"""
+    listener = metrics.MongoCommandMetrics()
+    listener.started(SimpleNamespace(command_name="find", command={"find": "projects"}, request_id=1, operation_id=1))
+    listener.started(SimpleNamespace(command_name="insert", command={"insert": "contact_messages"}, request_id=2, operation_id=2))
+    listener.succeeded(SimpleNamespace(command_name="find", request_id=1, operation_id=1, duration_micros=1500))
+    listener.failed(SimpleNamespace(command_name="insert", request_id=2, operation_id=2, duration_micros=800))
+
+    assert fresh_registry.mongo_commands.value("projects", "find", "success") == 1
+    assert fresh_registry.mongo_commands.value("contact_messages", "insert", "failure") == 1
+    assert fresh_registry.mongo_latency.count("projects", "find") == 1
+
+
+def test_listener_is_registered_on_the_shared_client():
+    listeners = server.storage.client.delegate.options.event_listeners
+    assert server.mongo_metrics in listeners
+
+
+def test_metrics_endpoint(api, seeded_db):
+    api.get("/api/config")
+    response = api.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/api/config",status="200"}' in response.text
+    assert "read_cache_lookups" in response.text
+    assert "/metrics" not in response.text.split("# TYPE http_requests_total counter")[1].split("# HELP")[0]
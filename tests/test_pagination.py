@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timedelta
+
+
+def _seed(db, count):
+    db.projects.docs.clear()
+    base = datetime(2024, 1, 1)
+    docs = []
+    for i in range(count):
+        docs.append({
+            "id": f"p{i:04d}",
+            "title": f"مشروع {i}",
+            "description": "وصف",
+            "category": "مطبوعات" if i % 3 else "الهوية البصرية",
+            "image": "https://example.com/x.png",
+            "tags": ["شعار"],
+            "status": "مكتمل",
+            "client": "عميل",
+            "year": "2024",
+            # Pairs share a timestamp so the id tie-breaker is exercised
+            "created_at": base + timedelta(minutes=i // 2),
+            "updated_at": base,
+        })
+    asyncio.run(db.projects.insert_many(docs))
+
+
+def _walk(api, **params):
+    seen, cursor = [], None
+    while True:
+        page = api.get("/api/projects", params=dict(params, cursor=cursor) if cursor else params).json()
+        seen.extend(p["id"] for p in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return seen
+
+
+def test_keyset_walk_matches_full_list(api, fake_db):
+    _seed(fake_db, 53)
+    legacy = [p["id"] for p in api.get("/api/projects", params={"legacy": "true"}).json()]
+    assert len(legacy) == 53
+    assert _walk(api, limit=10) == legacy
+
+
+def test_pages_respect_category(api, fake_db):
+    _seed(fake_db, 30)
+    ids = _walk(api, limit=4, category="الهوية البصرية")
+    assert len(ids) == 10
+    assert all(int(i[1:]) % 3 == 0 for i in ids)
+
+
+def test_last_page_has_no_cursor(api, fake_db):
+    _seed(fake_db, 10)
+    first = api.get("/api/projects", params={"limit": 5}).json()
+    assert len(first["items"]) == 5 and first["next_cursor"]
+    second = api.get("/api/projects", params={"limit": 5, "cursor": first["next_cursor"]}).json()
+    assert len(second["items"]) == 5 and second["next_cursor"] is None
+
+
+def test_invalid_cursor(api):
+    assert api.get("/api/projects", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert api.get("/api/projects", params={"limit": 0}).status_code == 422
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import profiling
+import server
+from storage import MemoryStorage
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+def test_profile_on_request_with_admin_token(api, monkeypatch, tmp_path):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(server.profile_store, "directory", tmp_path)
+    original = server.storage.projects.get
+
+    async def slow_get(*args, **kwargs):
+        await asyncio.sleep(0.03)
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(server.storage.projects, "get", slow_get)
+    project_id = api.get("/api/projects").json()["items"][0]["id"]
+
+    # Without a valid token the header is ignored
+    api.get(f"/api/projects/{project_id}", headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+    assert list(tmp_path.iterdir()) == []
+
+    server.read_cache.clear()
+    assert api.get(f"/api/projects/{project_id}", headers={"X-Profile": "1", **ADMIN}).status_code == 200
+    names = api.get("/api/admin/profiles", headers=ADMIN).json()["profiles"]
+    assert len(names) == 1
+    profile = api.get(f"/api/admin/profiles/{names[0]}", headers=ADMIN).json()
+    assert profile["route"] == "/api/projects/{project_id}"
+    assert profile["params"]["path"] == {"project_id": project_id}
+    assert profile["status"] == 200
+    assert profile["profile"]["samples"] > 0
+    # Most of the request was spent awaiting the slowed storage call
+    breakdown = profile["profile"]["breakdown_ms"]
+    assert max(breakdown, key=breakdown.get) == "waiting"
+    assert sum(profile["profile"]["stacks"].values()) == profile["profile"]["samples"]
+    assert api.get("/api/admin/profiles/../server.py", headers=ADMIN).status_code == 404
+
+
+def test_slow_requests_are_logged_with_their_commands(caplog, tmp_path):
+    tracer = profiling.CommandTracer()
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        # What pymongo's listener sees for one find sent while handling the request
+        tracer.started(SimpleNamespace(command_name="find", command={"find": "projects"}, request_id=1, operation_id=1))
+        await asyncio.sleep(0.02)
+        tracer.succeeded(SimpleNamespace(command_name="find", request_id=1, operation_id=1, duration_micros=20000))
+        return {"id": item_id}
+
+    @app.get("/fast")
+    async def fast():
+        return {}
+
+    app.add_middleware(profiling.ProfilingMiddleware, store=profiling.ProfileStore(tmp_path, keep=5),
+                       authorize=lambda token: False, slow_seconds=0.01)
+    client = TestClient(app)
+    with caplog.at_level(logging.WARNING, logger="profiling"):
+        client.get("/items/42", params={"expand": "tags"})
+        client.get("/fast")
+
+    slow = [record.getMessage() for record in caplog.records]
+    assert len(slow) == 1
+    assert "GET /items/{item_id}" in slow[0]
+    assert "'item_id': '42'" in slow[0] and "expand=tags" in slow[0]
+    assert "db_calls=1 (20.0ms): find projects 20.0ms" in slow[0]
+    # Commands outside a request are not attributed to anything
+    tracer.started(SimpleNamespace(command_name="ping", command={"ping": 1}, request_id=2, operation_id=2))
+
+
+def test_repository_calls_are_traced_without_a_command_listener(caplog, tmp_path):
+    storage = MemoryStorage()
+    profiling.trace_repositories(storage)
+    app = FastAPI()
+
+    @app.get("/count")
+    async def count():
+        return {"projects": await storage.projects.count(), "config": await storage.site_config.count()}
+
+    app.add_middleware(profiling.ProfilingMiddleware, store=profiling.ProfileStore(tmp_path, keep=5),
+                       authorize=lambda token: False, slow_seconds=0)
+    with caplog.at_level(logging.WARNING, logger="profiling"):
+        assert TestClient(app).get("/count").json() == {"projects": 0, "config": 0}
+
+    [slow] = [record.getMessage() for record in caplog.records]
+    assert "db_calls=2" in slow and "count projects" in slow and "count site_config" in slow
+    # Outside a request the calls go straight through
+    assert asyncio.run(storage.projects.count()) == 0
+
+
+def test_profile_directory_rotates(tmp_path):
+    store = profiling.ProfileStore(tmp_path, keep=2)
+    names = [store.write({"route": "/api/projects", "method": "GET", "n": n}) for n in range(3)]
+    assert store.names() == names[:0:-1]
+    assert json.loads(store.path(names[-1]).read_text("utf-8"))["n"] == 2
+    assert store.path(names[0]) is None
@@ -0,0 +1,174 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+
+import server
+from storage import MongoStorage
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture(autouse=True)
+def admin_token(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+
+
+def _item(title, **extra):
+    return {"title": title, "description": "وصف", "category": "أرشيف", "image": "x", "tags": ["بيهانس"],
+            "client": "عميل", "year": "2019", **extra}
+
+
+def _ndjson(items):
+    return b"\n".join(orjson.dumps(item) for item in items) + b"\n"
+
+
+def test_single_project_crud(api):
+    assert api.post("/api/projects", json=_item("جديد")).status_code == 401
+    created = api.post("/api/projects", json=_item("جديد"), headers=ADMIN).json()
+    assert api.get(f"/api/projects/{created['id']}").json()["title"] == "جديد"
+
+    updated = api.put(f"/api/projects/{created['id']}", json={"title": "معدل"}, headers=ADMIN).json()
+    assert updated["title"] == "معدل" and updated["category"] == "أرشيف"
+    assert updated["created_at"] == created["created_at"]
+    assert api.get(f"/api/projects/{created['id']}").json()["title"] == "معدل"
+
+    # Only the fields sent change, and an explicit null clears an optional one
+    with_srcset = api.put(f"/api/projects/{created['id']}", json={"srcset": {"image/webp": "a.webp 400w"}},
+                          headers=ADMIN).json()
+    assert with_srcset["srcset"] and with_srcset["title"] == "معدل"
+    cleared = api.put(f"/api/projects/{created['id']}", json={"srcset": None}, headers=ADMIN).json()
+    assert cleared["srcset"] is None and cleared["title"] == "معدل"
+    assert api.get(f"/api/projects/{created['id']}").json()["srcset"] is None
+    assert api.put(f"/api/projects/{created['id']}", json={"title": None}, headers=ADMIN).status_code == 422
+
+    assert api.delete(f"/api/projects/{created['id']}", headers=ADMIN).status_code == 200
+    assert api.get(f"/api/projects/{created['id']}").status_code == 404
+    assert api.delete(f"/api/projects/{created['id']}", headers=ADMIN).status_code == 404
+    assert api.put("/api/projects/missing", json={"title": "x"}, headers=ADMIN).status_code == 404
+
+
+def test_bulk_rejects_an_overlong_line(api, seeded_db, monkeypatch):
+    monkeypatch.setattr(server, "PROJECTS_BULK_MAX_LINE_BYTES", 1024)
+    body = _ndjson([_item("قصير"), _item("طويل", description="و" * 1024)])
+    response = api.post("/api/projects/bulk", content=body, headers=ADMIN)
+    assert response.status_code == 413 and "2" in response.json()["detail"]
+
+    # A line that never ends is rejected once the limit is passed, without reading the rest
+    read = []
+
+    async def unterminated():
+        for _ in range(100):
+            read.append(1)
+            yield b"x" * 512
+
+    async def drain():
+        return [line async for line in server.ndjson_lines(unterminated())]
+
+    with pytest.raises(server.HTTPException) as raised:
+        asyncio.run(drain())
+    assert raised.value.status_code == 413 and len(read) == 3
+
+
+def test_delete_moves_the_list_last_modified_forward(api, seeded_db):
+    for doc in seeded_db.projects.docs:
+        doc["updated_at"] = datetime.utcnow() - timedelta(days=1)
+    server.read_cache.clear()
+    first = api.get("/api/projects")
+    last_modified = first.headers["last-modified"]
+    assert api.get("/api/projects", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    assert api.delete(f"/api/projects/{first.json()['items'][0]['id']}", headers=ADMIN).status_code == 200
+    again = api.get("/api/projects", headers={"If-Modified-Since": last_modified})
+    assert again.status_code == 200 and len(again.json()["items"]) == len(first.json()["items"]) - 1
+
+
+def test_bulk_ndjson_is_chunked_and_reported_per_line(api, seeded_db, monkeypatch):
+    monkeypatch.setattr(server, "PROJECTS_BULK_CHUNK_SIZE", 200)
+    # The unique id index rejects duplicate inserts
+    asyncio.run(server.storage.ensure_indexes())
+    seeded_db.calls.clear()
+    before = api.get("/api/categories").json()
+    etag = api.get("/api/projects").headers["etag"]
+    version = api.get("/api/cache/stats").json()["projects_version"]
+    existing = api.get("/api/projects", params={"legacy": "true"}).json()[0]["id"]
+
+    items = [_item(f"مشروع {i}", id=f"behance-{i}") for i in range(500)]
+    items[10] = {"title": "بلا فئة"}
+    items[20] = _item("مكرر", id=existing)
+    body = _ndjson(items) + b"not json\n" + orjson.dumps({"delete": "behance-0"}) + b"\n"
+    report = api.post("/api/projects/bulk", content=body, headers=ADMIN).json()
+
+    assert (report["created"], report["updated"], report["deleted"], report["failed"]) == (498, 1, 1, 2)
+    assert [result["line"] for result in report["results"]] == list(range(1, 503))
+    assert report["results"][10]["status"] == "failed" and "category" in report["results"][10]["error"]
+    assert report["results"][20] == {"line": 21, "id": existing, "status": "updated"}
+    # The stored write count, one per chunk that wrote something
+    assert report["version"] == version + 3 == asyncio.run(server.storage.projects.version())
+    # 500 writes in three unordered chunks
+    assert seeded_db.count_calls("projects", "bulkWrite") == 3
+
+    # Reads see the new content right away
+    assert api.get("/api/projects").headers["etag"] != etag
+    counts = api.get("/api/categories").json()["counts"]
+    # The replaced project moved into the imported category too
+    assert counts["أرشيف"] == 498
+    assert counts["الكل"] == before["counts"]["الكل"] + 497
+    assert api.get("/api/projects/behance-0").status_code == 404
+    # Like DELETE /api/projects/{id}, deleting a missing project fails
+    stats = api.get("/api/cache/stats").json()
+    gone = api.post("/api/projects/bulk", content=orjson.dumps({"delete": "behance-0"}), headers=ADMIN).json()
+    assert (gone["deleted"], gone["failed"]) == (0, 1) and "not found" in gone["results"][0]["error"]
+    # Nothing was written, so nothing was counted or invalidated
+    assert gone["version"] == report["version"]
+    assert api.get("/api/cache/stats").json()["content_version"] == stats["content_version"]
+
+    # Re-running the import replaces instead of duplicating, and keeps the keyset order
+    order = [project["id"] for project in api.get("/api/projects", params={"legacy": "true"}).json()]
+    again = api.post("/api/projects/bulk", content=_ndjson(items[30:40]), headers=ADMIN).json()
+    assert again["updated"] == 10 and again["created"] == 0
+    assert [project["id"] for project in api.get("/api/projects", params={"legacy": "true"}).json()] == order
+    search = api.get("/api/projects/search", params={"q": "مشروع 35"}).json()["items"]
+    stored = api.get("/api/projects/behance-35").json()
+    assert next(project for project in search if project["id"] == "behance-35")["created_at"] == stored["created_at"]
+
+
+def test_writes_from_another_process_refresh_the_indexes(api, seeded_db, monkeypatch):
+    rebuilds = []
+    rebuild = server.rebuild_project_indexes
+    monkeypatch.setattr(server, "rebuild_project_indexes", lambda: rebuilds.append(1) or rebuild())
+
+    # This process's own writes are already indexed
+    api.post("/api/projects", json=_item("محلي"), headers=ADMIN)
+    asyncio.run(server.refresh_project_indexes())
+    assert rebuilds == []
+    etag = api.get("/api/projects").headers["etag"]
+
+    async def other_worker_writes():
+        other = MongoStorage(seeded_db)
+        await other.projects.bulk_write([("insert", server.Project(**_item("من عامل آخر")).dict())])
+        await other.projects.bump_version()
+        await server.refresh_project_indexes()
+
+    asyncio.run(other_worker_writes())
+    assert rebuilds == [1]
+    assert [item["title"] for item in api.get("/api/projects/search", params={"q": "عامل"}).json()["items"]] == ["من عامل آخر"]
+    assert api.get("/api/projects").headers["etag"] != etag
+    asyncio.run(server.refresh_project_indexes())
+    assert rebuilds == [1]
+
+
+def test_render_started_before_a_write_is_not_cached(seeded_db, monkeypatch):
+    seeded_db.latency = 0.05
+    monkeypatch.setattr(server, "project_facets", None)
+
+    async def scenario():
+        stale = asyncio.create_task(server.load_categories(("year",)))
+        await asyncio.sleep(0.01)
+        server.notify_collection_changed("projects")
+        await stale
+        return server.read_cache.get(server.cache_key("categories", facets="year"))
+
+    found, _ = asyncio.run(scenario())
+    assert not found
@@ -0,0 +1,115 @@
+import asyncio
+import random
+import threading
+
+import numpy as np
+
+import server
+from related import RelatedIndex
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+def _project(project_id, category, *tags):
+    return {"id": project_id, "category": category, "tags": list(tags)}
+
+
+def test_ranks_by_tag_and_category_overlap():
+    index = RelatedIndex.build([
+        _project("logo", "هوية", "شعار", "مطعم", "قائمة"),
+        _project("menu", "هوية", "شعار", "مطعم"),
+        _project("sign", "مطبوعات", "مطعم"),
+        _project("post", "تواصل", "انستغرام"),
+    ], top_k=3)
+    assert index.related("logo") == ["menu", "sign"]
+    assert index.related("logo", limit=1) == ["menu"]
+    assert index.related("post") == []
+    assert index.related("missing") is None
+
+
+def _scores(index, project_id):
+    return index._top_scores[index._rows[project_id]]
+
+
+def test_incremental_updates_match_a_rebuild():
+    rng = random.Random(3)
+    tags = [f"t{i}" for i in range(12)]
+    categories = ["a", "b", "c"]
+
+    def random_project(project_id):
+        return _project(project_id, rng.choice(categories), *rng.sample(tags, rng.randint(0, 4)))
+
+    projects = {f"p{i}": random_project(f"p{i}") for i in range(200)}
+    index = RelatedIndex.build(projects.values(), top_k=5)
+    for step in range(30):
+        changed = [random_project(rng.choice(list(projects))) for _ in range(rng.randint(0, 5))]
+        changed += [random_project(f"new{step}-{i}") for i in range(rng.randint(0, 3))]
+        removed = rng.sample([pid for pid in projects if pid not in {p["id"] for p in changed}], rng.randint(0, 3))
+        index.update(changed, removed)
+        projects.update((project["id"], project) for project in changed)
+        for project_id in removed:
+            del projects[project_id]
+
+    rebuilt = RelatedIndex.build(projects.values(), top_k=5)
+    assert len(index) == len(projects)
+    for project_id in projects:
+        assert np.allclose(_scores(index, project_id), _scores(rebuilt, project_id)), project_id
+        assert set(index.related(project_id)) <= set(projects)
+
+
+def test_chunked_selection_matches_a_full_sort():
+    rng = random.Random(5)
+    tags = [f"t{i}" for i in range(20)]
+    projects = [_project(f"p{i}", rng.choice("abcd"), *rng.sample(tags, rng.randint(0, 5))) for i in range(2000)]
+    index = RelatedIndex.build(projects, top_k=5)
+
+    matrix = np.zeros((len(projects), len(index._vocab)), dtype=np.float32)
+    for row, columns in enumerate(index._columns):
+        matrix[row, columns] = index._weights[row]
+    scores = matrix @ matrix.T
+    np.fill_diagonal(scores, 0)
+    expected = -np.sort(-scores, axis=1)[:, :5]
+    assert np.allclose(index._top_scores[:len(projects)], expected)
+
+
+def test_related_route_follows_writes(api, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    projects = api.get("/api/projects", params={"legacy": "true"}).json()
+    project = projects[0]
+
+    related = api.get(f"/api/projects/{project['id']}/related").json()
+    assert project["id"] not in [item["id"] for item in related]
+    assert api.get("/api/projects/missing/related").status_code == 404
+
+    twin = {key: project[key] for key in ("description", "category", "image", "tags", "client", "year")}
+    twin["title"] = "نسخة"
+    created = api.post("/api/projects", json=twin, headers=ADMIN).json()
+    assert api.get(f"/api/projects/{project['id']}/related", params={"limit": 1}).json()[0]["id"] == created["id"]
+
+    api.delete(f"/api/projects/{created['id']}", headers=ADMIN)
+    assert created["id"] not in [item["id"] for item in api.get(f"/api/projects/{project['id']}/related").json()]
+
+
+def test_updates_run_off_the_loop_and_follow_a_rebuild(api, monkeypatch):
+    before = server.related_index
+    project = dict(api.get("/api/projects", params={"legacy": "true"}).json()[0], id="twin")
+    threads = []
+    update = RelatedIndex.update
+    monkeypatch.setattr(RelatedIndex, "update",
+                        lambda index, *args: threads.append(threading.current_thread()) or update(index, *args))
+
+    async def update_racing_a_rebuild():
+        loop_thread = threading.current_thread()
+        # A rebuild swaps in a new index while the update runs; the update is applied to that one as well
+        pending = asyncio.create_task(server.update_related_index([project]))
+        await asyncio.sleep(0)
+        server.related_index = RelatedIndex.build(server.search_index.documents.values())
+        await pending
+        return loop_thread
+
+    loop_thread = asyncio.run(update_racing_a_rebuild())
+    assert len(threads) == 2 and loop_thread not in threads
+    # Updated in place rather than copied
+    assert before.related("twin")
+    assert server.related_index is not before
+    assert server.related_index.related("twin")
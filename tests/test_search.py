@@ -0,0 +1,66 @@
+import asyncio
+
+import server
+from search import SearchIndex, normalize_arabic, tokenize
+
+
+def test_normalize_arabic():
+    assert normalize_arabic("الْهُوِيَّةُ") == "الهويه"
+    assert normalize_arabic("جمـــيل") == "جميل"
+    assert normalize_arabic("أإآٱ") == "اااا"
+    assert normalize_arabic("مصطفى مدرسة") == "مصطفي مدرسه"
+
+
+def test_tokenize_strips_article():
+    assert tokenize("والهوية البصرية") == ["هويه", "بصريه"]
+
+
+def test_ranking_prefers_title_matches():
+    index = SearchIndex()
+    index.add("a", {"title": "كتالوج", "description": "تصميم شعار للمتجر"})
+    index.add("b", {"title": "تصميم شعار", "description": "هوية"})
+    _, hits = index.search("شعار")
+    assert [doc_id for doc_id, _ in hits] == ["b", "a"]
+
+
+def test_incremental_update_and_remove():
+    index = SearchIndex()
+    index.add("a", {"title": "مقهى"})
+    index.add("a", {"title": "مطعم"})
+    assert index.search("مقهى") == (0, [])
+    assert index.search("مطعم")[0] == 1
+    index.remove("a")
+    assert index.search("مطعم") == (0, [])
+    assert len(index) == 0
+
+
+def test_documents_without_text():
+    index = SearchIndex()
+    index.add("a", {"title": "", "tags": []})
+    assert index.search("شعار") == (0, [])
+
+
+def test_search_route(api, seeded_db):
+    asyncio.run(server.rebuild_project_indexes())
+    seeded_db.calls.clear()
+
+    body = api.get("/api/projects/search", params={"q": "الهويّة"}).json()
+    assert body["total"] >= 3
+    assert "هوية" in body["items"][0]["title"]
+
+    prefix = api.get("/api/projects/search", params={"q": "مقه"}).json()
+    assert [p["client"] for p in prefix["items"]] == ["مقهى الإبداع"]
+
+    filtered = api.get("/api/projects/search", params={"q": "شعار", "category": "مطبوعات"}).json()
+    assert filtered["total"] == 0
+    assert seeded_db.calls == []
+
+
+def test_search_route_handles_index_failures(api, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("index corrupted")
+
+    monkeypatch.setattr(server.search_index, "search", broken)
+    response = api.get("/api/projects/search", params={"q": "شعار"})
+    assert response.status_code == 500
+    assert response.json() == {"detail": "خطأ في البحث عن المشاريع"}
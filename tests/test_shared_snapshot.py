@@ -0,0 +1,114 @@
+import asyncio
+import gzip
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import server
+from shared_snapshot import SharedSnapshot
+from tests.conftest import BACKEND_DIR
+
+
+@pytest.fixture
+def shared(seeded_db, tmp_path, monkeypatch):
+    shared = SharedSnapshot(tmp_path / "shared", server.shared_snapshot_files)
+    monkeypatch.setattr(server, "shared_snapshot", shared)
+    return shared
+
+
+def _add_project(shared, title):
+    async def write():
+        project = server.Project(title=title, description="وصف", category="مطبوعات", image="x", tags=[],
+                                 client="عميل", year="2025").model_dump()
+        await server.storage.projects.insert_many([project])
+        # The write hook republishes
+        server.notify_collection_changed("projects")
+        await shared.wait()
+
+    asyncio.run(write())
+
+
+def test_workers_read_what_another_published(api, shared):
+    assert shared.get("projects.json") is None
+    assert asyncio.run(shared.publish()) == 1
+    # Unchanged content does not bump the version
+    assert asyncio.run(shared.publish()) == 1
+
+    worker = SharedSnapshot(shared.directory, render=None)
+    mapped = worker.get("projects.json")
+    expected = api.get("/api/projects", params={"legacy": "true"}, headers={"Accept-Encoding": "identity"})
+    assert mapped.body == expected.content
+    assert mapped.etag == expected.headers["etag"]
+    assert gzip.decompress(mapped.encoded("gzip")) == expected.content
+    assert worker.get("categories.json").body == api.get("/api/categories").content
+    # Project details are cut from the full list but match what the route renders from storage
+    project_id = expected.json()[0]["id"]
+    detail = asyncio.run(server.load_project(project_id))
+    assert (worker.get(f"projects/{project_id}.json").body, worker.get(f"projects/{project_id}.json").etag) == \
+        (detail.body, detail.etag)
+
+    _add_project(shared, "مشروع جديد")
+    assert shared.version == 2
+    assert "مشروع جديد".encode("utf-8") in worker.get("projects.json").body
+    assert worker.stats()["version"] == 2
+
+
+def test_other_process_sees_new_versions(api, shared):
+    asyncio.run(shared.publish())
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {str(BACKEND_DIR)!r})
+        from shared_snapshot import SharedSnapshot
+        worker = SharedSnapshot({str(shared.directory)!r}, render=None)
+        print(worker.version, len(worker.get("projects.json").body))
+    """)
+    version, size = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                   check=True).stdout.split()
+    assert int(version) == 1
+    assert int(size) == len(shared.get("projects.json").body)
+
+
+def test_single_leader(shared):
+    async def scenario():
+        first = SharedSnapshot(shared.directory, server.snapshot_files)
+        second = SharedSnapshot(shared.directory, server.snapshot_files)
+        first.start()
+        second.start()
+        await asyncio.sleep(0.01)
+        await first.wait()
+        leaders = (first.is_leader, second.is_leader)
+        version = first.version
+        await first.stop()
+        await second.stop()
+        return leaders, version
+
+    leaders, version = asyncio.run(scenario())
+    assert leaders == (True, False)
+    assert version == 1
+
+
+def test_routes_answer_from_the_mapping(api, shared, monkeypatch):
+    asyncio.run(shared.publish())
+
+    async def unavailable(*args, **kwargs):
+        raise RuntimeError("mongo down")
+
+    monkeypatch.setattr(server.storage.projects, "list", unavailable)
+    monkeypatch.setattr(server.storage.projects, "categories", unavailable)
+    server.read_cache.clear()
+
+    first = api.get("/api/projects")
+    assert first.status_code == 200
+    assert api.get("/api/projects", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    assert api.get("/api/categories").status_code == 200
+    assert api.get("/api/projects", params={"limit": 5}).status_code == 500
+
+    # Full project details too; sparse fieldsets still go to storage
+    project_id = first.json()["items"][0]["id"]
+    monkeypatch.setattr(server.storage.projects, "get", unavailable)
+    detail = api.get(f"/api/projects/{project_id}")
+    assert detail.status_code == 200 and detail.json()["id"] == project_id
+    assert api.get(f"/api/projects/{project_id}", headers={"If-None-Match": detail.headers["etag"]}).status_code == 304
+    assert api.get(f"/api/projects/{project_id}", params={"fields": "title"}).status_code == 500
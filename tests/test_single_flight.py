@@ -0,0 +1,93 @@
+import asyncio
+
+import httpx
+import pytest
+
+import server
+from cache import SingleFlight, TTLCache
+
+CONCURRENCY = 500
+
+
+@pytest.fixture
+def slow_db(seeded_db, monkeypatch):
+    # Queries take long enough for every request to arrive while the first is in flight
+    seeded_db.latency = 0.2
+    monkeypatch.setattr(server, "read_cache", TTLCache(maxsize=0))
+    monkeypatch.setattr(server, "in_flight", SingleFlight())
+    # Categories then need the one scan that builds the facet counts
+    monkeypatch.setattr(server, "project_facets", None)
+    return seeded_db
+
+
+def _burst(path, params=None):
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get(path, params=params) for _ in range(CONCURRENCY)))
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("path, params, operation", [
+    ("/api/projects", {"category": "وسائل التواصل"}, "find"),
+    ("/api/categories", None, "find"),
+])
+def test_concurrent_reads_share_one_query(slow_db, path, params, operation):
+    responses = _burst(path, params)
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.content for response in responses}) == 1
+    assert slow_db.count_calls("projects", operation) == 1
+    assert server.in_flight.stats()["in_flight"] == 0
+    assert server.in_flight.stats()["joined"] >= CONCURRENCY - 1
+
+
+def test_concurrent_project_reads_share_one_query(slow_db):
+    project_id = asyncio.run(server.storage.projects.list(limit=1, fields=("id",)))[0]["id"]
+    slow_db.calls.clear()
+    responses = _burst(f"/api/projects/{project_id}")
+    assert {response.json()["id"] for response in responses} == {project_id}
+    assert slow_db.count_calls("projects", "find_one") == 1
+
+    # Misses are shared too, and every waiter gets the 404
+    slow_db.calls.clear()
+    assert {response.status_code for response in _burst("/api/projects/missing")} == {404}
+    assert slow_db.count_calls("projects", "find_one") == 1
+
+
+def test_failures_reach_every_caller_and_are_not_kept():
+    flights = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("mongo down")
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.run("key", fail) for _ in range(10)), return_exceptions=True)
+        # The next call after the flight landed starts over
+        retry = await asyncio.gather(flights.run("key", fail), return_exceptions=True)
+        return results + retry
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(calls) == 2
+    assert len(flights) == 0
+
+
+def test_one_caller_cancelling_does_not_cancel_the_others():
+    flights = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "rendered"
+
+    async def scenario():
+        first = asyncio.create_task(flights.run("key", fetch))
+        second = asyncio.create_task(flights.run("key", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "rendered"
@@ -0,0 +1,91 @@
+import asyncio
+import gzip
+import json
+import os
+
+import pytest
+
+import server
+from snapshot import SnapshotPublisher, projects_file
+
+
+@pytest.fixture
+def publisher(seeded_db, tmp_path, monkeypatch):
+    publisher = SnapshotPublisher(tmp_path / "snapshot", server.snapshot_files)
+    monkeypatch.setattr(server, "snapshot_publisher", publisher)
+    return publisher
+
+
+def test_snapshot_matches_the_api(api, publisher):
+    version = asyncio.run(publisher.publish())
+    current = publisher.directory / "current"
+    assert os.readlink(current) == f"v-{version}"
+
+    assert (current / "projects.json").read_bytes() == api.get("/api/projects", params={"legacy": "true"}).content
+    assert (current / "projects-page.json").read_bytes() == api.get("/api/projects").content
+    assert (current / "categories.json").read_bytes() == api.get("/api/categories").content
+    assert (current / "config.json").read_bytes() == api.get("/api/config").content
+    page = current / projects_file("وسائل التواصل", paged=True)
+    assert page.read_bytes() == api.get("/api/projects", params={"category": "وسائل التواصل"}).content
+    assert gzip.decompress((current / "projects.json.gz").read_bytes()) == (current / "projects.json").read_bytes()
+    manifest = json.loads((current / "manifest.json").read_text("utf-8"))
+    assert manifest["version"] == version
+
+
+def test_republish_only_on_change_and_prunes(api, publisher):
+    first = asyncio.run(publisher.publish())
+    assert asyncio.run(publisher.publish()) == first
+
+    async def write_and_publish(title):
+        project = server.Project(title=title, description="وصف", category="مطبوعات", image="x", tags=[],
+                                 client="عميل", year="2025").dict()
+        await server.storage.projects.insert_many([project])
+        server.notify_collection_changed("projects")
+        await publisher.wait()
+        return publisher.version
+
+    second = asyncio.run(write_and_publish("مشروع جديد"))
+    third = asyncio.run(write_and_publish("مشروع آخر"))
+    assert len({first, second, third}) == 3
+    assert sorted(path.name for path in publisher.directory.glob("v-*")) == sorted([f"v-{second}", f"v-{third}"])
+
+
+def test_routes_serve_snapshot(api, publisher, monkeypatch):
+    asyncio.run(publisher.publish())
+    expected = api.get("/api/projects").content
+
+    async def unavailable(*args, **kwargs):
+        raise RuntimeError("mongo down")
+
+    monkeypatch.setattr(server.storage.projects, "list", unavailable)
+    server.read_cache.clear()
+
+    # Storage failures fall back to the snapshot
+    fallback = api.get("/api/projects", headers={"Accept-Encoding": "identity"})
+    assert fallback.status_code == 200
+    assert fallback.content == expected
+    # Requests the snapshot cannot answer still fail
+    assert api.get("/api/projects", params={"limit": 5}).status_code == 500
+
+    # With SNAPSHOT_SERVE the file is served first, precompressed when accepted
+    monkeypatch.setattr(server, "SNAPSHOT_SERVE", True)
+    served = api.get("/api/projects", params={"legacy": "true"}, headers={"Accept-Encoding": "gzip"})
+    assert served.headers["content-encoding"] == "gzip"
+    assert json.loads(served.content) == json.loads((publisher.directory / "current" / "projects.json").read_bytes())
+
+
+def test_snapshot_answers_conditional_requests(api, publisher, monkeypatch):
+    asyncio.run(publisher.publish())
+    monkeypatch.setattr(server, "SNAPSHOT_SERVE", True)
+    for path in ("/api/projects", "/api/config"):
+        served = api.get(path, headers={"Accept-Encoding": "gzip"})
+        assert served.status_code == 200
+        etag, last_modified = served.headers["etag"], served.headers.get("last-modified")
+        assert api.get(path, headers={"If-None-Match": etag}).status_code == 304
+        assert api.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
+        if last_modified:
+            assert api.get(path, headers={"If-Modified-Since": last_modified}).status_code == 304
+    # Same validators as the live route, so revalidation survives switching between the two
+    live = api.get("/api/projects", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    monkeypatch.setattr(server, "SNAPSHOT_SERVE", False)
+    assert api.get("/api/projects", headers={"Accept-Encoding": "identity"}).headers["etag"] == live
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+import server
+
+
+def test_workers_seeding_together_insert_each_default_once(fake_db, monkeypatch):
+    fake_db.latency = 0.001
+
+    async def workers():
+        # Every worker sees empty collections before any of them has inserted
+        return await asyncio.gather(*(server.init_default_data() for _ in range(4)))
+
+    seeded = asyncio.run(workers())
+    assert sum(result["projects"] for result in seeded) == 6
+    assert sum(result["site_config"] for result in seeded) == 1
+    assert len(fake_db.projects.docs) == 6
+    assert len(fake_db.site_config.docs) == 1
+    assert asyncio.run(server.init_default_data()) == {"projects": 0, "site_config": 0}
+
+
+def test_lifespan_warms_seeds_and_reports_ready(fake_db, monkeypatch):
+    monkeypatch.setattr(server, "startup_status", {"indexes": "pending", "seed": "pending", "started": "pending"})
+    client = TestClient(server.app)
+    assert client.get("/healthz").json() == {"status": "ok"}
+    assert client.get("/readyz").status_code == 503
+
+    with TestClient(server.app) as started:
+        # The warm-up ping ran before the first request
+        assert fake_db.count_calls() > 0
+        ready = started.get("/readyz")
+        assert ready.status_code == 200
+        body = ready.json()
+        assert body["ready"] is True
+        assert body["storage"]["ok"] is True and body["storage"]["ping_ms"] >= 0
+        assert (body["indexes"], body["seed"]) == ("ready", "ready")
+        assert fake_db.site_config.indexes["id_unique"]["unique"] is True
+        assert len(started.get("/api/projects", params={"legacy": "true"}).json()) == 6
+
+
+def test_failed_seed_is_retried_until_ready(fake_db, monkeypatch):
+    monkeypatch.setattr(server, "startup_status", {"indexes": "pending", "seed": "pending", "started": "pending"})
+    monkeypatch.setattr(server, "SEED_RETRY_SECONDS", 0.05)
+    seed = server.init_default_data
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("no primary")
+        return await seed()
+
+    monkeypatch.setattr(server, "init_default_data", flaky)
+    with TestClient(server.app) as started:
+        assert started.get("/readyz").json()["seed"] == "failed"
+        for _ in range(100):
+            if started.get("/readyz").status_code == 200:
+                break
+            time.sleep(0.01)
+        assert started.get("/readyz").json()["seed"] == "ready"
+        assert len(attempts) == 3
+        assert len(started.get("/api/projects", params={"legacy": "true"}).json()) == 6
+
+
+def test_readyz_fails_when_storage_does_not_answer(api, monkeypatch):
+    monkeypatch.setattr(server, "startup_status", {"indexes": "ready", "seed": "ready", "started": "ready"})
+    assert api.get("/readyz").status_code == 200
+
+    async def unreachable():
+        raise ConnectionError("no primary")
+
+    monkeypatch.setattr(server.storage, "ping", unreachable)
+    response = api.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["storage"] == {"backend": "mongo", "ok": False, "ping_ms": None, "error": "no primary"}
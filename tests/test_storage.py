@@ -0,0 +1,235 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from cache import TTLCache
+from storage import MemoryStorage, MongoStorage, SQLiteStorage, open_storage
+from tests.fake_mongo import FakeDatabase
+
+BASE = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def _projects(count):
+    return [
+        {
+            "id": f"p{i:03d}",
+            "title": f"مشروع {i}",
+            "description": "وصف",
+            "category": "مطبوعات" if i % 3 == 0 else "الهوية البصرية",
+            "image": "https://example.com/p.png",
+            "tags": ["شعار"],
+            "status": "مكتمل",
+            "client": "عميل",
+            "year": "2024",
+            # Pairs of rows share a timestamp so the id tie-break is exercised
+            "created_at": BASE + timedelta(minutes=i // 2),
+            "updated_at": BASE + timedelta(minutes=i // 2),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(params=["mongo", "sqlite", "memory"])
+def storage(request, tmp_path):
+    if request.param == "mongo":
+        backend = MongoStorage(FakeDatabase())
+    elif request.param == "sqlite":
+        backend = SQLiteStorage(str(tmp_path / "portfolio.sqlite3"))
+    else:
+        backend = MemoryStorage()
+    yield backend
+    asyncio.run(backend.close())
+
+
+def test_project_repository_contract(storage):
+    async def scenario():
+        await storage.ensure_indexes()
+        await storage.projects.insert_many(_projects(20))
+        newest_first = await storage.projects.list()
+        first_page = await storage.projects.list(limit=7, fields=("id", "created_at"))
+        last = first_page[-1]
+        second_page = await storage.projects.list(after=(last["created_at"], last["id"]), limit=7)
+        by_category = await storage.projects.list("مطبوعات")
+        project = await storage.projects.get("p005", ("id", "title"))
+        missing = await storage.projects.get("nope")
+        exported = [row["id"] async for row in storage.projects.export(BASE + timedelta(minutes=8))]
+        return (newest_first, first_page, second_page, by_category, project, missing, exported,
+                await storage.projects.count(), await storage.projects.categories())
+
+    newest_first, first_page, second_page, by_category, project, missing, exported, count, categories = (
+        asyncio.run(scenario())
+    )
+    expected = sorted(_projects(20), key=lambda p: (p["created_at"], p["id"]), reverse=True)
+    assert [p["id"] for p in newest_first] == [p["id"] for p in expected]
+    assert newest_first[0] == expected[0]
+    assert first_page[0] == {"id": "p019", "created_at": expected[0]["created_at"]}
+    assert [p["id"] for p in first_page + second_page] == [p["id"] for p in expected[:14]]
+    assert {p["category"] for p in by_category} == {"مطبوعات"} and len(by_category) == 7
+    assert project == {"id": "p005", "title": "مشروع 5"}
+    assert missing is None
+    assert exported == [f"p{i:03d}" for i in range(16, 20)]
+    assert count == 20
+    assert categories == ["الهوية البصرية", "مطبوعات"]
+
+
+def test_contact_and_config_repositories(storage):
+    async def scenario():
+        await storage.contact_messages.insert_one({"id": "c1", "status": "new", "created_at": BASE})
+        await storage.contact_messages.insert_many([
+            {"id": "c2", "status": "new", "created_at": BASE + timedelta(seconds=1)},
+            {"id": "c0", "status": "read", "created_at": BASE - timedelta(seconds=1)},
+        ])
+        exported = [row["id"] async for row in storage.contact_messages.export(None)]
+        empty = await storage.site_config.get()
+        await storage.site_config.insert_one({"id": "cfg", "designer_name": "مصمم", "updated_at": BASE})
+        config = await storage.site_config.get(("designer_name", "updated_at"))
+        return exported, await storage.contact_messages.count(), empty, config
+
+    exported, count, empty, config = asyncio.run(scenario())
+    assert exported == ["c0", "c1", "c2"]
+    assert count == 3
+    assert empty is None
+    assert config == {"designer_name": "مصمم", "updated_at": BASE}
+
+
+def test_sqlite_hot_queries_use_indexes(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "portfolio.sqlite3"))
+
+    async def scenario():
+        await storage.ensure_indexes()
+        report = await storage.explain_hot_queries()
+        await storage.close()
+        return report
+
+    report = asyncio.run(scenario())
+    assert [row["query"] for row in report if row["collscan"]] == []
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "memory"])
+def test_app_serves_from_non_mongo_storage(backend, tmp_path, monkeypatch):
+    environ = {"STORAGE_BACKEND": backend, "SQLITE_PATH": str(tmp_path / "edge.sqlite3")}
+    storage = open_storage(environ)
+    monkeypatch.setattr(server, "storage", storage)
+    monkeypatch.setattr(server, "read_cache", TTLCache(maxsize=16))
+    monkeypatch.setattr(server, "contact_dedup", TTLCache(maxsize=16))
+    asyncio.run(server.init_default_data())
+    asyncio.run(storage.projects.insert_many(_projects(30)))
+
+    api = TestClient(server.app)
+    page = api.get("/api/projects", params={"limit": 10}).json()
+    following = api.get("/api/projects", params={"limit": 10, "cursor": page["next_cursor"]}).json()
+    everything = api.get("/api/projects", params={"legacy": "true"}).json()
+    assert [p["id"] for p in page["items"] + following["items"]] == [p["id"] for p in everything[:20]]
+    assert api.get(f"/api/projects/{everything[0]['id']}").json() == everything[0]
+    assert api.get("/api/config").json()["designer_name"]
+    assert api.post("/api/contact", json={
+        "name": "سارة", "email": "sara@example.com", "subject": "استفسار", "message": "مرحبا",
+    }).status_code == 200
+    assert asyncio.run(storage.contact_messages.count()) == 1
+    asyncio.run(storage.close())
+
+
+def test_legacy_rows_get_model_defaults(api, seeded_db):
+    legacy = {key: value for key, value in seeded_db.projects.docs[0].items() if key not in ("status", "srcset")}
+    seeded_db.projects.docs.append(dict(legacy, _id="legacy", id="legacy"))
+    project = api.get("/api/projects/legacy").json()
+    assert project["status"] == "مكتمل" and project["srcset"] is None
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        open_storage({"STORAGE_BACKEND": "redis"})
+
+
+def test_bulk_write_reports_each_write(storage):
+    async def scenario():
+        await storage.ensure_indexes()
+        await storage.projects.insert_many(_projects(3))
+        changed = dict(_projects(3)[1], title="معدل")
+        results = await storage.projects.bulk_write([
+            ("insert", _projects(4)[3]),
+            ("insert", _projects(1)[0]),
+            ("replace", changed),
+            ("replace", dict(_projects(6)[5])),
+            ("delete", "p002"),
+            ("delete", "p404"),
+        ])
+        return results, [p["id"] for p in await storage.projects.list()], await storage.projects.get("p001")
+
+    results, ids, changed = asyncio.run(scenario())
+    assert [outcome for outcome, _ in results] == ["created", "failed", "updated", "created", "deleted", "failed"]
+    assert results[1][1]
+    assert "not found" in results[5][1]
+    assert sorted(ids) == ["p000", "p001", "p003", "p005"]
+    assert changed["title"] == "معدل"
+
+
+def test_replace_without_created_at_keeps_the_stored_one(storage):
+    async def scenario():
+        await storage.ensure_indexes()
+        await storage.projects.insert_many(_projects(3))
+        replaced = {name: value for name, value in _projects(3)[0].items() if name != "created_at"}
+        created = {name: value for name, value in _projects(4)[3].items() if name != "created_at"}
+        results = await storage.projects.bulk_write([("replace", dict(replaced, title="معدل")), ("replace", created)])
+        return results, await storage.projects.get("p000"), await storage.projects.list(), created
+
+    results, stored, newest_first, created = asyncio.run(scenario())
+    assert [outcome for outcome, _ in results] == ["updated", "created"]
+    assert stored["title"] == "معدل" and stored["created_at"] == BASE
+    assert [p["id"] for p in newest_first] == ["p003", "p002", "p001", "p000"]
+    assert created["created_at"] > BASE
+
+
+def test_write_version_is_shared(storage):
+    async def scenario():
+        before = await storage.projects.version(), await storage.projects.modified()
+        started = datetime.utcnow() - timedelta(seconds=1)
+        counts = [await storage.projects.bump_version() for _ in range(3)]
+        modified = await storage.projects.modified()
+        return before, counts, await storage.projects.version(), modified is not None and modified >= started
+
+    assert asyncio.run(scenario()) == ((0, None), [1, 2, 3], 3, True)
+
+
+def test_insert_missing_never_overwrites(storage):
+    async def scenario():
+        await storage.ensure_indexes()
+        await storage.projects.insert_many([dict(_projects(1)[0], title="معدل")])
+        inserted = await storage.projects.insert_missing(_projects(3))
+        again = await storage.projects.insert_missing(_projects(3))
+        config = {"id": "cfg", "designer_name": "مصمم", "updated_at": BASE}
+        configs = [await storage.site_config.insert_missing(config),
+                   await storage.site_config.insert_missing(dict(config, designer_name="آخر"))]
+        return (inserted, again, configs, await storage.projects.count(), (await storage.projects.get("p000"))["title"],
+                await storage.site_config.count(), (await storage.site_config.get())["designer_name"])
+
+    assert asyncio.run(scenario()) == (2, 0, [True, False], 3, "معدل", 1, "مصمم")
+
+
+def test_contact_inbox_pages_and_status_moves(storage):
+    messages = [
+        {"id": f"c{i:03d}", "status": "new" if i % 2 else "read", "created_at": BASE + timedelta(seconds=i // 2)}
+        for i in range(30)
+    ]
+
+    async def scenario():
+        await storage.ensure_indexes()
+        await storage.contact_messages.insert_many(messages)
+        first = await storage.contact_messages.list(limit=10)
+        last = first[-1]
+        second = await storage.contact_messages.list(after=(last["created_at"], last["id"]), limit=10)
+        unread = await storage.contact_messages.list("new", fields=("id", "status"))
+        moved = await storage.contact_messages.set_status(["c001", "c002", "c003", "missing"], "replied", ("new", "read"))
+        again = await storage.contact_messages.set_status(["c001"], "read", ("new",))
+        return first, second, unread, moved, again, await storage.contact_messages.get("c001")
+
+    first, second, unread, moved, again, message = asyncio.run(scenario())
+    expected = sorted(messages, key=lambda m: (m["created_at"], m["id"]), reverse=True)
+    assert [m["id"] for m in first + second] == [m["id"] for m in expected[:20]]
+    assert len(unread) == 15 and {m["status"] for m in unread} == {"new"}
+    assert unread[0] == {"id": "c029", "status": "new"}
+    assert (moved, again) == (3, 0)
+    assert message["status"] == "replied"
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+import server
+from tests.fake_mongo import FakeDatabase
+from write_behind import QueueFull, WriteBehindQueue
+
+
+def test_flushes_by_size_and_on_stop():
+    async def scenario():
+        db = FakeDatabase()
+        queue = WriteBehindQueue(lambda: db.contact_messages, max_size=100, batch_size=10, flush_interval=60)
+        queue.start()
+        for i in range(25):
+            queue.submit({"n": i})
+        await asyncio.sleep(0.01)
+        assert len(db.contact_messages.docs) == 20
+        await queue.stop()
+        return db, queue
+
+    db, queue = asyncio.run(scenario())
+    assert sorted(d["n"] for d in db.contact_messages.docs) == list(range(25))
+    assert db.count_calls("contact_messages", "insert") == 3
+    assert queue.stats()["written"] == 25
+
+
+def test_flushes_by_time_window():
+    async def scenario():
+        db = FakeDatabase()
+        queue = WriteBehindQueue(lambda: db.contact_messages, batch_size=100, flush_interval=0.02)
+        queue.start()
+        queue.submit({"n": 1})
+        await asyncio.sleep(0.1)
+        written = len(db.contact_messages.docs)
+        await queue.stop()
+        return written
+
+    assert asyncio.run(scenario()) == 1
+
+
+class FlakyCollection:
+    """Unique ``n``; the first call rejects odd documents, the second stores everything then loses the reply"""
+
+    def __init__(self):
+        self.docs = {}
+        self.calls = 0
+
+    async def insert_many(self, documents):
+        self.calls += 1
+        errors = []
+        for index, document in enumerate(documents):
+            if document["n"] in self.docs:
+                errors.append({"index": index, "code": 11000, "errmsg": "E11000 duplicate key"})
+            elif self.calls == 1 and document["n"] % 2:
+                errors.append({"index": index, "code": 91, "errmsg": "shutting down"})
+            else:
+                self.docs[document["n"]] = document
+        if self.calls == 2:
+            raise AutoReconnect("connection reset")
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+def test_retries_only_the_failed_documents():
+    async def scenario():
+        collection = FlakyCollection()
+        queue = WriteBehindQueue(lambda: collection, batch_size=10, flush_interval=60)
+        await queue._flush([{"n": i} for i in range(6)])
+        return collection, queue.stats()
+
+    collection, stats = asyncio.run(scenario())
+    assert sorted(collection.docs) == list(range(6))
+    assert collection.calls == 3
+    assert (stats["written"], stats["failed"]) == (6, 0)
+
+
+def test_rejects_when_full():
+    async def scenario():
+        queue = WriteBehindQueue(lambda: None, max_size=2)
+        queue._queue = asyncio.Queue(maxsize=2)
+        queue.submit({})
+        queue.submit({})
+        with pytest.raises(QueueFull):
+            queue.submit({})
+        return queue.stats()
+
+    assert asyncio.run(scenario())["rejected"] == 1
+
+
+def test_contact_route_returns_503_when_full(api, seeded_db, monkeypatch):
+    class Full:
+        running = True
+
+        def submit(self, document):
+            raise QueueFull()
+
+        def retry_after(self):
+            return 2
+
+    monkeypatch.setattr(server, "contact_queue", Full())
+    response = api.post("/api/contact", json={
+        "name": "سارة", "email": "sara@example.com", "subject": "تصميم", "message": "مرحبا",
+    })
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "2"